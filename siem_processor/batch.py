@@ -0,0 +1,169 @@
+"""
+batch.py | Procesamiento por lotes de exportaciones diarias: varios archivos y todas sus hojas de alarmas.
+
+Cada par (archivo, hoja) se procesa con ``process_alarms`` en un pool de procesos de
+tamaño acotado y genera su propio resultado; al final se escribe un resumen con los
+totales y las alertas de todos ellos.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from siem_processor.main import process_alarms
+from siem_processor.pipeline import init_worker
+from siem_processor.utils.excel_io import list_alarm_sheets, write_summary_workbook, DEFAULT_SHEET
+from siem_processor.utils.ingest import is_excel, is_supported
+from siem_processor.utils.knowledge_base import load_observation_index
+from siem_processor.modules.NordAPI import register_ip_resolver, get_ip_resolver_config, DEFAULT_LOOKUP_WORKERS
+from siem_processor.modules.geo_offline import load_geo_resolver
+
+DEFAULT_OUTPUT_DIR = "./siem_processor/output/lote"
+
+
+def find_input_files(paths):
+    """
+    Expande directorios y patrones glob a la lista de archivos de entrada a procesar.
+
+    Args:
+        paths (list): Directorios, patrones glob o rutas de archivos.
+
+    Returns:
+        list: Rutas sin repetir, ordenadas. En los directorios se toman los formatos
+        soportados por ``ingest.iter_records`` (se omiten los temporales de Excel '~$...').
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [m for m in glob.glob(os.path.join(path, "*")) if is_supported(m)]
+        else:
+            matches = glob.glob(path)
+        files.update(m for m in matches if not os.path.basename(m).startswith("~$"))
+    return sorted(files)
+
+
+def output_name(input_file, sheet_name):
+    """
+    Devuelve el nombre del resultado de una hoja de un archivo de entrada.
+
+    Args:
+        input_file (str): Ruta al archivo de entrada.
+        sheet_name (str): Hoja procesada.
+
+    Returns:
+        str: '<archivo>_<hoja>_SIEM.xlsx' con los caracteres no válidos reemplazados.
+    """
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    return re.sub(r"[^\w.-]+", "_", f"{stem}_{sheet_name}") + "_SIEM.xlsx"
+
+
+def process_batch(paths, bd_file, output_dir=DEFAULT_OUTPUT_DIR, jobs=None, geo_workers=DEFAULT_LOOKUP_WORKERS,
+                  checkpoint_db=None):
+    """
+    Procesa todas las hojas de alarmas de varios archivos en paralelo.
+
+    Los archivos que no son Excel (CSV, JSON lines, syslog) cuentan como una sola hoja.
+
+    Args:
+        paths (list): Directorios, patrones glob o rutas de archivos de entrada.
+        bd_file (str): Ruta al archivo Excel de la base de datos.
+        output_dir (str): Carpeta de los resultados y del resumen.
+        jobs (int | None): Hojas procesadas a la vez (por defecto: cantidad de CPUs).
+        geo_workers (int): Consultas de geolocalización simultáneas por hoja.
+        checkpoint_db (str | None): Base de checkpoints para retomar hojas ya procesadas.
+
+    Returns:
+        str | None: Ruta del resumen, o None si no se encontró ninguna hoja de alarmas.
+    """
+    tasks = []
+    for input_file in find_input_files(paths):
+        try:
+            sheets = list_alarm_sheets(input_file) if is_excel(input_file) else [DEFAULT_SHEET]
+        except Exception as e:
+            print(f"Error al leer {input_file}: {e}")
+            continue
+        tasks.extend((input_file, sheet) for sheet in sheets)
+    if not tasks:
+        print("No se encontraron hojas de alarmas para procesar.")
+        return None
+
+    # Se indexa la base una sola vez para que los workers carguen la caché ya generada
+    load_observation_index(bd_file)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    print(f"Procesando {len(tasks)} hojas con {jobs} procesos...")
+
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(get_ip_resolver_config(),)) as executor:
+        futures = {
+            executor.submit(
+                process_alarms, input_file, bd_file,
+                geo_workers=geo_workers, checkpoint_db=checkpoint_db, sheet_name=sheet,
+                output_file=os.path.join(output_dir, output_name(input_file, sheet)),
+            ): (input_file, sheet)
+            for input_file, sheet in tasks
+        }
+        for future in as_completed(futures):
+            input_file, sheet = futures[future]
+            try:
+                summaries[(input_file, sheet)] = future.result()
+            except Exception as e:
+                print(f"Error al procesar {input_file} (hoja '{sheet}'): {e}")
+
+    today = datetime.now().strftime("%d-%m")
+    summary_file = os.path.join(output_dir, f"{today}_SIEM_RESUMEN.xlsx")
+    write_summary_workbook(summary_file, (summaries[task] for task in tasks if task in summaries))
+    total = sum(summary["rows"] for summary in summaries.values())
+    print(f"Lote completado: {len(summaries)}/{len(tasks)} hojas, {total} filas. Resumen guardado en {summary_file}")
+    return summary_file
+
+
+# --- Punto de entrada principal ---
+if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Procesa en lote todas las hojas de alarmas de varias exportaciones.")
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="Directorios, patrones glob (por ejemplo 'data/2024-11-*.xlsx') o archivos de entrada."
+    )
+    parser.add_argument(
+        "--bd_file", default="data/BD_Logs.xlsx",
+        help="Ruta al archivo Excel de la base de datos (por defecto: 'BD_Logs.xlsx')."
+    )
+    parser.add_argument(
+        "--output_dir", default=DEFAULT_OUTPUT_DIR,
+        help=f"Carpeta de los resultados y del resumen (por defecto: '{DEFAULT_OUTPUT_DIR}')."
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None,
+        help="Hojas procesadas en paralelo (por defecto: cantidad de CPUs)."
+    )
+    parser.add_argument(
+        "--geoip_db", default=os.environ.get("SIEM_GEOIP_DB"),
+        help="Dataset CSV o índice local de rangos de IPs para geolocalizar sin red (por defecto: $SIEM_GEOIP_DB)."
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="No consultar la API de NordVPN; sólo se usa el índice local indicado en --geoip_db."
+    )
+    parser.add_argument(
+        "--geo_workers", type=int, default=DEFAULT_LOOKUP_WORKERS,
+        help=f"Consultas de geolocalización simultáneas por hoja (por defecto: {DEFAULT_LOOKUP_WORKERS})."
+    )
+    parser.add_argument(
+        "--checkpoint_db", default=None,
+        help="Base SQLite de filas procesadas para retomar un lote interrumpido."
+    )
+    args = parser.parse_args()
+    if args.offline and not args.geoip_db:
+        parser.error("--offline requiere --geoip_db")
+    if args.geoip_db:
+        register_ip_resolver(load_geo_resolver(args.geoip_db), use_api=not args.offline)
+    process_batch(
+        args.inputs, args.bd_file, output_dir=args.output_dir, jobs=args.jobs,
+        geo_workers=args.geo_workers, checkpoint_db=args.checkpoint_db
+    )
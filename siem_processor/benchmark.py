@@ -0,0 +1,450 @@
+"""
+benchmark.py | Benchmark de punta a punta con un generador de días sintéticos de alarmas.
+
+Genera un archivo del día (y una base de datos chica) con cuerpos en los formatos que
+parsean los handlers, en la cantidad y proporción indicadas, y mide:
+
+- filas por segundo de ``process_alarms`` completo (lectura, handlers y escritura),
+- percentiles de latencia por handler (p50/p95/p99, llamando a ``dispatch`` fila por fila),
+- memoria pico (heap de Python con ``tracemalloc`` y RSS máximo del proceso).
+
+La geolocalización usa un resolver sintético registrado con ``register_ip_resolver``
+sólo durante la medición, sin red, y la caché de la base sintética se guarda dentro de
+la carpeta de trabajo. Con ``--baseline`` se compara contra un reporte anterior y el
+proceso termina con código 1 si las filas por segundo caen más que la tolerancia.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from siem_processor.main import process_alarms
+from siem_processor.modules.registry import get_handler, dispatch
+from siem_processor.modules.NordAPI import register_ip_resolver, get_ip_resolver_config, set_ip_resolver_config
+
+DEFAULT_ROWS = 20000
+DEFAULT_MIX = {
+    "windows": 30,
+    "linux": 20,
+    "abm": 15,
+    "salto_lateral": 5,
+    "gpo": 5,
+    "pase_produccion": 5,
+    "vpn": 15,
+    "otros": 5,
+}
+DEFAULT_LATENCY_SAMPLE = 5000
+DEFAULT_TOLERANCE = 0.2
+
+# Ubicaciones del resolver sintético: (país, código, región, ciudad, latitud, longitud)
+_LOCATIONS = [
+    ("Paraguay", "PY", "Central", "Asuncion", -25.28, -57.63),
+    ("Argentina", "AR", "Buenos Aires", "Buenos Aires", -34.60, -58.38),
+    ("Argentina", "AR", "Cordoba", "Cordoba", -31.42, -64.18),
+    ("Brazil", "BR", "Sao Paulo", "Sao Paulo", -23.55, -46.63),
+    ("Spain", "ES", "Madrid", "Madrid", 40.42, -3.70),
+    ("United States", "US", "New York", "New York", 40.71, -74.01),
+]
+
+
+def synthetic_resolver(ip):
+    """
+    Resolver de geolocalización determinístico para el benchmark (sin red).
+
+    Args:
+        ip (str): Dirección IP.
+
+    Returns:
+        dict: Información con la misma forma que ``get_ip_info_from_nordvpn``.
+    """
+    country, code, region, city, latitude, longitude = _LOCATIONS[zlib.crc32(ip.encode()) % len(_LOCATIONS)]
+    return {
+        "ip": ip, "country": country, "country_code": code, "region": region, "city": city,
+        "state_code": "N/A", "zip_code": "Unknown", "latitude": latitude, "longitude": longitude,
+        "isp": "N/A", "asn": "N/A", "host_domain": "N/A", "vpn_detected": False, "gdpr": False,
+    }
+
+
+class _BodyFactory:
+    """Genera pares ``(alarma, cuerpo)`` sintéticos a partir de pools de usuarios, IPs y hosts."""
+
+    def __init__(self, rng, rows):
+        self.rng = rng
+        pool = max(10, rows // 20)
+        self.users = [f"u{rng.randint(100000, 999999)}" for _ in range(pool)]
+        self.ips = [f"{rng.randint(11, 200)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+                    for _ in range(pool)]
+        self.hosts = [f"SRV{rng.randint(1, 999):03d}" for _ in range(max(5, pool // 10))]
+        self.start = datetime(2024, 11, 7)
+
+    def _pick(self, values):
+        return self.rng.choice(values)
+
+    def _date(self, offset=0):
+        moment = self.start + timedelta(seconds=self.rng.randint(0, 86399) + offset)
+        return moment.strftime("%Y/%m/%d %H:%M:%S")
+
+    def windows(self):
+        user, ip, ip2, host = self._pick(self.users), self._pick(self.ips), self._pick(self.ips), self._pick(self.hosts)
+        kind = self.rng.randrange(5)
+        if kind == 0:
+            return ("Notificacion SIEM - Se ha detectado un inicio de sesión",
+                    f"Alarm: Windows - Login  Equipo {ip} Logon Type: 3 User: {user} "
+                    f"Session ID: 0x{self.rng.randint(1, 1 << 20):x} Source Network Address: {ip2} Source Port: 0")
+        if kind == 1:
+            return ("Notificacion SIEM - Se ha detectado un inicio de sesión",
+                    f"Alarm: Windows - Login  Equipo {ip} Tipo de inicio de sesión: 3 Usuario: {user} "
+                    f"Identificador de sesión: 0x{self.rng.randint(1, 1 << 20):x} Dirección de red de origen: {ip2}")
+        if kind == 2:
+            return ("Notificacion SIEM - Se ha detectado un inicio de sesión",
+                    f"Login Citrix Desde IP: {ip} Hacia Ip: {ip2} Usuario: {user} Host: {host}")
+        alarma = ("Notificacion SIEM - Se ha detectado un inicio de sesión en los DC" if kind == 3
+                  else "Notificacion SIEM - Se ha detectado un inicio de sesión sin opr o admin")
+        return alarma, f"Login Desde IP: {ip} Hacia Ip: {ip2} Usuario: {user} Host: {host}"
+
+    def linux(self):
+        user, ip, host = self._pick(self.users), self._pick(self.ips), self._pick(self.hosts)
+        kind = self.rng.randrange(4)
+        if kind == 0:
+            return ("Notificacion SIEM - Login fuera de puentes",
+                    f"Alarm: Login fuera de puentes  Usuario de origen: {user} IP de Origen: {ip} Puerto: 22 "
+                    f"Host de Destino: {host} IPAM: {ip.rsplit('.', 1)[0]}.0/24")
+        if kind == 1:
+            return ("Notificacion SIEM - Sudo su detectado",
+                    f"Alarm: Sudo su detectado  usuario: {user} Cambio a: root Host: {host} Ip: {ip}")
+        if kind == 2:
+            return ("Notificacion SIEM - Notificacion SIEM - Login sin usuario OPR o PS en Linux",
+                    f"Usuario: {user} Equipo: {host} Ip: {ip}")
+        return ("Notificacion SIEM - Notificacion - SIEM cambios audit",
+                f"Tipo de cambio: {self._pick(['regla', 'config', 'watch'])} Equipo: {host} Accion Usuario: {user}")
+
+    def abm(self):
+        origen, destino, ip = self._pick(self.users), self._pick(self.users), self._pick(self.ips)
+        alarma = self._pick([
+            "Notificacion SIEM - ABM-Usuario-AD-Creado",
+            "Notificacion SIEM - ABM-Restablecimiento-Credenciales",
+            "Notificacion SIEM - ABM-Grupo-AD-Agregado",
+            "Notificacion SIEM - ABM-Grupo-AD-Removido",
+        ])
+        if alarma.endswith("Creado"):
+            return alarma, f"Alarm: ABM  Usuario de origen: {origen}_admin Usuario de destino: {destino} IP de origen: {ip}"
+        grupo = self._pick(["G_ADM", "G_VPN", "G_DBA", ""])
+        return (alarma, f"Alarm: ABM  Usuario de origen: {origen}_admin Usuario de destino: {destino} "
+                        f"Grupo (si corresponde): {grupo} IP de origen: {ip}")
+
+    def salto_lateral(self):
+        usuario = self._pick(["liuzzid_dbaadm", "villajos_dbaadm", self._pick(self.users)])
+        alarma = self._pick(["Notificacion SIEM - Posible salto lateral 12+", "Notificacion SIEM - Posible salto lateral 6+"])
+        return alarma, f"Alarm: Posible salto lateral  Usuario de origen: {usuario} Host: {self._pick(self.hosts)}"
+
+    def gpo(self):
+        return ("Notificacion SIEM - SIEM - Cambio de politicas GPO",
+                f"Alarm: DCS-cambio-en-politica  Se ha detectado un cambio de las políticas GPO  "
+                f"Usuario: {self._pick(self.users)}_admin  DC: ASUSISV-MSDC{self.rng.randint(1, 4)}  Hora: {self._date()}")
+
+    def pase_produccion(self):
+        return ("Notificacion SIEM - Notificacion SIEM - Pase a produccion detectado",
+                f"Host: {self._pick(self.hosts)} Proceso: {self._pick(['bash', 'sh', 'python'])} "
+                f"Usuario: {self._pick(self.users)} Comando: cp app.war /opt/app/")
+
+    def _geo(self, ip):
+        country = synthetic_resolver(ip)["country"]
+        # En parte de las filas el país informado por el SIEM no coincide con el de la IP
+        if self.rng.random() < 0.5:
+            country = self._pick(_LOCATIONS)[0]
+        return f"Geolocalizacion de origen: Ciudad, Region, {country}, {self.rng.randint(1000, 9999)}"
+
+    def vpn(self):
+        user, ip, ip2 = self._pick(self.users), self._pick(self.ips), self._pick(self.ips)
+        kind = self.rng.randrange(4)
+        if kind < 2:
+            canal = "VPN" if kind == 0 else "Workapp"
+            return (f"Notificacion SIEM - {canal} - Login desde 2 IPs diferentes",
+                    f"{canal} - Login desde 2 IPs diferentes Fecha/hora: {self._date()} Usuario: {user} "
+                    f"IP de origen: {ip} {self._geo(ip)} --- Fecha/hora: {self._date(3600)} Usuario: {user} "
+                    f"IP de origen: {ip2} {self._geo(ip2)} ---")
+        if kind == 2:
+            return ("Notificacion SIEM - VPN fuera de ARG o PY.",
+                    f"Notificación SIEM - VPN fuera de ARG o PY. Fecha/hora: {self._date()} Usuario: {user} "
+                    f"IP de origen: {ip} {self._geo(ip)}")
+        return ("Notificacion SIEM - Workapp - Login fuera de ARG y PY",
+                f"Workapp - Login fuera de ARG y PY Fecha/hora: {self._date()} Usuario: {user} "
+                f"IP de origen: {ip} {self._geo(ip)}")
+
+    def otros(self):
+        alarma = self._pick([
+            "Notificacion SIEM - SIEM - Posible escaneo mediante VPN",
+            "Notificacion SIEM - Linux - Posible escaneo de puertos_local",
+            "Notificacion SIEM - Antivirus - Amenaza detectada",
+        ])
+        return alarma, f"Alarm: {alarma}  Usuario: {self._pick(self.users)} IP de origen: {self._pick(self.ips)}"
+
+
+def parse_mix(text):
+    """
+    Interpreta una mezcla de categorías con el formato 'windows=30,linux=20,...'.
+
+    Args:
+        text (str): Pesos por categoría.
+
+    Returns:
+        dict: Categoría -> peso.
+    """
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Categoría desconocida: {name} (disponibles: {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight)
+    return mix
+
+
+def generate_records(rows, mix=None, seed=0):
+    """
+    Genera filas sintéticas ``(alarma, cuerpo)``.
+
+    Args:
+        rows (int): Cantidad de filas.
+        mix (dict | None): Peso de cada categoría (ver ``DEFAULT_MIX``).
+        seed (int): Semilla para obtener siempre el mismo archivo.
+
+    Returns:
+        list: Pares ``(alarma, cuerpo)``.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    factory = _BodyFactory(rng, rows)
+    categories = list(mix)
+    makers = [getattr(factory, category) for category in categories]
+    weights = [mix[category] for category in categories]
+    return [rng.choices(makers, weights)[0]() for _ in range(rows)]
+
+
+def write_day_file(path, records, sheet_name="7-11"):
+    """
+    Escribe las filas generadas como un archivo del día (hoja con Alarma/Observación/Cuerpo).
+
+    Args:
+        path (str): Ruta del Excel a generar.
+        records (list): Pares ``(alarma, cuerpo)``.
+        sheet_name (str): Nombre de la hoja.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name)
+    sheet.append(["Alarma", "Observación", "Cuerpo"])
+    for alarma, cuerpo in records:
+        sheet.append([alarma, None, cuerpo])
+    workbook.save(path)
+
+
+def write_bd_file(path, records, known=200):
+    """
+    Escribe una base de datos 'BD' con observaciones para algunas de las filas generadas.
+
+    Args:
+        path (str): Ruta del Excel a generar.
+        records (list): Pares ``(alarma, cuerpo)``.
+        known (int): Cantidad de cuerpos con observación conocida.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title="BD")
+    sheet.append(["Alarma", "Cuerpo", "Observación"])
+    for alarma, cuerpo in records[:known]:
+        sheet.append([alarma, cuerpo, "Observación conocida (benchmark)"])
+    workbook.save(path)
+
+
+def _percentile(sorted_values, percent):
+    index = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def measure_handler_latency(records):
+    """
+    Mide la latencia de cada handler llamando a ``dispatch`` fila por fila.
+
+    Args:
+        records (list): Pares ``(alarma, cuerpo)``.
+
+    Returns:
+        dict: Handler -> {'rows', 'p50_us', 'p95_us', 'p99_us', 'max_us'}.
+    """
+    timings = {}
+    for alarma, cuerpo in records:
+        handler = get_handler(alarma)
+        name = handler.__name__.lstrip("_") if handler else "handle_general_case"
+        started = time.perf_counter()
+        dispatch(alarma, cuerpo)
+        timings.setdefault(name, []).append((time.perf_counter() - started) * 1e6)
+
+    report = {}
+    for name, values in sorted(timings.items()):
+        values.sort()
+        report[name] = {
+            "rows": len(values),
+            "p50_us": round(_percentile(values, 50), 1),
+            "p95_us": round(_percentile(values, 95), 1),
+            "p99_us": round(_percentile(values, 99), 1),
+            "max_us": round(values[-1], 1),
+        }
+    return report
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB y macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_benchmark(rows=DEFAULT_ROWS, mix=None, seed=0, workers=1, latency_sample=DEFAULT_LATENCY_SAMPLE,
+                  trace_memory=True, work_dir=None):
+    """
+    Genera un día sintético y mide ``process_alarms`` de punta a punta.
+
+    Args:
+        rows (int): Filas del archivo del día.
+        mix (dict | None): Peso de cada categoría de alarma.
+        seed (int): Semilla del generador.
+        workers (int): Procesos para los handlers en ``process_alarms``.
+        latency_sample (int): Filas usadas para medir la latencia por handler.
+        trace_memory (bool): Repite la corrida con ``tracemalloc`` para medir el heap pico.
+        work_dir (str | None): Carpeta de los archivos generados (por defecto, temporal).
+
+    Returns:
+        dict: Reporte con la configuración y los resultados.
+    """
+    work_dir = work_dir or tempfile.mkdtemp(prefix="siem_benchmark_")
+    os.makedirs(work_dir, exist_ok=True)
+    input_file = os.path.join(work_dir, "benchmark_dia.xlsx")
+    bd_file = os.path.join(work_dir, "benchmark_BD.xlsx")
+    output_file = os.path.join(work_dir, "benchmark_SIEM.xlsx")
+    # La caché de la base sintética queda dentro de work_dir y no en la del paquete
+    cache_dir = os.path.join(work_dir, "cache")
+
+    records = generate_records(rows, mix, seed)
+    write_day_file(input_file, records)
+    write_bd_file(bd_file, records)
+
+    # El resolver sintético sólo queda registrado mientras dura la medición
+    previous_resolvers = get_ip_resolver_config()
+    register_ip_resolver(synthetic_resolver, use_api=False)
+    try:
+        # Primera normalización fuera de la medición (queda en la caché, como en el uso diario)
+        process_alarms(input_file, bd_file, output_file=output_file, workers=workers, cache_dir=cache_dir)
+
+        started = time.perf_counter()
+        process_alarms(input_file, bd_file, output_file=output_file, workers=workers, cache_dir=cache_dir)
+        elapsed = time.perf_counter() - started
+
+        heap_peak = None
+        if trace_memory:
+            tracemalloc.start()
+            process_alarms(input_file, bd_file, output_file=output_file, workers=workers, cache_dir=cache_dir)
+            heap_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            tracemalloc.stop()
+
+        handlers = measure_handler_latency(records[:latency_sample])
+    finally:
+        set_ip_resolver_config(*previous_resolvers)
+
+    return {
+        "rows": rows,
+        "mix": mix or DEFAULT_MIX,
+        "seed": seed,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        "heap_peak_mb": heap_peak,
+        "max_rss_mb": _max_rss_mb(),
+        "handlers": handlers,
+        "work_dir": work_dir,
+    }
+
+
+def print_report(report):
+    """
+    Muestra el reporte del benchmark en forma de tabla.
+
+    Args:
+        report (dict): Resultado de ``run_benchmark``.
+    """
+    print(f"\nFilas: {report['rows']}  Workers: {report['workers']}  Tiempo: {report['seconds']} s  "
+          f"Filas/s: {report['rows_per_sec']}")
+    print(f"Memoria pico: heap {report['heap_peak_mb']} MB, RSS {report['max_rss_mb']} MB")
+    print(f"\n{'Handler':<32}{'filas':>8}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}{'max µs':>10}")
+    for name, stats in report["handlers"].items():
+        print(f"{name:<32}{stats['rows']:>8}{stats['p50_us']:>10}{stats['p95_us']:>10}"
+              f"{stats['p99_us']:>10}{stats['max_us']:>10}")
+
+
+def compare_with_baseline(report, baseline_file, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara las filas por segundo con un reporte anterior.
+
+    Args:
+        report (dict): Resultado de ``run_benchmark``.
+        baseline_file (str): Reporte JSON de referencia.
+        tolerance (float): Caída relativa admitida (0.2 = 20 %).
+
+    Returns:
+        bool: True si no hay regresión.
+    """
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = json.load(f)
+    minimum = baseline["rows_per_sec"] * (1 - tolerance)
+    if report["rows_per_sec"] < minimum:
+        print(f"Regresión: {report['rows_per_sec']} filas/s contra {baseline['rows_per_sec']} de referencia "
+              f"(mínimo admitido {minimum:.1f}).")
+        return False
+    print(f"Sin regresión: {report['rows_per_sec']} filas/s (referencia {baseline['rows_per_sec']}).")
+    return True
+
+
+# --- Punto de entrada principal ---
+if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Benchmark de process_alarms con un día de alarmas sintético.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help=f"Filas a generar (por defecto: {DEFAULT_ROWS}).")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=None,
+        help="Pesos por categoría, por ejemplo 'windows=30,linux=20,abm=15,salto_lateral=5,gpo=5,"
+             "pase_produccion=5,vpn=15,otros=5'."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador (por defecto: 0).")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para los handlers (por defecto: 1).")
+    parser.add_argument(
+        "--latency_sample", type=int, default=DEFAULT_LATENCY_SAMPLE,
+        help=f"Filas usadas para la latencia por handler (por defecto: {DEFAULT_LATENCY_SAMPLE})."
+    )
+    parser.add_argument("--no_tracemalloc", action="store_true", help="No mide el heap pico (ahorra una corrida).")
+    parser.add_argument("--work_dir", default=None, help="Carpeta de los archivos generados (por defecto: temporal).")
+    parser.add_argument("--json", default=None, help="Guarda el reporte en este archivo JSON.")
+    parser.add_argument("--baseline", default=None, help="Reporte JSON anterior contra el cual comparar.")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help=f"Caída de filas/s admitida respecto de --baseline (por defecto: {DEFAULT_TOLERANCE})."
+    )
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        rows=args.rows, mix=args.mix, seed=args.seed, workers=args.workers,
+        latency_sample=args.latency_sample, trace_memory=not args.no_tracemalloc, work_dir=args.work_dir
+    )
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline and not compare_with_baseline(report, args.baseline, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,376 @@
+"""
+daemon.py | Servicio residente: clasifica alarmas a pedido a través de una API HTTP local.
+
+Carga una sola vez los handlers, el índice de observaciones de la base de datos, la
+caché de geolocalización y las dependencias de los lotes de viaje imposible, y queda
+escuchando en 127.0.0.1 (o en un socket Unix). Cada alarma recibida pasa por el mismo
+``AlarmPipeline`` que el modo por archivo, con la memoización compartida entre
+pedidos, por lo que un playbook puede enriquecer una alarma sin pagar el arranque del
+intérprete ni la normalización de la base en cada llamada.
+
+Endpoints (JSON en UTF-8):
+    POST /alarma   {"alarma": ..., "cuerpo": ...} -> un resultado.
+    POST /alarmas  [{...}, ...] o {"alarmas": [...]} -> {"resultados": [...]}.
+    GET  /salud    Estado del servicio, contadores, cachés y estado de la API de geolocalización.
+
+Cada resultado tiene las claves 'alarma', 'observacion', 'critica' y 'negrita', como
+las líneas que emite el modo seguimiento.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from siem_processor.pipeline import AlarmPipeline
+from siem_processor.utils.excel_io import AlarmRecord
+from siem_processor.utils.fingerprint import AlarmMemo
+from siem_processor.utils.ingest import parse_record
+from siem_processor.utils.knowledge_base import load_observation_index
+from siem_processor.utils.style_utils import is_critical_alarm
+from siem_processor.modules.registry import GEO_ALARMS
+from siem_processor.modules.NordAPI import register_ip_resolver, get_geo_client, DEFAULT_LOOKUP_WORKERS
+from siem_processor.modules.geo_cache import get_default_cache
+from siem_processor.modules.geo_offline import load_geo_resolver
+from siem_processor.modules.correlation import LoginCorrelator, DEFAULT_WINDOW_HOURS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 16 * 1024 * 1024  # Tamaño máximo de un pedido
+MAX_BATCH_SIZE = 10000  # Alarmas máximas por pedido a /alarmas
+
+
+class AlarmService:
+    """
+    Estado residente del servicio: índice de la base, pipeline, memoización y cachés.
+
+    Los pedidos se procesan en paralelo; sólo el correlador y los contadores, que no
+    son seguros entre hilos, se actualizan de a un pedido por vez.
+
+    Args:
+        bd_file (str | None): Base de datos de observaciones conocidas (opcional).
+        geo_workers (int): Consultas de geolocalización simultáneas.
+        correlate (bool): Correlaciona los logins de cada usuario entre alarmas.
+        window_hours (float): Horas de historial por usuario usadas en la correlación.
+    """
+
+    def __init__(self, bd_file=None, geo_workers=DEFAULT_LOOKUP_WORKERS, correlate=False,
+                 window_hours=DEFAULT_WINDOW_HOURS):
+        self.bd_file = bd_file
+        self.known_observations = load_observation_index(bd_file) if bd_file else {}
+        self.memo = AlarmMemo()
+        self.pipeline = AlarmPipeline(self.known_observations, memo=self.memo, geo_workers=geo_workers)
+        self.correlator = LoginCorrelator(window_hours=window_hours, alarmas=GEO_ALARMS) if correlate else None
+        self.geo_cache = get_default_cache()
+        # NumPy se carga al arrancar y no en la primera alarma de viaje imposible
+        import numpy  # noqa: F401
+        self.started = time.time()
+        self.counters = {"pedidos": 0, "alarmas": 0, "errores": 0}
+        self._lock = threading.Lock()
+
+    def classify(self, items):
+        """
+        Clasifica un lote de alarmas.
+
+        Args:
+            items (list): Tuplas ``(alarma, cuerpo)``.
+
+        Returns:
+            list: Un dict por alarma, en el mismo orden, con 'alarma', 'observacion',
+            'critica' y 'negrita'.
+        """
+        records = [AlarmRecord(fila, alarma, cuerpo) for fila, (alarma, cuerpo) in enumerate(items, start=1)]
+        # Los handlers y las consultas de geolocalización corren sin el lock: la memo y la
+        # caché de geolocalización son seguras entre hilos
+        processed = list(self.pipeline.process(records))
+        results = []
+        with self._lock:
+            for record, (observacion, is_bold) in processed:
+                if self.correlator is not None:
+                    observacion, is_bold = self.correlator.annotate(
+                        record.alarma, record.cuerpo, observacion, is_bold
+                    )
+                results.append({
+                    "alarma": record.alarma,
+                    "observacion": observacion,
+                    "critica": is_critical_alarm(record.alarma),
+                    "negrita": bool(is_bold),
+                })
+            self.counters["pedidos"] += 1
+            self.counters["alarmas"] += len(records)
+        return results
+
+    def count_error(self):
+        """Cuenta un pedido rechazado."""
+        with self._lock:
+            self.counters["errores"] += 1
+
+    def health(self):
+        """
+        Devuelve el estado del servicio.
+
+        Returns:
+            dict: Segundos en servicio, tamaño del índice de la base, contadores de
+            pedidos, estadísticas de la memoización y de la caché de geolocalización y
+            métricas del cliente de la API (ver ``GeoLookupClient.stats``).
+        """
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "estado": "ok",
+            "segundos_activo": round(time.time() - self.started, 1),
+            "base_conocida": len(self.known_observations),
+            "contadores": counters,
+            "memo": self.memo.stats(),
+            "geo": self.geo_cache.stats(),
+            "geo_api": get_geo_client().stats(),
+        }
+
+
+class _RequestError(ValueError):
+    # Pedido inválido con un código de estado distinto de 400
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # Conexiones keep-alive: un playbook puede enviar varios pedidos por conexión
+    protocol_version = "HTTP/1.1"
+    server_version = "SIEMProcessor"
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/salud":
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_error(404, f"Ruta desconocida: {self.path}")
+
+    def do_POST(self):
+        route = self.path.rstrip("/")
+        if route not in ("/alarma", "/alarmas"):
+            self._send_error(404, f"Ruta desconocida: {self.path}")
+            return
+        try:
+            data = self._read_json()
+            if route == "/alarma":
+                items = [self._parse_item(data, None)]
+            else:
+                if isinstance(data, dict):
+                    data = data.get("alarmas")
+                if not isinstance(data, list):
+                    raise ValueError("se esperaba una lista de alarmas o un objeto con la clave 'alarmas'")
+                if len(data) > MAX_BATCH_SIZE:
+                    raise ValueError(f"el lote supera el máximo de {MAX_BATCH_SIZE} alarmas")
+                items = [self._parse_item(item, i) for i, item in enumerate(data)]
+        except ValueError as e:
+            self._send_error(getattr(e, "status", 400), str(e))
+            return
+
+        started = time.perf_counter()
+        try:
+            results = self.server.service.classify(items)
+        except Exception as e:
+            self._send_error(500, f"Error al procesar las alarmas: {e}")
+            return
+        latency = round((time.perf_counter() - started) * 1000, 1)
+        if route == "/alarma":
+            self._send_json(200, dict(results[0], latencia_ms=latency))
+        else:
+            self._send_json(200, {"resultados": results, "latencia_ms": latency})
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            # El cuerpo no se lee: se cierra la conexión en lugar de reutilizarla
+            self.close_connection = True
+            if length < 0:
+                raise _RequestError(400, "falta el encabezado Content-Length o no es válido")
+            raise _RequestError(413, f"el pedido supera el máximo de {MAX_BODY_BYTES} bytes")
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except UnicodeDecodeError:
+            raise ValueError("el pedido no está en UTF-8")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+
+    @staticmethod
+    def _parse_item(data, index):
+        where = "" if index is None else f" (alarma {index})"
+        try:
+            parsed = parse_record(data)
+        except ValueError as e:
+            raise ValueError(f"{e}{where}")
+        if parsed is None:
+            raise ValueError(f"faltan las claves 'alarma' y 'cuerpo'{where}")
+        return parsed
+
+    def _send_error(self, status, message):
+        self.server.service.count_error()
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # En un socket Unix el cliente no tiene dirección
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _remove_stale_socket(socket_path):
+    # Un socket de una ejecución anterior impide volver a enlazar la ruta; sólo se borra
+    # si es un socket y nadie lo está atendiendo
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"'{socket_path}' existe y no es un socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"El socket '{socket_path}' está en uso por otra instancia")
+
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """
+    Crea el servidor HTTP del servicio sin empezar a atender pedidos.
+
+    Args:
+        service (AlarmService): Estado residente que atiende los pedidos.
+        host (str): Dirección de escucha (por defecto sólo la interfaz local).
+        port (int): Puerto TCP (0 = uno libre elegido por el sistema).
+        socket_path (str | None): Si se indica, escucha en este socket Unix en lugar de TCP.
+        verbose (bool): Registra cada pedido en stderr.
+
+    Returns:
+        socketserver.BaseServer: El servidor, con ``serve_forever`` y ``server_close``.
+
+    Raises:
+        FileExistsError: Si ``socket_path`` existe y no es un socket, o si otra instancia
+            está atendiendo en él.
+    """
+    if socket_path:
+        _remove_stale_socket(socket_path)
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o660)
+    else:
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """
+    Atiende pedidos hasta recibir Ctrl+C.
+
+    Args:
+        service (AlarmService): Estado residente que atiende los pedidos.
+        host (str): Dirección de escucha.
+        port (int): Puerto TCP.
+        socket_path (str | None): Socket Unix en lugar de TCP (opcional).
+        verbose (bool): Registra cada pedido en stderr.
+    """
+    server = create_server(service, host=host, port=port, socket_path=socket_path, verbose=verbose)
+    if socket_path:
+        print(f"Servicio escuchando en el socket {socket_path}")
+    else:
+        print(f"Servicio escuchando en http://{server.server_address[0]}:{server.server_address[1]}")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# --- Punto de entrada principal ---
+if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Servicio residente que clasifica alarmas SIEM a través de una API HTTP local.")
+    parser.add_argument(
+        "--bd_file", default=None,
+        help="Archivo Excel de la base de datos para reutilizar observaciones conocidas (opcional)."
+    )
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST,
+        help=f"Dirección de escucha (por defecto: {DEFAULT_HOST}, sólo accesible desde el equipo)."
+    )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT,
+        help=f"Puerto TCP (por defecto: {DEFAULT_PORT})."
+    )
+    parser.add_argument(
+        "--socket", default=None,
+        help="Ruta de un socket Unix en el que escuchar en lugar del puerto TCP (opcional)."
+    )
+    parser.add_argument(
+        "--geoip_db", default=os.environ.get("SIEM_GEOIP_DB"),
+        help="Dataset CSV o índice local de rangos de IPs para geolocalizar sin red (por defecto: $SIEM_GEOIP_DB)."
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="No consultar la API de NordVPN; sólo se usa el índice local indicado en --geoip_db."
+    )
+    parser.add_argument(
+        "--geo_workers", type=int, default=DEFAULT_LOOKUP_WORKERS,
+        help=f"Consultas de geolocalización simultáneas (por defecto: {DEFAULT_LOOKUP_WORKERS})."
+    )
+    parser.add_argument(
+        "--correlate", action="store_true",
+        help="Correlaciona los logins de cada usuario entre alarmas para detectar viajes imposibles."
+    )
+    parser.add_argument(
+        "--window_hours", type=float, default=DEFAULT_WINDOW_HOURS,
+        help=f"Horas de historial por usuario para la correlación (por defecto: {DEFAULT_WINDOW_HOURS})."
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Registra cada pedido en stderr."
+    )
+    args = parser.parse_args()
+    if args.offline and not args.geoip_db:
+        parser.error("--offline requiere --geoip_db")
+    if args.geoip_db:
+        register_ip_resolver(load_geo_resolver(args.geoip_db), use_api=not args.offline)
+    alarm_service = AlarmService(
+        bd_file=args.bd_file, geo_workers=args.geo_workers, correlate=args.correlate,
+        window_hours=args.window_hours
+    )
+    try:
+        serve(alarm_service, host=args.host, port=args.port, socket_path=args.socket, verbose=args.verbose)
+    except FileExistsError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,261 @@
+"""
+follow.py | Modo seguimiento: procesa alarmas a medida que llegan a un archivo de log o a stdin.
+
+Un hilo lector sigue la fuente (como ``tail -f``, tolerando rotación y truncado del
+archivo) y encola cada alarma con su hora de llegada. El hilo principal arma micro-lotes:
+toma todo lo que llega hasta completar ``batch_size`` filas o hasta agotar el
+presupuesto de latencia de la primera fila del lote (descontando el tiempo que suele
+tardar en procesarse un lote), y los pasa por el mismo ``AlarmPipeline`` que el modo
+por archivo. Los veredictos críticos o en negrita se emiten como líneas JSON.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from siem_processor.pipeline import AlarmPipeline
+from siem_processor.utils.excel_io import AlarmRecord
+from siem_processor.utils.fingerprint import AlarmMemo
+from siem_processor.utils.ingest import parse_jsonl_line, parse_syslog_line, SYSLOG_EXTENSIONS
+from siem_processor.utils.knowledge_base import load_observation_index
+from siem_processor.utils.style_utils import is_critical_alarm
+from siem_processor.modules.registry import GEO_ALARMS
+from siem_processor.modules.NordAPI import register_ip_resolver, DEFAULT_LOOKUP_WORKERS
+from siem_processor.modules.geo_offline import load_geo_resolver
+from siem_processor.modules.correlation import LoginCorrelator, DEFAULT_WINDOW_HOURS
+
+DEFAULT_MAX_LATENCY = 1.0  # segundos entre la llegada de una alarma y la emisión de su veredicto
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_POLL_INTERVAL = 0.2  # segundos entre lecturas cuando el archivo no crece
+
+LINE_PARSERS = {"jsonl": parse_jsonl_line, "syslog": parse_syslog_line}
+
+_EOF = object()
+
+
+def detect_format(source):
+    """
+    Elige el formato de línea de una fuente según su extensión.
+
+    Args:
+        source (str): Ruta al archivo o '-' para stdin.
+
+    Returns:
+        str: 'syslog' para .log/.syslog, 'jsonl' en cualquier otro caso.
+    """
+    return "syslog" if source != "-" and source.lower().endswith(SYSLOG_EXTENSIONS) else "jsonl"
+
+
+def tail_lines(path, from_start=False, poll_interval=DEFAULT_POLL_INTERVAL, stop=None):
+    """
+    Sigue un archivo que crece y genera sus líneas completas.
+
+    Si el archivo se trunca o se reemplaza (rotación), se vuelve a leer desde el inicio.
+
+    Args:
+        path (str): Ruta al archivo.
+        from_start (bool): Lee también el contenido existente (por defecto sólo lo nuevo).
+        poll_interval (float): Segundos de espera cuando no hay datos nuevos.
+        stop (threading.Event | None): Evento para terminar el seguimiento.
+
+    Yields:
+        str: Una línea, sin el salto de línea final.
+    """
+    f = open(path, encoding="utf-8", errors="replace", newline="")
+    if not from_start:
+        f.seek(0, os.SEEK_END)
+    partial = ""
+    try:
+        while stop is None or not stop.is_set():
+            chunk = f.readline()
+            if chunk:
+                partial += chunk
+                if partial.endswith("\n"):
+                    yield partial.rstrip("\r\n")
+                    partial = ""
+                continue
+
+            time.sleep(poll_interval)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_ino != os.fstat(f.fileno()).st_ino or stat.st_size < f.tell():
+                f.close()
+                f = open(path, encoding="utf-8", errors="replace", newline="")
+                partial = ""
+    finally:
+        f.close()
+
+
+def _read_source(source, parse, items, from_start, poll_interval, stop):
+    lines = sys.stdin if source == "-" else tail_lines(source, from_start, poll_interval, stop)
+    for fila, line in enumerate(lines, start=1):
+        if stop.is_set():
+            break
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        try:
+            parsed = parse(line)
+        except ValueError as e:
+            print(f"Línea {fila} ignorada: {e}", file=sys.stderr)
+            continue
+        if parsed is None:
+            print(f"Línea {fila} ignorada: formato no reconocido", file=sys.stderr)
+            continue
+        items.put((time.monotonic(), AlarmRecord(fila, *parsed)))
+    items.put(_EOF)
+
+
+def follow(source, bd_file=None, line_format=None, max_latency=DEFAULT_MAX_LATENCY, batch_size=DEFAULT_BATCH_SIZE,
+           emit_all=False, output=None, from_start=False, poll_interval=DEFAULT_POLL_INTERVAL,
+           geo_workers=DEFAULT_LOOKUP_WORKERS, correlate=False, window_hours=DEFAULT_WINDOW_HOURS):
+    """
+    Procesa las alarmas de una fuente a medida que llegan.
+
+    Termina al llegar al final de stdin o con Ctrl+C.
+
+    Args:
+        source (str): Ruta al archivo de log a seguir o '-' para stdin.
+        bd_file (str | None): Base de datos de observaciones conocidas (opcional).
+        line_format (str | None): 'jsonl' o 'syslog'. Por defecto se detecta por la extensión.
+        max_latency (float): Segundos máximos deseados entre la llegada de una alarma y
+            la emisión de su veredicto.
+        batch_size (int): Máximo de alarmas por micro-lote.
+        emit_all (bool): Emite todas las alarmas, no sólo las críticas o en negrita.
+        output (file | None): Destino de las líneas JSON (por defecto stdout).
+        from_start (bool): Procesa también el contenido que el archivo ya tenía.
+        poll_interval (float): Segundos entre lecturas cuando el archivo no crece.
+        geo_workers (int): Consultas de geolocalización simultáneas.
+        correlate (bool): Correlaciona los logins de cada usuario entre alarmas.
+        window_hours (float): Horas de historial por usuario usadas en la correlación.
+
+    Returns:
+        dict: Alarmas procesadas, emitidas y latencia máxima observada (segundos).
+    """
+    output = output or sys.stdout
+    parse = LINE_PARSERS[line_format or detect_format(source)]
+    known_observations = load_observation_index(bd_file) if bd_file else {}
+    pipeline = AlarmPipeline(known_observations, memo=AlarmMemo(), geo_workers=geo_workers)
+    correlator = LoginCorrelator(window_hours=window_hours, alarmas=GEO_ALARMS) if correlate else None
+
+    items = queue.Queue(maxsize=batch_size * 4)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read_source, args=(source, parse, items, from_start, poll_interval, stop), daemon=True
+    )
+    reader.start()
+
+    stats = {"processed": 0, "emitted": 0, "max_latency": 0.0}
+    # Promedio móvil del tiempo de proceso de un lote, para reservarlo dentro del presupuesto
+    batch_cost = 0.0
+    try:
+        finished = False
+        while not finished:
+            item = items.get()
+            if item is _EOF:
+                break
+            batch = [item]
+            deadline = item[0] + max(0.0, max_latency - batch_cost)
+            while len(batch) < batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = items.get(timeout=timeout) if timeout > 0 else items.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _EOF:
+                    finished = True
+                    break
+                batch.append(item)
+
+            started = time.monotonic()
+            results = pipeline.process(record for _, record in batch)
+            for (arrived, _), (record, (observacion, is_bold)) in zip(batch, results):
+                if correlator is not None:
+                    observacion, is_bold = correlator.annotate(record.alarma, record.cuerpo, observacion, is_bold)
+                is_critical = is_critical_alarm(record.alarma)
+                if not (emit_all or is_critical or is_bold):
+                    continue
+                latency = time.monotonic() - arrived
+                stats["max_latency"] = max(stats["max_latency"], latency)
+                output.write(json.dumps({
+                    "fila": record.fila,
+                    "alarma": record.alarma,
+                    "observacion": observacion,
+                    "critica": is_critical,
+                    "negrita": bool(is_bold),
+                    "latencia_ms": round(latency * 1000, 1),
+                }, ensure_ascii=False) + "\n")
+                stats["emitted"] += 1
+            output.flush()
+            stats["processed"] += len(batch)
+            batch_cost = 0.8 * batch_cost + 0.2 * (time.monotonic() - started)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+    return stats
+
+
+# --- Punto de entrada principal ---
+if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Procesa alarmas SIEM en vivo desde un archivo de log o stdin.")
+    parser.add_argument(
+        "source", nargs="?", default="-",
+        help="Archivo de log a seguir (JSON lines o syslog RFC 5424) o '-' para stdin (por defecto)."
+    )
+    parser.add_argument(
+        "--format", choices=sorted(LINE_PARSERS), default=None,
+        help="Formato de cada línea (por defecto: syslog para .log/.syslog, jsonl en otro caso)."
+    )
+    parser.add_argument(
+        "--bd_file", default=None,
+        help="Archivo Excel de la base de datos para reutilizar observaciones conocidas (opcional)."
+    )
+    parser.add_argument(
+        "--max_latency", type=float, default=DEFAULT_MAX_LATENCY,
+        help=f"Segundos máximos entre la llegada de una alarma y su veredicto (por defecto: {DEFAULT_MAX_LATENCY})."
+    )
+    parser.add_argument(
+        "--batch_size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"Máximo de alarmas por micro-lote (por defecto: {DEFAULT_BATCH_SIZE})."
+    )
+    parser.add_argument(
+        "--all", action="store_true",
+        help="Emite el veredicto de todas las alarmas, no sólo de las críticas o en negrita."
+    )
+    parser.add_argument(
+        "--from_start", action="store_true",
+        help="Procesa también el contenido que el archivo ya tenía antes de empezar a seguirlo."
+    )
+    parser.add_argument(
+        "--geoip_db", default=os.environ.get("SIEM_GEOIP_DB"),
+        help="Dataset CSV o índice local de rangos de IPs para geolocalizar sin red (por defecto: $SIEM_GEOIP_DB)."
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="No consultar la API de NordVPN; sólo se usa el índice local indicado en --geoip_db."
+    )
+    parser.add_argument(
+        "--correlate", action="store_true",
+        help="Correlaciona los logins de cada usuario entre alarmas para detectar viajes imposibles."
+    )
+    parser.add_argument(
+        "--window_hours", type=float, default=DEFAULT_WINDOW_HOURS,
+        help=f"Horas de historial por usuario para la correlación (por defecto: {DEFAULT_WINDOW_HOURS})."
+    )
+    args = parser.parse_args()
+    if args.offline and not args.geoip_db:
+        parser.error("--offline requiere --geoip_db")
+    if args.geoip_db:
+        register_ip_resolver(load_geo_resolver(args.geoip_db), use_api=not args.offline)
+    follow(
+        args.source, bd_file=args.bd_file, line_format=args.format, max_latency=args.max_latency,
+        batch_size=args.batch_size, emit_all=args.all, from_start=args.from_start,
+        correlate=args.correlate, window_hours=args.window_hours
+    )
@@ -0,0 +1,198 @@
+"""
+import_budget.py | Control del tiempo de importación de los puntos de entrada.
+
+Importa cada módulo en un intérprete nuevo, mide cuánto tarda la importación (sin el
+arranque del intérprete) y verifica que no cargue dependencias pesadas que sólo hacen
+falta en algunos caminos: pandas al reconstruir la base, NumPy en los lotes de viaje
+imposible, requests en la primera consulta a la API y openpyxl al leer o escribir Excel.
+Termina con código 1 si algún módulo supera su presupuesto, carga un módulo prohibido o
+no puede importarse, para usarlo como control en CI (o ``enforce_budgets`` desde Python,
+como hace ``tests/test_import_budget.py``).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "numpy", "requests", "openpyxl")
+# Módulos de handlers y de geolocalización que el registro importa recién al despachar
+HANDLER_MODULES = (
+    "siem_processor.modules.windows_login",
+    "siem_processor.modules.linux_login",
+    "siem_processor.modules.general_cases",
+    "siem_processor.modules.other_cases",
+    "siem_processor.modules.NordAPI",
+    "siem_processor.modules.geo_client",
+)
+
+# Módulo -> (segundos máximos de importación, módulos que no debe cargar)
+BUDGETS = {
+    "siem_processor.test_logs": (0.15, HEAVY_MODULES + HANDLER_MODULES),
+    "siem_processor.testing": (0.15, HEAVY_MODULES),
+    "siem_processor.modules.registry": (0.15, HEAVY_MODULES + HANDLER_MODULES),
+    "siem_processor.main": (0.5, ("pandas", "requests")),
+    "siem_processor.follow": (0.5, ("pandas", "requests")),
+    "siem_processor.batch": (0.5, ("pandas", "requests")),
+    "siem_processor.daemon": (0.5, ("pandas", "requests")),
+}
+DEFAULT_RUNS = 3
+# Los intérpretes de medición se abren en la raíz del proyecto para importar el paquete
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, runs=DEFAULT_RUNS, watch=HEAVY_MODULES):
+    """
+    Mide la importación de un módulo en intérpretes nuevos.
+
+    Args:
+        module (str): Nombre del módulo a importar.
+        runs (int): Mediciones; se conserva la más rápida para reducir el ruido.
+        watch (tuple): Módulos cuya carga se informa.
+
+    Returns:
+        dict: 'seconds' (mejor tiempo) y 'loaded' (módulos de ``watch`` cargados).
+
+    Raises:
+        RuntimeError: Si la importación falla.
+    """
+    best = None
+    for _ in range(max(1, runs)):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=tuple(watch))],
+            capture_output=True, text=True, cwd=PROJECT_ROOT
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {module}: {completed.stderr.strip()}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+class ImportBudgetExceeded(Exception):
+    """
+    Algún módulo superó su presupuesto, cargó un módulo prohibido o no pudo importarse.
+
+    Attributes:
+        results (list): Resultado completo de ``check_budgets``.
+    """
+
+    def __init__(self, results):
+        failed = [result["module"] for result in results if not result["ok"]]
+        super().__init__(f"Presupuesto de importación excedido: {', '.join(failed)}")
+        self.results = results
+
+
+def check_budgets(budgets=None, runs=DEFAULT_RUNS, factor=1.0):
+    """
+    Mide todos los módulos y los compara con su presupuesto.
+
+    Un módulo que no puede importarse se informa como fallido (con su 'error') y no
+    interrumpe la medición de los demás.
+
+    Args:
+        budgets (dict | None): Presupuestos como en ``BUDGETS`` (por defecto ``BUDGETS``).
+        runs (int): Mediciones por módulo.
+        factor (float): Multiplicador de los tiempos máximos (para equipos más lentos).
+
+    Returns:
+        list: Un dict por módulo con 'module', 'seconds', 'budget', 'loaded',
+        'forbidden' (módulos cargados que no debería), 'error' y 'ok'.
+    """
+    results = []
+    for module, (budget, forbidden) in (budgets or BUDGETS).items():
+        try:
+            measured = measure_import(module, runs=runs, watch=tuple(dict.fromkeys(HEAVY_MODULES + tuple(forbidden))))
+        except RuntimeError as e:
+            results.append({"module": module, "seconds": None, "budget": budget * factor, "loaded": [],
+                            "forbidden": [], "error": str(e), "ok": False})
+            continue
+        loaded_forbidden = [m for m in measured["loaded"] if m in forbidden]
+        results.append({
+            "module": module,
+            "seconds": measured["seconds"],
+            "budget": budget * factor,
+            "loaded": measured["loaded"],
+            "forbidden": loaded_forbidden,
+            "error": None,
+            "ok": measured["seconds"] <= budget * factor and not loaded_forbidden,
+        })
+    return results
+
+
+def enforce_budgets(budgets=None, runs=DEFAULT_RUNS, factor=1.0):
+    """
+    Igual que ``check_budgets``, pero falla si algún módulo no cumple su presupuesto.
+
+    Returns:
+        list: El resultado de ``check_budgets`` cuando todos los módulos lo cumplen.
+
+    Raises:
+        ImportBudgetExceeded: Si algún módulo no lo cumple.
+    """
+    results = check_budgets(budgets, runs=runs, factor=factor)
+    if not all(result["ok"] for result in results):
+        raise ImportBudgetExceeded(results)
+    return results
+
+
+def main(argv=None):
+    """
+    Punto de entrada de línea de comandos.
+
+    Args:
+        argv (list | None): Argumentos (por defecto los de ``sys.argv``).
+
+    Returns:
+        int: Código de salida: 0 si todos los módulos cumplen su presupuesto, 1 si no.
+    """
+    parser = argparse.ArgumentParser(description="Verifica el presupuesto de tiempo de importación de los puntos de entrada.")
+    parser.add_argument(
+        "--runs", type=int, default=DEFAULT_RUNS,
+        help=f"Mediciones por módulo; se toma la más rápida (por defecto: {DEFAULT_RUNS})."
+    )
+    parser.add_argument(
+        "--factor", type=float, default=1.0,
+        help="Multiplica los presupuestos, por ejemplo 2 en equipos lentos (por defecto: 1)."
+    )
+    parser.add_argument(
+        "--json", action="store_true",
+        help="Muestra el resultado en JSON."
+    )
+    args = parser.parse_args(argv)
+    try:
+        results = enforce_budgets(runs=args.runs, factor=args.factor)
+        error = None
+    except ImportBudgetExceeded as e:
+        results, error = e.results, e
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            if result["error"]:
+                print(f"{'ERROR':<9}{result['module']:<36}{result['error']}")
+                continue
+            status = "OK" if result["ok"] else "EXCEDIDO"
+            detail = f" (carga {', '.join(result['forbidden'])})" if result["forbidden"] else ""
+            print(f"{status:<9}{result['module']:<36}{result['seconds'] * 1000:>8.1f} ms / "
+                  f"{result['budget'] * 1000:.0f} ms{detail}")
+    if error is not None:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+# --- Punto de entrada principal ---
+if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.exit(main())
@@ -2,125 +2,246 @@
 main.py | Este script procesa alarmas SIEM desde un archivo Excel y actualiza las observaciones basadas en la base de datos.
 """
 import argparse
-from openpyxl import load_workbook
+import sys
+import time
 from datetime import datetime
-from siem_processor.utils.normalization import normalize_database
-from siem_processor.utils.style_utils import apply_styles, is_critical_alarm
-from siem_processor.modules.windows_login import handle_windows_login
-from siem_processor.modules.linux_login import handle_linux_login
-from siem_processor.modules.general_cases import handle_general_case
-from siem_processor.modules.other_cases import handle_abm_cases, handle_salto_lateral_dba, handle_pases_produccion, handle_cambio_gpo
+from siem_processor.utils.knowledge_base import load_observation_index
+from siem_processor.utils.normalization import DEFAULT_CACHE_DIR
+from siem_processor.utils.fingerprint import AlarmMemo
+from siem_processor.utils.checkpoint import CheckpointStore, checkpoint_source, DEFAULT_DB_PATH as DEFAULT_CHECKPOINT_DB
+from siem_processor.utils.style_utils import is_critical_alarm
+from siem_processor.utils.excel_io import AlarmWorkbookSource, write_alarm_workbook, DEFAULT_SHEET
+from siem_processor.utils.ingest import iter_records, is_excel, output_row_offset
+from siem_processor.utils.stats import RunStats, get_stats, set_stats
+from siem_processor.modules.registry import GEO_ALARMS
+from siem_processor.modules.NordAPI import register_ip_resolver, get_geo_client_stats, DEFAULT_LOOKUP_WORKERS
+from siem_processor.modules.geo_cache import get_default_cache
+from siem_processor.modules.geo_offline import load_geo_resolver
+from siem_processor.modules.correlation import LoginCorrelator, DEFAULT_WINDOW_HOURS
 #from siem_processor.modules.InfoGetterSIEM import fetch_user_info, get_user_details,extract_user_id
-from siem_processor.modules.NordAPI import process_alarm
-import pandas as pd
+from siem_processor.pipeline import AlarmPipeline
 import os
 
 # --- Función para procesar alarmas ---
-def process_alarms(input_file,bd_file):
+def process_alarms(input_file, bd_file, output_dir="./siem_processor/output", geo_workers=DEFAULT_LOOKUP_WORKERS, workers=1,
+                   checkpoint_db=None, reset_checkpoint=False, sheet_name=DEFAULT_SHEET, output_file=None,
+                   correlate=False, window_hours=DEFAULT_WINDOW_HOURS, stats=None, cache_dir=DEFAULT_CACHE_DIR):
     """
     Procesa alarmas desde un archivo Excel de entrada y actualiza observaciones basadas en la base de datos.
 
     Args:
-        input_file (str): Ruta al archivo Excel de entrada.
+        input_file (str): Ruta al archivo de entrada: Excel, CSV, JSON lines o syslog
+            RFC 5424 (ver ``ingest.iter_records``).
         bd_file (str): Ruta al archivo Excel de la base de datos.
-    """
-    # Normalizar la base de datos
-    df_bd = normalize_database(bd_file)
-
-    # Leer el archivo Excel de entrada
-    df_input = pd.read_excel(input_file, sheet_name='7-11')
-    workbook = load_workbook(input_file)
-    sheet_input = workbook['7-11']
-
-    for index, row in df_input.iterrows():
-        alarma = row['Alarma']
-        cuerpo = row['Cuerpo']
+        output_dir (str): Carpeta donde se guarda '<dd-mm>_SIEM_DIA.xlsx'.
+        geo_workers (int): Consultas de geolocalización simultáneas en la pre-carga de IPs.
+        workers (int): Procesos para ejecutar los handlers (1 = todo en el proceso actual).
+        checkpoint_db (str | None): Base SQLite con las filas ya procesadas del archivo de
+            entrada. Si se indica, sólo se procesan las filas nuevas o modificadas.
+        reset_checkpoint (bool): Descarta las filas guardadas del archivo antes de procesarlo.
+        sheet_name (str): Hoja de alarmas a procesar (por defecto: '7-11').
+        output_file (str | None): Ruta del resultado. Por defecto '<dd-mm>_SIEM_DIA.xlsx'
+            dentro de ``output_dir``.
+        correlate (bool): Correlaciona los logins de cada usuario entre alarmas para
+            detectar viajes imposibles (ver ``LoginCorrelator``).
+        window_hours (float): Horas de historial por usuario usadas en la correlación.
+        stats (RunStats | None): Instrumentación de la ejecución: tiempos por etapa y por
+            handler, llamadas externas y aciertos de cachés (ver ``RunStats.report``).
+        cache_dir (str | None): Carpeta de la caché de la base normalizada y su índice.
+            None desactiva la caché.
 
-        # Procesar casos basados en el tipo de alarma
-        if alarma in [
-            "Notificacion SIEM - Se ha detectado un inicio de sesión", 
-            "Notificacion SIEM - Se ha detectado un inicio de sesión en los DC",
-            "Notificacion SIEM - Se ha detectado un inicio de sesión sin opr o admin"
-         ]:
-            observacion, is_bold = handle_windows_login(alarma, cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        elif alarma in [
-            "Notificacion SIEM - Login fuera de puentes",
-            "Notificacion SIEM - Notificacion SIEM - Login sin usuario OPR o PS en Linux",
-            "Notificacion SIEM - Sudo su detectado",
-            "Notificacion SIEM - Notificacion - SIEM cambios audit"
-        ]:
-            observacion, is_bold = handle_linux_login(alarma, cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        elif alarma in [
-            "Notificacion SIEM - VPN - Login desde 2 IPs diferentes",
-            "Notificacion SIEM - Workapp - Login desde 2 IPs diferentes",
-            "Notificacion SIEM - Workapp - Login fuera de ARG y PY",
-            "Notificacion SIEM - VPN fuera de ARG o PY."
-        ]:
-            # Usar IP2Location para procesar alarmas de viajes imposibles
-            observacion = process_alarm(cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        elif alarma in [
-            "Notificacion SIEM - ABM-Usuario-AD-Creado",
-            "Notificacion SIEM - ABM-Restablecimiento-Credenciales",
-            "Notificacion SIEM - ABM-Grupo-AD-Agregado",
-            "Notificacion SIEM - ABM-Grupo-AD-Removido"
-        ]:
-            observacion, is_bold = handle_abm_cases(alarma, cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        elif alarma in [
-            "Notificacion SIEM - Posible salto lateral 12+",
-            "Notificacion SIEM - Posible salto lateral 6+"
-        ]:
-            observacion, is_bold = handle_salto_lateral_dba(alarma, cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        elif alarma in [
-            "Notificacion SIEM - Notificacion SIEM - Pase a produccion detectado"
-        ]:  
-            observacion, is_bold = handle_pases_produccion(alarma, cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        elif alarma in [
-            "Notificacion SIEM - SIEM - Cambio de politicas GPO"
-        ]:
-            observacion, is_bold = handle_cambio_gpo(alarma, cuerpo)
-            is_bold = True if "Alerta" in observacion else False
-        else:
-            observacion, is_bold = handle_general_case(alarma, cuerpo)
+    Returns:
+        dict: Resumen con 'input_file', 'sheet', 'output_file', 'rows', 'critical' y
+        'alerts' (filas críticas o en negrita como ``(alarma, observacion, cuerpo, is_critical)``).
+    """
+    if stats is not None:
+        previous_stats = set_stats(stats)
+        try:
+            return process_alarms(
+                input_file, bd_file, output_dir=output_dir, geo_workers=geo_workers, workers=workers,
+                checkpoint_db=checkpoint_db, reset_checkpoint=reset_checkpoint, sheet_name=sheet_name,
+                output_file=output_file, correlate=correlate, window_hours=window_hours, cache_dir=cache_dir
+            )
+        finally:
+            set_stats(previous_stats)
+    stats = get_stats()
 
-        # Actualizar las observaciones en el Excel
-        sheet_input.cell(row=index + 2, column=2, value=observacion)
-        sheet_input.cell(row=index + 2, column=3, value=cuerpo)
+    # Normalizar la base de datos e indexar las observaciones ya conocidas (en caché)
+    with stats.stage("normalizacion_bd"):
+        known_observations = load_observation_index(bd_file, cache_dir=cache_dir)
+    # Resultados reutilizables para filas repetidas
+    memo = AlarmMemo()
+    # Filas ya procesadas en ejecuciones anteriores sobre el mismo archivo
+    checkpoint = None
+    if checkpoint_db:
+        checkpoint = CheckpointStore(checkpoint_source(input_file, sheet_name), db_path=checkpoint_db)
+        if reset_checkpoint:
+            checkpoint.clear()
+    pipeline = AlarmPipeline(known_observations, memo=memo, geo_workers=geo_workers, workers=workers,
+                             checkpoint=checkpoint)
 
-        # Aplicar estilos para alarmas críticas y en negrita
-        is_critical = is_critical_alarm(alarma)
-        apply_styles(sheet_input, index, is_critical, is_bold)
+    # Leer el archivo de entrada una sola vez, en streaming (un libro de Excel se copia
+    # a la salida desde la misma lectura)
+    source = AlarmWorkbookSource(input_file, sheet_name=sheet_name) if is_excel(input_file) else None
+    records = source.records() if source is not None else iter_records(input_file, sheet_name=sheet_name)
+    records = stats.timed_iter("lectura", records)
 
     # Guardar el archivo procesado
-    today = datetime.now().strftime("%d-%m")
+    if output_file is None:
+        today = datetime.now().strftime("%d-%m")
+        output_file = os.path.join(output_dir, f"{today}_SIEM_DIA.xlsx")
     # Si no existe la carpeta output la crea
-    if not os.path.exists("./siem_processor/output"):
-        os.makedirs("./siem_processor/output")
-    # Hacer cd a la carpeta output
-    os.chdir("./siem_processor/output")
-    output_file = f"{today}_SIEM_DIA.xlsx"
-    workbook.save(output_file)
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    summary = {"input_file": input_file, "sheet": sheet_name, "output_file": output_file, "critical": 0, "alerts": []}
+    correlator = LoginCorrelator(window_hours=window_hours, alarmas=GEO_ALARMS) if correlate else None
+    processed_before = stats.stage_seconds("proceso")
+    started = time.perf_counter()
+    try:
+        summary["rows"] = write_alarm_workbook(
+            output_file, stats.timed_iter("proceso", _iter_output_rows(pipeline, records, summary, correlator)),
+            sheet_name=sheet_name, source=source, row_offset=output_row_offset(input_file)
+        )
+    finally:
+        if source is not None:
+            source.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    # "proceso" incluye la lectura y las etapas del pipeline; la escritura es el resto
+    stats.add_time("escritura", time.perf_counter() - started - (stats.stage_seconds("proceso") - processed_before))
     print(f"Procesamiento completado. Resultado guardado en {output_file}")
+    memo_stats = memo.stats()
+    print(
+        f"Deduplicación: {memo_stats['hit_rate']:.1%} de {memo_stats['rows']} filas reutilizadas "
+        f"({memo_stats['exact_hits']} repetidas; {memo_stats['templates']} plantillas, "
+        f"{memo_stats['template_hit_rate']:.1%} de filas con plantilla ya vista)."
+    )
+    if checkpoint is not None:
+        print(f"Checkpoint: {checkpoint.reused} filas tomadas de ejecuciones anteriores, {checkpoint.stored} guardadas.")
+    if correlator is not None:
+        print(f"Correlación: {correlator.findings} viajes imposibles detectados entre alarmas.")
+
+    if stats.enabled:
+        rows = summary["rows"]
+        known_hits = stats.counters.get("base_conocida_aciertos", 0)
+        stats.set_cache("base_conocida", {"hits": known_hits, "hit_rate": known_hits / rows if rows else 0.0})
+        stats.set_cache("memo", memo_stats)
+        stats.set_cache("geo", get_default_cache().stats())
+        geo_api_stats = get_geo_client_stats()
+        if geo_api_stats is not None:
+            stats.set_service("nordvpn", geo_api_stats)
+        if checkpoint is not None:
+            stats.set_cache("checkpoint", {
+                "reused": checkpoint.reused, "stored": checkpoint.stored,
+                "hit_rate": checkpoint.reused / rows if rows else 0.0,
+            })
+        if correlator is not None:
+            stats.count("correlacion_hallazgos", correlator.findings)
+    return summary
+
+
+def _iter_output_rows(pipeline, records, summary, correlator=None):
+    """
+    Procesa los registros de entrada y genera las filas de salida en orden.
+
+    Args:
+        pipeline (AlarmPipeline): Pipeline de procesamiento configurado.
+        records (iterable): Registros ``AlarmRecord`` de la hoja de entrada.
+        summary (dict): Resumen de la ejecución; se actualizan 'critical' y 'alerts'.
+        correlator (LoginCorrelator | None): Correlación de logins entre filas, en orden.
+
+    Yields:
+        tuple: ``(fila, alarma, observacion, cuerpo, is_critical, is_bold)``.
+    """
+    for record, (observacion, is_bold) in pipeline.process(records):
+        if correlator is not None:
+            observacion, is_bold = correlator.annotate(record.alarma, record.cuerpo, observacion, is_bold)
+        # Estilos para alarmas críticas y en negrita
+        is_critical = is_critical_alarm(record.alarma)
+        if is_critical:
+            summary["critical"] += 1
+        if is_critical or is_bold:
+            summary["alerts"].append((record.alarma, observacion, record.cuerpo, is_critical))
+        yield record.fila, record.alarma, observacion, record.cuerpo, is_critical, is_bold
 
 
 # --- Punto de entrada principal ---
 if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
     parser = argparse.ArgumentParser(description="Procesa alarmas SIEM desde un archivo Excel.")
     parser.add_argument(
         "--input_file", default="data/7-11.xlsx",
-        help="Ruta al archivo Excel de entrada (por defecto: '7-11.xlsx')."
+        help="Ruta al archivo de entrada: .xlsx, .csv, .json, .jsonl o syslog .log, opcionalmente .gz (por defecto: '7-11.xlsx')."
     )
     parser.add_argument(
         "--bd_file", default="data/BD_Logs.xlsx",
         help="Ruta al archivo Excel de la base de datos (por defecto: 'BD_Logs.xlsx')."
     )
+    parser.add_argument(
+        "--sheet", default=DEFAULT_SHEET,
+        help=f"Hoja de alarmas del archivo de entrada (por defecto: '{DEFAULT_SHEET}')."
+    )
+    parser.add_argument(
+        "--geoip_db", default=os.environ.get("SIEM_GEOIP_DB"),
+        help="Dataset CSV o índice local de rangos de IPs para geolocalizar sin red (por defecto: $SIEM_GEOIP_DB)."
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="No consultar la API de NordVPN; sólo se usa el índice local indicado en --geoip_db."
+    )
+    parser.add_argument(
+        "--geo_workers", type=int, default=DEFAULT_LOOKUP_WORKERS,
+        help=f"Consultas de geolocalización simultáneas (por defecto: {DEFAULT_LOOKUP_WORKERS})."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Procesos para ejecutar los handlers en paralelo (por defecto: 1)."
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Reutiliza las filas ya procesadas del archivo de entrada y sólo procesa las nuevas o modificadas."
+    )
+    parser.add_argument(
+        "--checkpoint_db", default=DEFAULT_CHECKPOINT_DB,
+        help="Base SQLite de filas procesadas usada con --resume (por defecto: $SIEM_CHECKPOINT_DB o cache/checkpoint.sqlite)."
+    )
+    parser.add_argument(
+        "--reset_checkpoint", action="store_true",
+        help="Con --resume, descarta las filas guardadas del archivo y lo procesa completo."
+    )
+    parser.add_argument(
+        "--correlate", action="store_true",
+        help="Correlaciona los logins de cada usuario entre alarmas para detectar viajes imposibles."
+    )
+    parser.add_argument(
+        "--window_hours", type=float, default=DEFAULT_WINDOW_HOURS,
+        help=f"Horas de historial por usuario para la correlación (por defecto: {DEFAULT_WINDOW_HOURS})."
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Muestra al final un resumen de tiempos por etapa y por handler, llamadas externas y cachés."
+    )
+    parser.add_argument(
+        "--stats_json", default=None,
+        help="Guarda el reporte completo de estadísticas de la ejecución en este archivo JSON."
+    )
     args = parser.parse_args()
-    input_file = "C:/Users/u997568/Documents/GitHub/Script_SIEM/siem_processor/data/7-11.xlsx"
-    bd_file = "C:/Users/u997568/Documents/GitHub/Script_SIEM/siem_processor/data/BD_Logs.xlsx"
-    process_alarms(input_file=input_file, bd_file=bd_file)
+    if args.offline and not args.geoip_db:
+        parser.error("--offline requiere --geoip_db")
+    if args.geoip_db:
+        register_ip_resolver(load_geo_resolver(args.geoip_db), use_api=not args.offline)
+    run_stats = RunStats() if args.stats or args.stats_json else None
+    process_alarms(
+        input_file=args.input_file, bd_file=args.bd_file, geo_workers=args.geo_workers, workers=args.workers,
+        checkpoint_db=args.checkpoint_db if args.resume else None, reset_checkpoint=args.reset_checkpoint,
+        sheet_name=args.sheet, correlate=args.correlate, window_hours=args.window_hours, stats=run_stats
+    )
+    if run_stats is not None:
+        if args.stats:
+            run_stats.print_summary()
+        if args.stats_json:
+            run_stats.write_json(args.stats_json)
+            print(f"Estadísticas guardadas en {args.stats_json}")
 
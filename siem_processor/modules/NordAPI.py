@@ -1,51 +1,212 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from math import cos, sqrt, radians
 from datetime import datetime
-import re
-import sys
-
-# Configurar la codificación UTF-8
-sys.stdout.reconfigure(encoding='utf-8')
+import threading
+from siem_processor.utils.extraction import IP, register_pattern, extract_fields, find_all
+from siem_processor.modules.travel import batch_impossible_travel, DEFAULT_SPEED_THRESHOLD
+
+register_pattern("geo_ip_origen", rf"IP de origen: (?P<ip>{IP})", 0)
+register_pattern("geo_fecha_hora", r"Fecha/hora: (\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})", 0)
+register_pattern(
+    "geo_pais",
+    r"Geolocalizacion de origen: [\w\sáéíóúÁÉÍÓÚñÑ]+, [\w\sáéíóúÁÉÍÓÚñÑ]+, (?P<pais>[\w\s]+)(?:,|\s*\d+)",
+    0
+)
+
+DEFAULT_LOOKUP_WORKERS = 8
+HTTP_POOL_SIZE = 32  # Conexiones keep-alive máximas de la sesión compartida
+
+# Resolvers adicionales consultados antes que la API (por ejemplo, un índice offline)
+_ip_resolvers = []
+_use_api = True
+
+def register_ip_resolver(resolver, use_api=True):
+    """
+    Registra un resolver de geolocalización que se consulta antes que la API de NordVPN.
+
+    Args:
+        resolver (callable): Función ``resolver(ip) -> dict | None`` con la misma forma
+            de respuesta que ``get_ip_info_from_nordvpn``.
+        use_api (bool): Si es False, la API deja de consultarse cuando ningún resolver
+            conoce la IP (modo sin red).
+    """
+    global _use_api
+    _ip_resolvers.append(resolver)
+    _use_api = use_api
+
+def get_ip_resolver_config():
+    """
+    Devuelve la configuración actual de resolvers, para replicarla en otro proceso.
+
+    Returns:
+        tuple: ``(resolvers, use_api)``.
+    """
+    return list(_ip_resolvers), _use_api
+
+def set_ip_resolver_config(resolvers, use_api=True):
+    """
+    Reemplaza la configuración de resolvers (ver ``get_ip_resolver_config``).
+
+    Args:
+        resolvers (list): Resolvers a consultar antes que la API.
+        use_api (bool): Si se consulta la API cuando ningún resolver conoce la IP.
+    """
+    global _use_api
+    _ip_resolvers[:] = resolvers
+    _use_api = use_api
 
 # Función para obtener información de una IP desde la API de NordVPN
 def get_ip_info_from_nordvpn(ip):
+    """
+    Obtiene la geolocalización de una IP. Primero se consultan los resolvers registrados
+    y luego la caché (LRU en memoria y SQLite persistente), que llama a la API sólo ante
+    un fallo. Si la API no responde (timeouts, caída, 429) el resultado no se cachea.
+
+    Args:
+        ip (str): Dirección IP.
+
+    Returns:
+        dict | None: Información de la IP o None si no se pudo obtener.
+    """
+    for resolver in _ip_resolvers:
+        info = resolver(ip)
+        if info:
+            return info
+    if not _use_api:
+        return None
+    # La caché y el cliente HTTP se cargan recién cuando hace falta consultar la API
+    from siem_processor.modules.geo_cache import get_default_cache
+    from siem_processor.modules.geo_client import GeoLookupUnavailable, CircuitBreaker
+    try:
+        return get_default_cache().get_or_fetch(ip, _fetch_ip_info_from_nordvpn)
+    except GeoLookupUnavailable as e:
+        # Con el circuito abierto se falla rápido y sin repetir el aviso por cada IP
+        if get_geo_client().breaker.state == CircuitBreaker.CLOSED:
+            print(f"Error al realizar la solicitud a la API: {e}")
+        return None
+
+# Cliente HTTP compartido (conexiones keep-alive, timeouts, reintentos, límite de tasa y circuito)
+_geo_client = None
+_geo_client_lock = threading.Lock()
+
+def get_geo_client():
+    """
+    Devuelve el cliente de la API de NordVPN del proceso, creándolo en el primer uso.
+
+    Returns:
+        GeoLookupClient: El cliente compartido (sus métricas están en ``stats()``).
+    """
+    global _geo_client
+    with _geo_client_lock:
+        if _geo_client is None:
+            from siem_processor.modules.geo_client import GeoLookupClient
+            _geo_client = GeoLookupClient(service="nordvpn", pool_size=HTTP_POOL_SIZE)
+        return _geo_client
+
+def get_geo_client_stats():
+    """
+    Devuelve los contadores del cliente de la API sin crearlo si todavía no se usó.
+
+    Returns:
+        dict | None: Resultado de ``GeoLookupClient.stats`` o None si no hubo consultas a la API.
+    """
+    with _geo_client_lock:
+        client = _geo_client
+    return client.stats() if client is not None else None
+
+def set_geo_client(client):
+    """
+    Reemplaza el cliente de la API de NordVPN (por ejemplo, con otros timeouts o límites).
+
+    Args:
+        client (GeoLookupClient): Cliente a usar en las consultas siguientes.
+    """
+    global _geo_client
+    with _geo_client_lock:
+        _geo_client = client
+
+# Consulta directa a la API de NordVPN (sin caché)
+def _fetch_ip_info_from_nordvpn(ip):
+    """
+    Consulta la API de NordVPN.
+
+    Args:
+        ip (str): Dirección IP.
+
+    Returns:
+        dict | None: Información de la IP, o None si la API la rechazó.
+
+    Raises:
+        GeoLookupUnavailable: Si la API no respondió (el fallo no debe cachearse).
+    """
+    # Definir la URL para hacer la solicitud GET
+    url = f"https://web-api.nordvpn.com/v1/ips/lookup/{ip}"
+
+    # Realizar la solicitud GET a la API (con timeouts y reintentos)
+    response = get_geo_client().get(url)
+
+    # Verificar si la respuesta fue exitosa (código 200)
+    if response.status_code != 200:
+        print(f"Error al obtener la información de NordVPN. Código de estado: {response.status_code}")
+        return None
     try:
-        # Definir la URL para hacer la solicitud GET
-        url = f"https://web-api.nordvpn.com/v1/ips/lookup/{ip}"
-
-        # Realizar la solicitud GET a la API
-        response = requests.get(url)
-
-        # Verificar si la respuesta fue exitosa (código 200)
-        if response.status_code == 200:
-            data = response.json()  # Parsear la respuesta JSON
-
-            # Extraer la información relevante
-            location_info = {
-                "country": data.get("country", "N/A"),
-                "country_code": data.get("country_code", "N/A"),
-                "region": data.get("region", "N/A"),
-                "city": data.get("city", "N/A"),
-                "state_code": data.get("state_code", "N/A"),
-                "zip_code": data.get("zip_code", "Unknown"),
-                "latitude": data.get("latitude"),
-                "longitude": data.get("longitude"),
-                "isp": data.get("isp", "N/A"),
-                "asn": data.get("isp_asn", "N/A"),
-                "host_domain": data["host"]["domain"] if data.get("host") else "N/A",
-                "vpn_detected": data.get("hosted", False),
-                "gdpr": data.get("gdpr", False),
-            }
-            return location_info
-
-        else:
-            print(f"Error al obtener la información de NordVPN. Código de estado: {response.status_code}")
-            return None
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error al realizar la solicitud a la API: {e}")
+        data = response.json()  # Parsear la respuesta JSON
+    except ValueError as e:
+        print(f"Respuesta inválida de la API para {ip}: {e}")
         return None
 
+    # Extraer la información relevante
+    return {
+        "ip": data.get("ip", "N/A"),
+        "country": data.get("country", "N/A"),
+        "country_code": data.get("country_code", "N/A"),
+        "region": data.get("region", "N/A"),
+        "city": data.get("city", "N/A"),
+        "state_code": data.get("state_code", "N/A"),
+        "zip_code": data.get("zip_code", "Unknown"),
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude"),
+        "isp": data.get("isp", "N/A"),
+        "asn": data.get("isp_asn", "N/A"),
+        "host_domain": data["host"]["domain"] if data.get("host") else "N/A",
+        "vpn_detected": data.get("hosted", False),
+        "gdpr": data.get("gdpr", False),
+    }
+
+# --- Pre-carga concurrente de IPs ---
+def prefetch_ip_info(logs, max_workers=DEFAULT_LOOKUP_WORKERS):
+    """
+    Resuelve en paralelo todas las IPs distintas presentes en un lote de logs.
+
+    Las IPs ya cacheadas se omiten; el resto se consulta con un pool de hilos limitado a
+    ``max_workers`` sobre la sesión HTTP compartida. Los resultados quedan en la caché,
+    de modo que los handlers posteriores los leen sin bloquear en la red.
+
+    Args:
+        logs (iterable): Cuerpos de las alarmas de viaje/VPN.
+        max_workers (int): Máximo de consultas simultáneas (acotado a ``HTTP_POOL_SIZE``).
+
+    Returns:
+        int: Cantidad de IPs consultadas.
+    """
+    from siem_processor.modules.geo_cache import get_default_cache
+    cache = get_default_cache()
+    pending = []
+    seen = set()
+    for log in logs:
+        for ip in find_all("geo_ip_origen", log):
+            if ip in seen:
+                continue
+            seen.add(ip)
+            if not cache.contains(ip):
+                pending.append(ip)
+
+    if not pending:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, HTTP_POOL_SIZE, len(pending)))) as executor:
+        list(executor.map(get_ip_info_from_nordvpn, pending))
+    return len(pending)
+
 # --- Función para calcular la diferencia de tiempo ---
 def calculate_time_difference(time1, time2):
     time_format = "%Y/%m/%d %H:%M:%S"
@@ -90,20 +251,16 @@ def process_alarm(log):
 # --- Extraer país del log ---
 def extract_country_from_log(log):
     # Expresión regular para extraer el país desde la geolocalización en el log
-    country_regex = r"Geolocalizacion de origen: [\w\sáéíóúÁÉÍÓÚñÑ]+, [\w\sáéíóúÁÉÍÓÚñÑ]+, ([\w\s]+)(?:,|\s*\d+)"
-    match = re.search(country_regex, log)
+    fields = extract_fields("geo_pais", log)
 
-    if match:
-        return match.group(1).strip()  # Se devuelve el país sin espacios extras
+    if fields:
+        return fields["pais"]  # Se devuelve el país sin espacios extras
     return None
 
 # --- Función para procesar login desde dos IPs diferentes ---
 def process_multiple_ip_login(log):
-    ip_regex = r"IP de origen: (\d+\.\d+\.\d+\.\d+)"
-    date_regex = r"Fecha/hora: (\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})"
-
-    ips = re.findall(ip_regex, log)
-    dates = re.findall(date_regex, log)
+    ips = find_all("geo_ip_origen", log)
+    dates = find_all("geo_fecha_hora", log)
 
     if len(ips) != 2 or len(dates) != 2:
         return "Error: No se pudieron encontrar dos IPs o dos fechas en el log"
@@ -129,15 +286,66 @@ def process_multiple_ip_login(log):
     else:
         return f"Login desde dos IPs diferentes detectado. Viaje posible. Distancia: {distancia:.2f} km, Tiempo: {tiempo:.2f} horas."
 
+# --- Función para procesar en lote logins desde dos IPs diferentes ---
+def process_multiple_ip_logins(logs, threshold=DEFAULT_SPEED_THRESHOLD, method="approx"):
+    """
+    Versión por lotes de ``process_multiple_ip_login``: extrae IPs y fechas de cada log
+    y evalúa distancia, tiempo y viaje imposible de todos los pares en una sola llamada
+    vectorizada.
+
+    Args:
+        logs (list): Cuerpos de alarmas "Login desde 2 IPs diferentes".
+        threshold (float): Velocidad máxima admisible en km/h.
+        method (str): Método de distancia ("approx" o "haversine").
+
+    Returns:
+        list: Observaciones en el mismo orden que ``logs``.
+    """
+    results = [None] * len(logs)
+    pending = []
+    for index, log in enumerate(logs):
+        ips = find_all("geo_ip_origen", log)
+        dates = find_all("geo_fecha_hora", log)
+
+        if len(ips) != 2 or len(dates) != 2:
+            results[index] = "Error: No se pudieron encontrar dos IPs o dos fechas en el log"
+            continue
+
+        ip_info_1 = get_ip_info_from_nordvpn(ips[0])
+        ip_info_2 = get_ip_info_from_nordvpn(ips[1])
+
+        if not ip_info_1 or not ip_info_2:
+            results[index] = "Error: No se pudo obtener información para una o ambas IPs"
+            continue
+
+        coords = (ip_info_1['latitude'], ip_info_1['longitude'], ip_info_2['latitude'], ip_info_2['longitude'])
+        if None in coords:
+            results[index] = "Error: Las coordenadas de una o ambas IPs son inválidas"
+            continue
+
+        pending.append((index, ips, coords, dates))
+
+    if pending:
+        lat1, lon1, lat2, lon2 = zip(*(coords for _, _, coords, _ in pending))
+        time1, time2 = zip(*(dates for _, _, _, dates in pending))
+        distancias, tiempos, imposibles = batch_impossible_travel(
+            lat1, lon1, lat2, lon2, time1, time2, threshold=threshold, method=method
+        )
+        for (index, ips, _, _), distancia, tiempo, imposible in zip(pending, distancias, tiempos, imposibles):
+            if imposible:
+                results[index] = f"Viaje imposible detectado entre las IPs {ips[0]} y {ips[1]}. Distancia: {distancia:.2f} km, Tiempo: {tiempo:.2f} horas."
+            else:
+                results[index] = f"Login desde dos IPs diferentes detectado. Viaje posible. Distancia: {distancia:.2f} km, Tiempo: {tiempo:.2f} horas."
+    return results
+
 # --- Función para procesar VPN fuera de ARG o PY ---
 def process_vpn_outside_permitted_countries(log):
-    ip_regex = r"IP de origen: (\d+\.\d+\.\d+\.\d+)"
-    ip_match = re.search(ip_regex, log)
+    ip_match = extract_fields("geo_ip_origen", log)
 
     if not ip_match:
         return "Error: No se pudo encontrar la IP en el log"
 
-    ip = ip_match.group(1)
+    ip = ip_match["ip"]
     ip_info = get_ip_info_from_nordvpn(ip)
 
     if not ip_info:
@@ -158,6 +366,43 @@ def process_vpn_outside_permitted_countries(log):
 def process_login_outside_permitted_countries(log):
     return process_vpn_outside_permitted_countries(log)
 
+# --- Handlers de las alarmas de geolocalización (ver registry) ---
+def handle_geo_alarm(alarma, cuerpo):
+    """
+    Handler de las alarmas de viaje imposible y de login fuera de los países permitidos.
+
+    Args:
+        alarma (str): El tipo de alarma.
+        cuerpo (str): El cuerpo del log.
+
+    Returns:
+        tuple: Observación (str) y False (la negrita la decide el registro).
+    """
+    return process_alarm(cuerpo), False
+
+def handle_travel_batch(alarma, cuerpos):
+    """
+    Handler por lote de las alarmas de viaje imposible.
+
+    Igual que ``process_alarm``, el tipo de análisis se decide por el texto del cuerpo:
+    los cuerpos con dos logins se evalúan juntos con ``process_multiple_ip_logins``.
+
+    Args:
+        alarma (str): El tipo de alarma.
+        cuerpos (list): Cuerpos de todas las filas de la alarma.
+
+    Returns:
+        list: Tuplas ``(observacion, False)`` en el mismo orden que ``cuerpos``.
+    """
+    results = [None] * len(cuerpos)
+    travel = [i for i, cuerpo in enumerate(cuerpos) if "Login desde 2 IPs diferentes" in cuerpo]
+    for i, observacion in zip(travel, process_multiple_ip_logins([cuerpos[i] for i in travel])):
+        results[i] = (observacion, False)
+    for i, cuerpo in enumerate(cuerpos):
+        if results[i] is None:
+            results[i] = handle_geo_alarm(alarma, cuerpo)
+    return results
+
 if __name__ == "__main__":
     # --- Ejemplo de logs para probar ---
     logs = [
@@ -0,0 +1,172 @@
+"""
+correlation.py | Correlación de logins entre alarmas: viaje imposible a partir del historial de cada usuario.
+
+``process_multiple_ip_login`` sólo detecta un viaje imposible cuando el SIEM ya puso las
+dos IPs y las dos fechas en el mismo cuerpo. ``LoginCorrelator`` mantiene, por usuario,
+una ventana de sus logins (fecha, IP y coordenadas) ordenada por fecha y compara cada
+login nuevo sólo con sus vecinos inmediatos en el tiempo: si algún par de logins de la
+ventana implica una velocidad imposible, también la implica algún par consecutivo, por
+lo que no hace falta comparar todos contra todos. Los logins que salen de la ventana
+se descartan a medida que avanza el tiempo.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from siem_processor.utils.extraction import register_pattern, extract_fields, find_all
+from siem_processor.modules.NordAPI import get_ip_info_from_nordvpn, approximate_distance
+from siem_processor.modules.travel import DEFAULT_SPEED_THRESHOLD
+
+register_pattern("correlacion_usuario", r"Usuario: (?P<usuario>\S+)", 0)
+
+DEFAULT_WINDOW_HOURS = 24
+# Cada cuántos logins se eliminan los usuarios sin actividad dentro de la ventana
+_SWEEP_INTERVAL = 10000
+_TIME_FORMAT = "%Y/%m/%d %H:%M:%S"
+
+
+def extract_login_events(cuerpo):
+    """
+    Extrae los logins (usuario, fecha, IP) presentes en el cuerpo de una alarma.
+
+    Args:
+        cuerpo (str): Cuerpo del log.
+
+    Returns:
+        list: Tuplas ``(usuario, fecha, ip)`` con la fecha como ``datetime``. Vacía si el
+        cuerpo no tiene usuario o si la cantidad de fechas e IPs no coincide.
+    """
+    fields = extract_fields("correlacion_usuario", cuerpo)
+    if not fields:
+        return []
+    dates = find_all("geo_fecha_hora", cuerpo)
+    ips = find_all("geo_ip_origen", cuerpo)
+    if not dates or len(dates) != len(ips):
+        return []
+    try:
+        return [(fields["usuario"], datetime.strptime(date, _TIME_FORMAT), ip) for date, ip in zip(dates, ips)]
+    except ValueError:
+        return []
+
+
+class LoginCorrelator:
+    """
+    Historial de logins por usuario con detección de viaje imposible entre alarmas.
+
+    Args:
+        window_hours (float): Horas de historial que se conservan por usuario.
+        threshold (float): Velocidad máxima admisible en km/h.
+        resolver (callable): Función ``resolver(ip) -> dict | None`` de geolocalización.
+        alarmas (iterable | None): Alarmas cuyos cuerpos se correlacionan (None = todas).
+    """
+
+    def __init__(self, window_hours=DEFAULT_WINDOW_HOURS, threshold=DEFAULT_SPEED_THRESHOLD,
+                 resolver=get_ip_info_from_nordvpn, alarmas=None):
+        self.window = timedelta(hours=window_hours)
+        self.threshold = threshold
+        self.resolver = resolver
+        self.alarmas = frozenset(alarmas) if alarmas is not None else None
+        # usuario -> lista de (fecha, ip, lat, lon, origen) ordenada por fecha
+        self._history = {}
+        self._latest = None
+        self._observed = 0
+        self._rows = 0
+        self.findings = 0
+
+    def observe(self, usuario, fecha, ip, origen=None):
+        """
+        Agrega un login al historial y lo compara con los logins vecinos del usuario.
+
+        Args:
+            usuario (str): Usuario del login.
+            fecha (datetime): Fecha y hora del login.
+            ip (str): IP de origen.
+            origen (int | None): Identificador de la fila; los logins de una misma fila no
+                se comparan entre sí (ya los evalúa su handler).
+
+        Returns:
+            list: Hallazgos de viaje imposible, como dicts con 'usuario', 'ip_anterior',
+            'fecha_anterior', 'ip', 'fecha', 'distancia' (km) y 'tiempo' (horas).
+        """
+        info = self.resolver(ip)
+        if not info or info.get("latitude") is None or info.get("longitude") is None:
+            return []
+        if self._latest is None or fecha > self._latest:
+            self._latest = fecha
+        horizon = self._latest - self.window
+        if fecha < horizon:
+            return []
+
+        events = self._history.setdefault(usuario, [])
+        # Descarta los logins del usuario que quedaron fuera de la ventana
+        expired = bisect_left(events, (horizon,))
+        if expired:
+            del events[:expired]
+
+        self._observed += 1
+        event = (fecha, ip, info["latitude"], info["longitude"], self._observed if origen is None else origen)
+        position = bisect_left(events, event)
+        neighbours = events[max(0, position - 1):position + 1]
+        events.insert(position, event)
+
+        findings = []
+        for other in neighbours:
+            finding = self._compare(usuario, other, event)
+            if finding:
+                findings.append(finding)
+        self.findings += len(findings)
+
+        if self._observed % _SWEEP_INTERVAL == 0:
+            self._sweep(horizon)
+        return findings
+
+    def _compare(self, usuario, a, b):
+        if a[1] == b[1] or a[4] == b[4]:
+            return None
+        first, second = (a, b) if a[0] <= b[0] else (b, a)
+        distancia = approximate_distance(first[2], first[3], second[2], second[3])
+        if distancia == 0:
+            return None
+        tiempo = (second[0] - first[0]).total_seconds() / 3600
+        if tiempo and distancia / tiempo <= self.threshold:
+            return None
+        return {
+            "usuario": usuario,
+            "ip_anterior": first[1],
+            "fecha_anterior": first[0].strftime(_TIME_FORMAT),
+            "ip": second[1],
+            "fecha": second[0].strftime(_TIME_FORMAT),
+            "distancia": distancia,
+            "tiempo": tiempo,
+        }
+
+    def _sweep(self, horizon):
+        for usuario in [u for u, events in self._history.items() if not events or events[-1][0] < horizon]:
+            del self._history[usuario]
+
+    def annotate(self, alarma, cuerpo, observacion, is_bold):
+        """
+        Correlaciona los logins de una fila y agrega los hallazgos a su observación.
+
+        Args:
+            alarma (str): El tipo de alarma.
+            cuerpo (str): El cuerpo del log.
+            observacion (str): Observación generada por los handlers.
+            is_bold (bool): Si la observación va en negrita.
+
+        Returns:
+            tuple: ``(observacion, is_bold)``; en negrita si hubo algún hallazgo.
+        """
+        if self.alarmas is not None and alarma not in self.alarmas:
+            return observacion, is_bold
+        findings = []
+        self._rows += 1
+        origen = -self._rows
+        for usuario, fecha, ip in extract_login_events(cuerpo):
+            findings.extend(self.observe(usuario, fecha, ip, origen))
+        if not findings:
+            return observacion, is_bold
+        notes = "; ".join(
+            f"Viaje imposible para {f['usuario']} entre {f['ip_anterior']} ({f['fecha_anterior']}) y "
+            f"{f['ip']} ({f['fecha']}). Distancia: {f['distancia']:.2f} km, Tiempo: {f['tiempo']:.2f} horas"
+            for f in findings
+        )
+        return f"{observacion} | Correlación: {notes}.", True
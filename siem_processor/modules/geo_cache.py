@@ -0,0 +1,192 @@
+"""
+geo_cache.py | Caché de dos niveles para las consultas de geolocalización de IPs.
+
+Nivel 1: LRU en memoria del proceso. Nivel 2: base SQLite persistente indexada por IP,
+compartida entre ejecuciones (y entre procesos). Cada entrada expira según su TTL; las
+consultas fallidas también se guardan (caché negativa) con un TTL más corto para no
+repetir llamadas que se sabe que fallan.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = os.environ.get(
+    "SIEM_GEO_CACHE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "geo_ip.sqlite"),
+)
+DEFAULT_TTL = 7 * 24 * 3600  # 7 días para respuestas válidas
+DEFAULT_NEGATIVE_TTL = 3600  # 1 hora para consultas fallidas
+DEFAULT_MAX_ENTRIES = 8192
+
+
+class GeoIPCache:
+    """
+    Caché LRU en memoria respaldada por una tabla SQLite con expiración por TTL.
+
+    Args:
+        db_path (str | None): Ruta de la base SQLite. None desactiva el nivel persistente.
+        ttl (float): Segundos de validez de una respuesta válida.
+        negative_ttl (float): Segundos de validez de una consulta fallida.
+        max_entries (int): Máximo de entradas en la LRU en memoria.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- Nivel persistente ---
+    def _connection(self):
+        # Tras un fork (pool de procesos) la conexión heredada no es válida: se reabre.
+        if self.db_path is None:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.db_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geo_ip (ip TEXT PRIMARY KEY, data TEXT, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM geo_ip WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _remember(self, ip, expires_at, info):
+        self._memory[ip] = (expires_at, info)
+        self._memory.move_to_end(ip)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, ip):
+        """
+        Busca una IP en la caché.
+
+        Args:
+            ip (str): Dirección IP.
+
+        Returns:
+            tuple: ``(encontrada, info)``; ``info`` es None para una consulta fallida cacheada.
+        """
+        tier, info = self._lookup(ip)
+        with self._lock:
+            if tier == "memory":
+                self.memory_hits += 1
+            elif tier == "disk":
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        return tier is not None, info
+
+    def contains(self, ip):
+        """
+        Indica si la IP tiene una entrada vigente, sin afectar los contadores.
+
+        Args:
+            ip (str): Dirección IP.
+
+        Returns:
+            bool: True si la IP está cacheada.
+        """
+        return self._lookup(ip)[0] is not None
+
+    def _lookup(self, ip):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(ip)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._memory.move_to_end(ip)
+                    return "memory", entry[1]
+                del self._memory[ip]
+
+            conn = self._connection()
+            if conn is not None:
+                row = conn.execute("SELECT data, expires_at FROM geo_ip WHERE ip = ?", (ip,)).fetchone()
+                if row is not None and row[1] >= now:
+                    info = json.loads(row[0]) if row[0] is not None else None
+                    self._remember(ip, row[1], info)
+                    return "disk", info
+
+            return None, None
+
+    def set(self, ip, info):
+        """
+        Guarda el resultado de una consulta (None para una consulta fallida).
+
+        Args:
+            ip (str): Dirección IP.
+            info (dict | None): Información de geolocalización.
+        """
+        expires_at = time.time() + (self.ttl if info is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(ip, expires_at, info)
+            conn = self._connection()
+            if conn is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geo_ip (ip, data, expires_at) VALUES (?, ?, ?)",
+                    (ip, json.dumps(info) if info is not None else None, expires_at),
+                )
+                conn.commit()
+
+    def get_or_fetch(self, ip, fetch):
+        """
+        Devuelve la información cacheada de una IP o la obtiene con ``fetch`` y la guarda.
+
+        Args:
+            ip (str): Dirección IP.
+            fetch (callable): Función ``fetch(ip) -> dict | None`` que consulta el proveedor.
+
+        Returns:
+            dict | None: Información de geolocalización.
+        """
+        found, info = self.get(ip)
+        if found:
+            return info
+        info = fetch(ip)
+        self.set(ip, info)
+        return info
+
+    def stats(self):
+        """
+        Devuelve los contadores de aciertos y fallos de la caché.
+
+        Returns:
+            dict: Aciertos en memoria, aciertos en disco, fallos y tasa de aciertos.
+        """
+        total = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / total if total else 0.0,
+        }
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Devuelve la caché compartida por el proceso, creándola en el primer uso.
+
+    Returns:
+        GeoIPCache: La caché por defecto (ruta configurable con ``SIEM_GEO_CACHE``).
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GeoIPCache()
+    return _default_cache
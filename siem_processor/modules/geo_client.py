@@ -0,0 +1,364 @@
+"""
+geo_client.py | Cliente HTTP resiliente para las APIs de geolocalización.
+
+Cada consulta tiene timeouts de conexión y de lectura y se reintenta con backoff
+exponencial (con jitter, o el tiempo indicado en 'Retry-After') sólo ante errores
+transitorios: timeouts, errores de conexión, HTTP 429 y 5xx. Todos los intentos de una
+consulta comparten un presupuesto total de tiempo. Un token bucket limita las consultas
+por segundo del proceso (y se pausa ante un 429) y un circuit breaker deja de consultar
+durante un tiempo cuando el proveedor falla de forma consecutiva, de modo que una caída
+del servicio no frena cada fila de la ejecución.
+
+Las métricas de cada intento se registran en las estadísticas de la ejecución (ver
+``RunStats.record_call`` y ``RunStats.count``) y en ``GeoLookupClient.stats``.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from siem_processor.utils.stats import get_stats
+
+DEFAULT_CONNECT_TIMEOUT = 3.05  # segundos para establecer la conexión
+DEFAULT_READ_TIMEOUT = 10.0  # segundos de espera de la respuesta
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_TIME_BUDGET = 30.0  # segundos máximos por consulta, sumando intentos y esperas
+DEFAULT_BACKOFF = 0.5  # espera base antes del primer reintento
+DEFAULT_MAX_BACKOFF = 8.0
+DEFAULT_RATE = 10.0  # consultas por segundo
+DEFAULT_BURST = 20
+DEFAULT_FAILURE_THRESHOLD = 5  # fallos consecutivos que abren el circuito
+DEFAULT_RESET_TIMEOUT = 30.0  # segundos con el circuito abierto antes de probar de nuevo
+DEFAULT_POOL_SIZE = 32
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class GeoLookupUnavailable(Exception):
+    """
+    El proveedor no respondió a tiempo o está caído (error transitorio).
+
+    A diferencia de una respuesta de error del proveedor, no debe guardarse en la caché
+    negativa: la misma IP puede resolverse cuando el servicio se recupere.
+    """
+
+
+class TokenBucket:
+    """
+    Limitador de tasa compartido entre hilos.
+
+    Args:
+        rate (float): Consultas por segundo sostenidas.
+        burst (int): Consultas que pueden hacerse de golpe tras un período sin uso.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        # Esperas impuestas por el límite (o por una pausa tras un 429) y permisos negados
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.rejected = 0
+
+    def acquire(self, timeout=None):
+        """
+        Espera hasta obtener un permiso para hacer una consulta.
+
+        Args:
+            timeout (float | None): Segundos máximos de espera (None = sin límite).
+
+        Returns:
+            bool: True si se obtuvo el permiso, False si no alcanzaba el tiempo.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._updated:
+                    # Pausado por un 429: no se repone nada hasta que termine la pausa
+                    wait = self._updated - now + 1 / self.rate
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+                if deadline is not None and now + wait > deadline:
+                    self.rejected += 1
+                    return False
+                self.waits += 1
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+    def stats(self):
+        """
+        Devuelve cuánto frenó el limitador a las consultas.
+
+        Returns:
+            dict: Esperas, segundos esperados y permisos negados por falta de tiempo.
+        """
+        with self._lock:
+            return {
+                "esperas_limite": self.waits,
+                "segundos_limite": round(self.waited_seconds, 3),
+                "rechazadas_limite": self.rejected,
+            }
+
+    def pause(self, seconds):
+        """
+        Suspende las consultas de todos los hilos durante ``seconds`` segundos.
+
+        Args:
+            seconds (float): Duración de la pausa (por ejemplo, el 'Retry-After' de un 429).
+        """
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de tres estados: cerrado, abierto y semiabierto.
+
+    Tras ``failure_threshold`` fallos consecutivos el circuito se abre y se rechazan las
+    consultas sin llegar a la red. Pasados ``reset_timeout`` segundos se deja pasar una
+    única consulta de prueba: si funciona el circuito se cierra y si falla se vuelve a abrir.
+
+    Args:
+        failure_threshold (int): Fallos consecutivos que abren el circuito.
+        reset_timeout (float): Segundos con el circuito abierto antes de la consulta de prueba.
+    """
+
+    CLOSED = "cerrado"
+    OPEN = "abierto"
+    HALF_OPEN = "semiabierto"
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.openings = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Indica si puede hacerse una consulta.
+
+        Returns:
+            bool: False mientras el circuito está abierto (o ya hay una consulta de prueba en curso).
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def cancel(self):
+        """Libera el permiso de ``allow`` cuando la consulta finalmente no se hizo."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        """Registra una consulta exitosa y cierra el circuito."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """
+        Registra una consulta fallida.
+
+        Returns:
+            bool: True si este fallo abrió el circuito.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.OPEN:
+                return False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                self.openings += 1
+                return True
+            return False
+
+
+class GeoLookupClient:
+    """
+    Cliente HTTP con timeouts, reintentos dentro de un presupuesto de tiempo, límite de
+    tasa y circuit breaker.
+
+    El límite de tasa y el circuito son por proceso. requests se importa recién en la
+    primera consulta.
+
+    Args:
+        service (str): Nombre del servicio en las estadísticas.
+        connect_timeout (float): Segundos para establecer la conexión.
+        read_timeout (float): Segundos de espera de la respuesta.
+        max_attempts (int): Intentos máximos por consulta (incluido el primero).
+        time_budget (float): Segundos máximos por consulta, sumando intentos y esperas.
+        backoff (float): Espera base de los reintentos; se duplica en cada intento.
+        max_backoff (float): Espera máxima entre intentos.
+        rate (float): Consultas por segundo.
+        burst (int): Consultas seguidas permitidas tras un período sin uso.
+        failure_threshold (int): Fallos consecutivos que abren el circuito.
+        reset_timeout (float): Segundos con el circuito abierto.
+        pool_size (int): Conexiones keep-alive máximas de la sesión.
+    """
+
+    def __init__(self, service="nordvpn", connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 time_budget=DEFAULT_TIME_BUDGET, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 rate=DEFAULT_RATE, burst=DEFAULT_BURST, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        self.service = service
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.time_budget = time_budget
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.limiter = TokenBucket(rate=rate, burst=burst)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.counters = {
+            "consultas": 0, "intentos": 0, "reintentos": 0, "timeouts": 0, "errores_conexion": 0,
+            "errores_servidor": 0, "limitadas_429": 0, "rechazadas_circuito": 0, "agotadas": 0,
+        }
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+        get_stats().count(f"{self.service}_{name}")
+
+    def get(self, url):
+        """
+        Hace un GET con reintentos.
+
+        Args:
+            url (str): URL a consultar.
+
+        Returns:
+            requests.Response: La respuesta, con un código que no amerita reintentar
+            (2xx o un 4xx distinto de 429).
+
+        Raises:
+            GeoLookupUnavailable: Si el circuito está abierto o se agotaron los intentos
+                o el presupuesto de tiempo.
+        """
+        import requests
+        session = self._get_session()
+        self._count("consultas")
+        deadline = time.monotonic() + self.time_budget
+        error = "sin intentos"
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                self._count("rechazadas_circuito")
+                raise GeoLookupUnavailable(f"API de {self.service} suspendida tras fallos consecutivos")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.limiter.acquire(timeout=remaining):
+                self.breaker.cancel()
+                error = "límite de consultas por segundo"
+                break
+            remaining = deadline - time.monotonic()
+
+            self._count("intentos")
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = session.get(
+                    url, timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+                )
+            except requests.exceptions.Timeout as e:
+                self._count("timeouts")
+                error = f"timeout: {e}"
+            except requests.exceptions.RequestException as e:
+                self._count("errores_conexion")
+                error = f"error de conexión: {e}"
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    get_stats().record_call(self.service, time.perf_counter() - started, response.status_code == 200)
+                    self.breaker.record_success()
+                    return response
+                retry_after = _retry_after(response)
+                if response.status_code == 429:
+                    self._count("limitadas_429")
+                    self.limiter.pause(retry_after if retry_after is not None else self.backoff)
+                else:
+                    self._count("errores_servidor")
+                error = f"código de estado {response.status_code}"
+
+            get_stats().record_call(self.service, time.perf_counter() - started, ok=False)
+            if self.breaker.record_failure():
+                print(f"API de {self.service} no disponible ({error}): se suspenden las consultas "
+                      f"por {self.breaker.reset_timeout:.0f} s")
+            if attempt == self.max_attempts - 1:
+                break
+            delay = retry_after if retry_after is not None else random.uniform(
+                0, min(self.max_backoff, self.backoff * 2 ** attempt)
+            )
+            if time.monotonic() + delay >= deadline:
+                break
+            self._count("reintentos")
+            time.sleep(delay)
+
+        self._count("agotadas")
+        elapsed = self.time_budget - (deadline - time.monotonic())
+        raise GeoLookupUnavailable(f"{error} (sin respuesta válida tras {attempt + 1} intentos en {elapsed:.1f} s)")
+
+    def stats(self):
+        """
+        Devuelve los contadores del cliente y el estado del circuito.
+
+        Returns:
+            dict: Consultas, intentos, reintentos, errores por tipo, consultas rechazadas,
+            esperas por el límite de tasa, estado del circuito y cantidad de aperturas.
+        """
+        with self._lock:
+            counters = dict(self.counters)
+        counters.update(self.limiter.stats())
+        counters["circuito"] = self.breaker.state
+        counters["aperturas_circuito"] = self.breaker.openings
+        return counters
+
+
+def _retry_after(response):
+    # 'Retry-After' puede ser una cantidad de segundos o una fecha HTTP
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
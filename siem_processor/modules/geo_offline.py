@@ -0,0 +1,234 @@
+"""
+geo_offline.py | Resolución de geolocalización de IPs sin red, a partir de un dataset local.
+
+El dataset CSV de rangos (``ip_start, ip_end, country, country_code, region, city,
+latitude, longitude``) se compila en un índice binario: tres arreglos de enteros sin
+signo de 32 bits (inicio, fin y ubicación de cada rango, ordenados por inicio) seguidos
+de la tabla de ubicaciones. El índice se abre con ``mmap`` sin copiarlo a memoria y
+cada consulta es una búsqueda binaria sobre el arreglo de inicios.
+
+Los rangos superpuestos o anidados del dataset se aplanan al compilar el índice en
+tramos disjuntos, donde cada IP queda con la ubicación del rango más angosto que la
+contiene (como una coincidencia de prefijo más largo), así la búsqueda binaria sólo
+necesita mirar un tramo.
+"""
+import csv
+import json
+import mmap
+import os
+import socket
+import struct
+import sys
+from array import array
+import heapq
+from bisect import bisect_right
+
+MAGIC = b"SIEMGEO1"
+BYTE_ORDER_MARK = 0x01020304
+_HEADER = struct.Struct("=8sIIII")  # magic, marca de orden de bytes, rangos, ubicaciones, largo JSON
+
+
+def ip_to_int(ip):
+    """
+    Convierte una IPv4 en notación decimal con puntos a entero.
+
+    Args:
+        ip (str): Dirección IPv4.
+
+    Returns:
+        int: Valor entero de la IP.
+    """
+    return struct.unpack("!I", socket.inet_aton(ip))[0]
+
+
+def _parse_ip(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else ip_to_int(value)
+
+
+def _parse_coordinate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flatten_ranges(ranges):
+    """
+    Convierte rangos posiblemente superpuestos en tramos disjuntos ordenados.
+
+    Cada IP toma la ubicación del rango más angosto que la contiene; entre rangos del
+    mismo ancho gana el que aparece primero en el dataset. Los tramos contiguos con la
+    misma ubicación se unen.
+
+    Args:
+        ranges (list): Tuplas ``(inicio, fin, ubicación)`` en el orden del dataset.
+
+    Returns:
+        list: Tuplas ``(inicio, fin, ubicación)`` disjuntas y ordenadas por inicio.
+    """
+    ordered = sorted((start, end, order, location) for order, (start, end, location) in enumerate(ranges))
+    if all(ordered[i][0] > ordered[i - 1][1] for i in range(1, len(ordered))):
+        return [(start, end, location) for start, end, _, location in ordered]
+
+    # Barrido por los bordes de los rangos: el rango activo más angosto define cada tramo
+    boundaries = sorted({point for start, end, _, _ in ordered for point in (start, end + 1)})
+    active = []
+    flattened = []
+    j = 0
+    for k, point in enumerate(boundaries[:-1]):
+        while j < len(ordered) and ordered[j][0] <= point:
+            start, end, order, location = ordered[j]
+            heapq.heappush(active, (end - start, order, end, location))
+            j += 1
+        while active and active[0][2] < point:
+            heapq.heappop(active)
+        if not active:
+            continue
+        location = active[0][3]
+        segment_end = boundaries[k + 1] - 1
+        if flattened and flattened[-1][2] == location and flattened[-1][1] == point - 1:
+            flattened[-1] = (flattened[-1][0], segment_end, location)
+        else:
+            flattened.append((point, segment_end, location))
+    return flattened
+
+
+def build_geo_index(csv_file, index_file):
+    """
+    Compila un dataset CSV de rangos de IPs en un índice binario mapeable en memoria.
+
+    Args:
+        csv_file (str): Ruta al CSV con encabezado (``ip_start``, ``ip_end`` y ``country``
+            obligatorios; ``country_code``, ``region``, ``city``, ``latitude`` y
+            ``longitude`` opcionales). Los extremos pueden ser IPs o enteros.
+        index_file (str): Ruta del índice a generar.
+
+    Returns:
+        int: Cantidad de tramos indexados (los rangos superpuestos se aplanan, ver
+        ``_flatten_ranges``).
+    """
+    locations = []
+    location_ids = {}
+    ranges = []
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            location = (
+                row.get("country") or "N/A",
+                row.get("country_code") or "N/A",
+                row.get("region") or "N/A",
+                row.get("city") or "N/A",
+                _parse_coordinate(row.get("latitude")),
+                _parse_coordinate(row.get("longitude")),
+            )
+            location_id = location_ids.get(location)
+            if location_id is None:
+                location_id = location_ids[location] = len(locations)
+                locations.append(location)
+            ranges.append((_parse_ip(row["ip_start"]), _parse_ip(row["ip_end"]), location_id))
+
+    ranges = _flatten_ranges(ranges)
+    starts = array("I", (r[0] for r in ranges))
+    ends = array("I", (r[1] for r in ranges))
+    location_index = array("I", (r[2] for r in ranges))
+    payload = json.dumps(locations, ensure_ascii=False).encode("utf-8")
+
+    with open(index_file, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, BYTE_ORDER_MARK, len(ranges), len(locations), len(payload)))
+        starts.tofile(f)
+        ends.tofile(f)
+        location_index.tofile(f)
+        f.write(payload)
+    return len(ranges)
+
+
+class OfflineGeoResolver:
+    """
+    Resolver de geolocalización respaldado por un índice generado con ``build_geo_index``.
+
+    Se usa como función: ``resolver(ip)`` devuelve un dict con la misma forma que
+    ``NordAPI.get_ip_info_from_nordvpn`` o None si la IP no está en ningún rango.
+
+    Args:
+        index_file (str): Ruta al índice binario.
+    """
+
+    def __init__(self, index_file):
+        self.index_file = index_file
+        with open(index_file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, mark, count, _, payload_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or mark != BYTE_ORDER_MARK:
+            raise ValueError(f"Índice de geolocalización inválido: {index_file}")
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        size = count * 4
+        self._starts = view[offset:offset + size].cast("I")
+        self._ends = view[offset + size:offset + 2 * size].cast("I")
+        self._locations = view[offset + 2 * size:offset + 3 * size].cast("I")
+        payload = bytes(view[offset + 3 * size:offset + 3 * size + payload_len])
+        self._location_table = [tuple(location) for location in json.loads(payload.decode("utf-8"))]
+
+    def __reduce__(self):
+        # Al enviarse a otro proceso se reabre el índice en lugar de copiar el mapeo
+        return (OfflineGeoResolver, (self.index_file,))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __call__(self, ip):
+        try:
+            value = ip_to_int(ip)
+        except OSError:
+            return None
+        i = bisect_right(self._starts, value) - 1
+        if i < 0 or value > self._ends[i]:
+            return None
+        country, country_code, region, city, latitude, longitude = self._location_table[self._locations[i]]
+        return {
+            "ip": ip,
+            "country": country,
+            "country_code": country_code,
+            "region": region,
+            "city": city,
+            "state_code": "N/A",
+            "zip_code": "Unknown",
+            "latitude": latitude,
+            "longitude": longitude,
+            "isp": "N/A",
+            "asn": "N/A",
+            "host_domain": "N/A",
+            "vpn_detected": False,
+            "gdpr": False,
+        }
+
+
+def load_geo_resolver(path):
+    """
+    Carga un resolver offline desde un índice o desde un CSV.
+
+    Si se recibe un CSV, el índice se genera junto a él (``<csv>.idx``) y sólo se
+    vuelve a compilar cuando el CSV es más reciente que el índice.
+
+    Args:
+        path (str): Ruta al índice binario o al dataset CSV.
+
+    Returns:
+        OfflineGeoResolver: El resolver listo para usar.
+    """
+    if path.lower().endswith(".csv"):
+        index_file = path + ".idx"
+        if not os.path.exists(index_file) or os.path.getmtime(index_file) < os.path.getmtime(path):
+            build_geo_index(path, index_file)
+        path = index_file
+    return OfflineGeoResolver(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m siem_processor.modules.geo_offline <dataset.csv> [indice.idx]")
+        sys.exit(1)
+    output = sys.argv[2] if len(sys.argv) > 2 else sys.argv[1] + ".idx"
+    total = build_geo_index(sys.argv[1], output)
+    print(f"Índice de geolocalización generado en {output} ({total} rangos)")
@@ -1,4 +1,12 @@
-import re
+from siem_processor.utils.extraction import IP, register_pattern, extract_fields
+
+register_pattern(
+    "login_fuera_de_puentes",
+    rf'Login fuera de puentes.*?Usuario de origen: (?P<user>.*?) IP de Origen: (?P<ip_origen>{IP}).*?Host de Destino: (?P<host_destino>.*?) IPAM:'
+)
+register_pattern("sudo_su", rf'usuario: (?P<user>.*?) Cambio a: root Host: (?P<host>.*?) Ip: (?P<ip>{IP})')
+register_pattern("login_sin_opr_ps", rf'Usuario: (?P<user>.*?) Equipo: (?P<equipo>.*?) Ip: (?P<ip>{IP})')
+register_pattern("cambios_audit", r'Tipo de cambio: (?P<tipo_cambio>.*?) Equipo: (?P<equipo>.*?) Accion Usuario:')
 
 def handle_linux_login(alarma, cuerpo):
     """
@@ -44,15 +52,10 @@ def get_login_fuera_de_puentes_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    # Ajustamos el patrón para capturar el host de destino correctamente
-    pattern = r'Login fuera de puentes.*?Usuario de origen: (.*?) IP de Origen: (\d+\.\d+\.\d+\.\d+).*?Host de Destino: (.*?) IPAM:'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = extract_fields("login_fuera_de_puentes", cuerpo)
 
-    if match:
-        user = match.group(1).strip()
-        ip_origen = match.group(2).strip()
-        host_destino = match.group(3).strip()
-        return f"Usuario: {user}, IP de Origen: {ip_origen}, Host de Destino: {host_destino}"
+    if fields:
+        return f"Usuario: {fields['user']}, IP de Origen: {fields['ip_origen']}, Host de Destino: {fields['host_destino']}"
 
     return "No se pudo extraer información del login fuera de puentes"
 
@@ -67,14 +70,10 @@ def get_sudo_su_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    pattern = r'usuario: (.*?) Cambio a: root Host: (.*?) Ip: (\d+\.\d+\.\d+\.\d+)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = extract_fields("sudo_su", cuerpo)
 
-    if match:
-        user = match.group(1).strip()
-        host = match.group(2).strip()
-        ip = match.group(3).strip()
-        return f"Sudo su detectado - Usuario: {user}, Host: {host}, IP: {ip}"
+    if fields:
+        return f"Sudo su detectado - Usuario: {fields['user']}, Host: {fields['host']}, IP: {fields['ip']}"
 
     return "No se pudo extraer información del log Sudo su detectado"
 
@@ -89,14 +88,10 @@ def get_login_sin_usuario_opr_o_ps_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    pattern = r'Usuario: (.*?) Equipo: (.*?) Ip: (\d+\.\d+\.\d+\.\d+)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = extract_fields("login_sin_opr_ps", cuerpo)
 
-    if match:
-        user = match.group(1).strip()
-        equipo = match.group(2).strip()
-        ip = match.group(3).strip()
-        return f"Login sin usuario OPR/PS - Usuario: {user}, Equipo: {equipo}, IP: {ip}"
+    if fields:
+        return f"Login sin usuario OPR/PS - Usuario: {fields['user']}, Equipo: {fields['equipo']}, IP: {fields['ip']}"
 
     return "No se pudo extraer información del log Login sin usuario OPR o PS en Linux"
 
@@ -111,12 +106,9 @@ def get_cambios_audit_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    pattern = r'Tipo de cambio: (.*?) Equipo: (.*?) Accion Usuario:'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = extract_fields("cambios_audit", cuerpo)
 
-    if match:
-        tipo_cambio = match.group(1).strip()
-        equipo = match.group(2).strip()
-        return f"Cambio audit detectado - Tipo de cambio: {tipo_cambio}, Equipo: {equipo}"
+    if fields:
+        return f"Cambio audit detectado - Tipo de cambio: {fields['tipo_cambio']}, Equipo: {fields['equipo']}"
 
     return "No se pudo extraer información del log Cambios audit detectados"
\ No newline at end of file
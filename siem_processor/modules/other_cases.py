@@ -1,6 +1,41 @@
 # Handle ABM Alarmas and Salto Laterales de DBA
 import re
-from siem_processor.utils.style_utils import apply_styles as styles
+from siem_processor.utils.extraction import IP
+from siem_processor.utils.tokenizer import tokenize, tokenize_all, first_word
+
+_IP_PATTERN = re.compile(IP)
+DBA_USERS = ("liuzzid_dbaadm", "villajos_dbaadm")
+
+
+def _match_ip(fields, label):
+    # IP al inicio del valor del campo, o None si el campo falta o no empieza con una IP
+    match = _IP_PATTERN.match(fields.get(label, ""))
+    return match.group() if match else None
+
+
+def _abm_fields(cuerpo):
+    """
+    Extrae los campos comunes de los logs ABM.
+
+    Args:
+        cuerpo (str): El cuerpo del log.
+
+    Returns:
+        dict | None: 'user_origen', 'user_destino', 'grupo' (vacío si no se informa) e
+        'ip_origen', o None si falta alguno de los usuarios o la IP de origen.
+    """
+    fields = tokenize(cuerpo)
+    ip_origen = _match_ip(fields, "IP de origen")
+    if ip_origen is None or "Usuario de origen" not in fields or "Usuario de destino" not in fields:
+        return None
+    return {
+        "user_origen": fields["Usuario de origen"],
+        "user_destino": fields["Usuario de destino"],
+        "grupo": fields.get("Grupo (si corresponde)", ""),
+        "ip_origen": ip_origen,
+    }
+
+
 def handle_abm_cases(alarma, cuerpo):
     """
     Maneja los casos de ABM (Usuarios y Grupos de Active Directory).
@@ -94,13 +129,11 @@ def get_cambio_gpo_observation(cuerpo):
     Returns:
         str: Observación extraída en formato de una sola línea.
     """
-    pattern = r'Usuario: (.*?) DC: (.*?) '
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = tokenize(cuerpo)
+    dc = first_word(fields, "DC")
 
-    if match:
-        usuario = match.group(1).strip()
-        dc = match.group(2).strip()
-        return f"Usuario: {usuario}, DC: {dc}"
+    if "Usuario" in fields and dc:
+        return f"Usuario: {fields['Usuario']}, DC: {dc}"
 
     return "No se pudo extraer información del log de Cambio de Políticas GPO"
 
@@ -114,14 +147,13 @@ def get_abm_grupo_ad_agregado_observation(cuerpo):
     Returns:
         str: Observación extraída.
     """
-    pattern = r'Usuario de origen: (.*?) Usuario de destino: (.*?) Grupo \(si corresponde\): (.*?) IP de origen: (\d+\.\d+\.\d+\.\d+)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
-
-    if match:
-        user_origen = match.group(1).strip()
-        user_destino = match.group(2).strip()
-        grupo = match.group(3).strip() or "No especificado"
-        ip_origen = match.group(4).strip()
+    fields = _abm_fields(cuerpo)
+
+    if fields:
+        user_origen = fields["user_origen"]
+        user_destino = fields["user_destino"]
+        grupo = fields["grupo"] or "No especificado"
+        ip_origen = fields["ip_origen"]
         return f"Usuario de origen: {user_origen}, Usuario de destino: {user_destino}, Grupo: {grupo}, IP de origen: {ip_origen}"
 
     return "No se pudo extraer información del log ABM-Grupo-AD-Agregado"
@@ -137,14 +169,10 @@ def get_abm_usuario_ad_creado_observation(cuerpo):
     Returns:
         str: Observación extraída.
     """
-    pattern = r'Usuario de origen: (.*?) Usuario de destino: (.*?) IP de origen: (\d+\.\d+\.\d+\.\d+)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = _abm_fields(cuerpo)
 
-    if match:
-        user_origen = match.group(1).strip()
-        user_destino = match.group(2).strip()
-        ip_origen = match.group(3).strip()
-        return f"Usuario de origen: {user_origen}, Usuario de destino: {user_destino}, IP de origen: {ip_origen}"
+    if fields:
+        return f"Usuario de origen: {fields['user_origen']}, Usuario de destino: {fields['user_destino']}, IP de origen: {fields['ip_origen']}"
 
     return "No se pudo extraer información del log ABM-Usuario-AD-Creado"
 
@@ -159,14 +187,13 @@ def get_abm_restablecimiento_credenciales_observation(cuerpo):
     Returns:
         str: Observación extraída.
     """
-    pattern = r'Usuario de origen: (.*?) Usuario de destino: (.*?) Grupo \(si corresponde\): (.*?) IP de origen: (\d+\.\d+\.\d+\.\d+)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
-
-    if match:
-        user_origen = match.group(1).strip()
-        user_destino = match.group(2).strip()
-        grupo = match.group(3).strip() or "No especificado"
-        ip_origen = match.group(4).strip()
+    fields = _abm_fields(cuerpo)
+
+    if fields:
+        user_origen = fields["user_origen"]
+        user_destino = fields["user_destino"]
+        grupo = fields["grupo"] or "No especificado"
+        ip_origen = fields["ip_origen"]
         return f"Usuario de origen: {user_origen}, Usuario de destino: {user_destino}, Grupo: {grupo}, IP de origen: {ip_origen}"
 
     return "No se pudo extraer información del log ABM-Restablecimiento-Credenciales"
@@ -181,20 +208,13 @@ def get_abm_grupo_ad_removido_observation(cuerpo):
     Returns:
         str: Observación extraída en formato de una sola línea.
     """
-    # Patrón ajustado para mayor robustez
-    pattern = (
-        r"Usuario de origen: (.*?) "
-        r"Usuario de destino: (.*?) "
-        r"Grupo \(si corresponde\): (.*?) "
-        r"IP de origen: (\d+\.\d+\.\d+\.\d+)"
-    )
-    match = re.search(pattern, cuerpo, re.DOTALL)
-
-    if match:
-        user_origen = match.group(1).strip()
-        user_destino = match.group(2).strip()
-        grupo = match.group(3).strip() or "No especificado"
-        ip_origen = match.group(4).strip()
+    fields = _abm_fields(cuerpo)
+
+    if fields:
+        user_origen = fields["user_origen"]
+        user_destino = fields["user_destino"]
+        grupo = fields["grupo"] or "No especificado"
+        ip_origen = fields["ip_origen"]
 
         # Devolver observación en una sola línea
         return f"Usuario de origen: {user_origen}, Usuario de destino: {user_destino}, Grupo: {grupo}, IP de origen: {ip_origen}"
@@ -212,15 +232,10 @@ def get_pase_a_produccion_observation(cuerpo):
     Returns:
         str: Observación extraída.
     """
-    pattern = r'Host: (.*?) Proceso: (.*?) Usuario: (.*?) Comando: (.*?)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = tokenize(cuerpo)
 
-    if match:
-        host = match.group(1).strip()
-        proceso = match.group(2).strip()
-        usuario = match.group(3).strip()
-        comando = match.group(4).strip()
-        return f"Host: {host}, Proceso: {proceso}, Usuario: {usuario}, Comando: {comando}"
+    if all(label in fields for label in ("Host", "Proceso", "Usuario", "Comando")):
+        return f"Host: {fields['Host']}, Proceso: {fields['Proceso']}, Usuario: {fields['Usuario']}, Comando: {fields['Comando']}"
 
     return "No se pudo extraer información del log Pase a Producción"
 
@@ -235,13 +250,12 @@ def get_salto_lateral_observation(cuerpo):
     Returns:
         str: Observación extraída.
     """
-    # Patrón para detectar el usuario de origen
-    pattern = r'Usuario de origen: (liuzzid_dbaadm|villajos_dbaadm)'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    # Cualquier "Usuario de origen" del cuerpo que empiece con alguno de los usuarios DBA
+    usuarios = tokenize_all(cuerpo).get("Usuario de origen", [])
+    dba = next((dba for usuario in usuarios for dba in DBA_USERS if usuario.startswith(dba)), None)
 
-    if match:
-        usuario = match.group(1).strip()
-        return f"Salto Lateral detectado. Usuario DBA: {usuario}."
+    if dba:
+        return f"Salto Lateral detectado. Usuario DBA: {dba}."
     else:
         return "No se detectó un usuario DBA en el log de salto lateral. Favor verificar manualmente."
 
@@ -256,14 +270,12 @@ def get_login_con_clave_publica_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error si la información no puede ser extraída.
     """
-    pattern = r'Servidor:\s*(?P<servidor>\S+)\s*Ip Origen:\s*(?P<ip_origen>\d+\.\d+\.\d+\.\d+)\s*Usuario:\s*(?P<usuario>\S+)'
-    
-    match = re.search(pattern, cuerpo, re.DOTALL | re.IGNORECASE)
-    if match:
-        servidor = match.group("servidor").strip()
-        ip_origen = match.group("ip_origen").strip()
-        usuario = match.group("usuario").strip()
-
+    # Como la regex original, este formato se reconoce sin distinguir mayúsculas
+    fields = tokenize(cuerpo, ignore_case=True)
+    servidor = first_word(fields, "Servidor")
+    ip_origen = _match_ip(fields, "Ip Origen")
+    usuario = first_word(fields, "Usuario")
+    if servidor and ip_origen and usuario:
         return f"Login con Clave Pública -- Servidor: {servidor}, IP Origen: {ip_origen}, Usuario: {usuario}"
 
     return "No se pudo extraer información del log Login con Clave Pública"
@@ -0,0 +1,179 @@
+"""
+registry.py | Registro único de handlers por tipo de alarma.
+
+Asocia cada nombre de alarma con su handler mediante un diccionario, de modo que el
+ruteo de una fila cuesta una única búsqueda hash sin importar cuántos tipos de alarma
+estén registrados. Es compartido por ``main.process_alarms`` y ``test_logs.test_single_log``.
+
+Los handlers se registran como referencias ``"modulo:funcion"`` y se importan recién
+la primera vez que se despacha una alarma de ese tipo: importar el registro no carga
+los módulos de handlers ni la pila de geolocalización.
+"""
+from importlib import import_module
+from time import perf_counter
+from siem_processor.utils.stats import get_stats
+
+ALARM_HANDLERS = {}
+_BATCH_HANDLERS = {}
+# Referencia "modulo:funcion" -> función ya importada
+_resolved = {}
+
+DEFAULT_HANDLER = "siem_processor.modules.general_cases:handle_general_case"
+
+# Alarmas cuyo cuerpo requiere geolocalizar IPs (viaje imposible / fuera de país)
+TRAVEL_ALARMS = frozenset([
+    "Notificacion SIEM - VPN - Login desde 2 IPs diferentes",
+    "Notificacion SIEM - Workapp - Login desde 2 IPs diferentes"
+])
+GEO_ALARMS = TRAVEL_ALARMS | frozenset([
+    "Notificacion SIEM - Workapp - Login fuera de ARG y PY",
+    "Notificacion SIEM - VPN fuera de ARG o PY."
+])
+
+
+def register_handler(alarmas, handler, batch_handler=None):
+    """
+    Registra un handler para uno o más tipos de alarma.
+
+    Args:
+        alarmas (list): Nombres de alarma que atiende el handler.
+        handler (callable | str): Función ``(alarma, cuerpo) -> (observacion, is_bold)``
+            o su referencia ``"modulo:funcion"``, que se importa en el primer uso.
+        batch_handler (callable | str, optional): Función ``(alarma, cuerpos) -> list`` (o
+            su referencia) que procesa en bloque todas las filas de un mismo tipo de alarma.
+    """
+    for alarma in alarmas:
+        if alarma in ALARM_HANDLERS:
+            raise ValueError(f"La alarma '{alarma}' ya tiene un handler registrado")
+        ALARM_HANDLERS[alarma] = handler
+        if batch_handler is not None:
+            _BATCH_HANDLERS[alarma] = batch_handler
+
+
+def _resolve(handler):
+    if not isinstance(handler, str):
+        return handler
+    function = _resolved.get(handler)
+    if function is None:
+        module_name, _, name = handler.partition(":")
+        function = _resolved[handler] = getattr(import_module(module_name), name)
+    return function
+
+
+def get_handler(alarma):
+    """
+    Devuelve el handler registrado para una alarma, importándolo si hace falta.
+
+    Args:
+        alarma (str): El tipo de alarma.
+
+    Returns:
+        callable | None: El handler o None si la alarma no está registrada.
+    """
+    handler = ALARM_HANDLERS.get(alarma)
+    return None if handler is None else _resolve(handler)
+
+
+def dispatch(alarma, cuerpo):
+    """
+    Procesa una fila con el handler correspondiente a su alarma.
+
+    Las alarmas registradas se marcan en negrita si la observación contiene "Alerta";
+    las no registradas se resuelven con ``handle_general_case``.
+
+    Args:
+        alarma (str): El tipo de alarma.
+        cuerpo (str): El cuerpo del log.
+
+    Returns:
+        tuple: Observación (str) y si el texto debe estar en negrita (bool).
+    """
+    handler = ALARM_HANDLERS.get(alarma)
+    if handler is None:
+        return _resolve(DEFAULT_HANDLER)(alarma, cuerpo)
+    observacion, _ = _resolve(handler)(alarma, cuerpo)
+    return observacion, "Alerta" in observacion
+
+
+def _timed_dispatch(stats, alarma, cuerpo):
+    handler = _resolve(ALARM_HANDLERS.get(alarma, DEFAULT_HANDLER))
+    started = perf_counter()
+    result = dispatch(alarma, cuerpo)
+    stats.record_handler(handler.__name__, perf_counter() - started, result[0])
+    return result
+
+
+def dispatch_many(records):
+    """
+    Procesa un lote de filas agrupándolas por tipo de alarma.
+
+    Cada grupo se envía de una sola vez a su handler de lote, si existe, o fila por fila
+    a su handler individual. El resultado respeta el orden de entrada.
+
+    Args:
+        records (iterable): Pares ``(alarma, cuerpo)``.
+
+    Returns:
+        list: Tuplas ``(observacion, is_bold)`` en el mismo orden que ``records``.
+    """
+    groups = {}
+    cuerpos = []
+    for index, (alarma, cuerpo) in enumerate(records):
+        groups.setdefault(alarma, []).append(index)
+        cuerpos.append(cuerpo)
+
+    stats = get_stats()
+    results = [None] * len(cuerpos)
+    for alarma, indices in groups.items():
+        batch_handler = _BATCH_HANDLERS.get(alarma)
+        if batch_handler is not None:
+            batch_handler = _resolve(batch_handler)
+            started = perf_counter()
+            observaciones = batch_handler(alarma, [cuerpos[i] for i in indices])
+            # Los handlers por lote registran el tiempo promedio por fila
+            per_row = (perf_counter() - started) / len(indices)
+            for i, (observacion, _) in zip(indices, observaciones):
+                results[i] = (observacion, "Alerta" in observacion)
+                stats.record_handler(batch_handler.__name__, per_row, observacion)
+        elif stats.enabled:
+            for i in indices:
+                results[i] = _timed_dispatch(stats, alarma, cuerpos[i])
+        else:
+            for i in indices:
+                results[i] = dispatch(alarma, cuerpos[i])
+    return results
+
+
+# --- Registro de handlers ---
+register_handler([
+    "Notificacion SIEM - Se ha detectado un inicio de sesión",
+    "Notificacion SIEM - Se ha detectado un inicio de sesión en los DC",
+    "Notificacion SIEM - Se ha detectado un inicio de sesión sin opr o admin"
+], "siem_processor.modules.windows_login:handle_windows_login")
+register_handler([
+    "Notificacion SIEM - Login fuera de puentes",
+    "Notificacion SIEM - Notificacion SIEM - Login sin usuario OPR o PS en Linux",
+    "Notificacion SIEM - Sudo su detectado",
+    "Notificacion SIEM - Notificacion - SIEM cambios audit"
+], "siem_processor.modules.linux_login:handle_linux_login")
+register_handler(
+    sorted(TRAVEL_ALARMS), "siem_processor.modules.NordAPI:handle_geo_alarm",
+    batch_handler="siem_processor.modules.NordAPI:handle_travel_batch"
+)
+register_handler(sorted(GEO_ALARMS - TRAVEL_ALARMS), "siem_processor.modules.NordAPI:handle_geo_alarm")
+register_handler([
+    "Notificacion SIEM - ABM-Usuario-AD-Creado",
+    "Notificacion SIEM - ABM-Restablecimiento-Credenciales",
+    "Notificacion SIEM - ABM-Grupo-AD-Agregado",
+    "Notificacion SIEM - ABM-Grupo-AD-Removido"
+], "siem_processor.modules.other_cases:handle_abm_cases")
+register_handler([
+    "Notificacion SIEM - Posible salto lateral 12+",
+    "Notificacion SIEM - Posible salto lateral 6+"
+], "siem_processor.modules.other_cases:handle_salto_lateral_dba")
+register_handler([
+    "Notificacion SIEM - Notificacion SIEM - Pase a produccion detectado"
+], "siem_processor.modules.other_cases:handle_pases_produccion")
+register_handler([
+    "Notificacion SIEM - SIEM - Cambio de politicas GPO"
+], "siem_processor.modules.other_cases:handle_cambio_gpo")
@@ -0,0 +1,96 @@
+"""
+travel.py | Cálculo vectorizado de viaje imposible con NumPy.
+
+Versión por lotes de ``approximate_distance``, ``calculate_time_difference`` e
+``is_impossible_travel`` (NordAPI): recibe arreglos de coordenadas y marcas de tiempo
+de todas las filas "Login desde 2 IPs diferentes" y devuelve distancias, diferencias de
+tiempo y veredictos en una única llamada. NumPy se importa dentro de cada función para
+que importar el módulo (y sus constantes) no cargue NumPy hasta el primer lote.
+"""
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_SPEED_THRESHOLD = 120  # km/h
+
+
+def parse_timestamps(values):
+    """
+    Convierte fechas con formato "%Y/%m/%d %H:%M:%S" a un arreglo ``datetime64[s]``.
+
+    Args:
+        values (array-like): Fechas como texto.
+
+    Returns:
+        ndarray: Marcas de tiempo con resolución de segundos.
+    """
+    import numpy as np
+    return np.char.replace(np.asarray(values, dtype=str), "/", "-").astype("datetime64[s]")
+
+
+def batch_distance(lat1, lon1, lat2, lon2, method="approx"):
+    """
+    Calcula la distancia en km entre pares de coordenadas.
+
+    Args:
+        lat1, lon1, lat2, lon2 (array-like): Coordenadas en grados.
+        method (str): "approx" (proyección equirectangular, igual que
+            ``approximate_distance``) o "haversine" (gran círculo).
+
+    Returns:
+        ndarray: Distancias en km.
+    """
+    import numpy as np
+    lat1 = np.asarray(lat1, dtype=float)
+    lon1 = np.asarray(lon1, dtype=float)
+    lat2 = np.asarray(lat2, dtype=float)
+    lon2 = np.asarray(lon2, dtype=float)
+
+    if method == "approx":
+        lat_media = np.radians((lat1 + lat2) / 2)
+        return np.sqrt(((lat2 - lat1) * KM_PER_DEGREE) ** 2 + ((lon2 - lon1) * KM_PER_DEGREE * np.cos(lat_media)) ** 2)
+    if method == "haversine":
+        phi1, phi2 = np.radians(lat1), np.radians(lat2)
+        a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    raise ValueError(f"Método de distancia desconocido: {method}")
+
+
+def batch_time_difference(time1, time2):
+    """
+    Calcula la diferencia absoluta en horas entre pares de marcas de tiempo.
+
+    Args:
+        time1, time2 (array-like): Fechas como texto ("%Y/%m/%d %H:%M:%S") o ``datetime64``.
+
+    Returns:
+        ndarray: Diferencias en horas.
+    """
+    import numpy as np
+    t1 = np.asarray(time1)
+    t2 = np.asarray(time2)
+    if not np.issubdtype(t1.dtype, np.datetime64):
+        t1 = parse_timestamps(t1)
+    if not np.issubdtype(t2.dtype, np.datetime64):
+        t2 = parse_timestamps(t2)
+    return np.abs((t1 - t2).astype("timedelta64[s]").astype(float)) / 3600
+
+
+def batch_impossible_travel(lat1, lon1, lat2, lon2, time1, time2, threshold=DEFAULT_SPEED_THRESHOLD, method="approx"):
+    """
+    Evalúa el viaje imposible para un lote de pares de logins.
+
+    Igual que ``is_impossible_travel``, un tiempo de cero horas se considera imposible.
+
+    Args:
+        lat1, lon1, lat2, lon2 (array-like): Coordenadas en grados de cada par.
+        time1, time2 (array-like): Fechas de cada login del par.
+        threshold (float): Velocidad máxima admisible en km/h.
+        method (str): Método de distancia ("approx" o "haversine").
+
+    Returns:
+        tuple: Arreglos ``(distancia_km, tiempo_horas, es_imposible)``.
+    """
+    import numpy as np
+    distancia = batch_distance(lat1, lon1, lat2, lon2, method=method)
+    tiempo = batch_time_difference(time1, time2)
+    velocidad = np.where(tiempo > 0, distancia / np.where(tiempo > 0, tiempo, 1), np.inf)
+    return distancia, tiempo, velocidad > threshold
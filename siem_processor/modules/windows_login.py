@@ -1,4 +1,18 @@
-import re
+from siem_processor.utils.extraction import IP, register_pattern, extract_fields
+
+# Formato estándar (inglés/español) y variante Citrix en una sola alternancia:
+# el cuerpo se recorre una única vez en lugar de probar tres patrones seguidos.
+register_pattern(
+    "windows_login",
+    rf'(?:Alarm: Windows - Login.*?(?P<equipo>{IP}).*?(?:User|Usuario): (?P<user>.*?) (?:Session ID|Identificador de sesión):'
+    rf'.*?(?:Source Network Address|Dirección de red de origen): (?P<source_ip>{IP}))'
+    rf'|(?i:Desde IP:\s*(?P<v_ip_origen>(?:{IP}|::)?)\s*Hacia Ip:\s*(?P<v_ip_destino>{IP})\s*Usuario:\s*(?P<v_user>\S+)\s*Host:\s*(?P<v_host>\S+))'
+)
+register_pattern(
+    "windows_desde_hacia",
+    rf'Desde IP: (?P<ip_origen>{IP}) Hacia Ip: (?P<ip_destino>{IP}) Usuario: (?P<user>.*?) Host: (?P<host>.*?)$'
+)
+
 
 def handle_windows_login(alarma, cuerpo):
     """
@@ -15,10 +29,11 @@ def handle_windows_login(alarma, cuerpo):
     is_bold = False
 
     if alarma == "Notificacion SIEM - Se ha detectado un inicio de sesión":
-        observacion = get_windows_login_observation(cuerpo)
-        if observacion == "No se pudo extraer información del inicio de sesión":
-            observacion = get_variant_windows_login_observation(cuerpo)
-        is_bold = True if observacion != "No se pudo extraer información del inicio de sesión variante" else False
+        fields = extract_fields("windows_login", cuerpo)
+        observacion = _format_windows_login(fields) or _format_variant_windows_login(fields)
+        is_bold = observacion is not None
+        if observacion is None:
+            observacion = "No se pudo extraer información del inicio de sesión variante"
 
     elif alarma == "Notificacion SIEM - Se ha detectado un inicio de sesión en los DC":
         observacion = get_windows_dc_login_observation(cuerpo)
@@ -31,6 +46,24 @@ def handle_windows_login(alarma, cuerpo):
     return observacion, is_bold
 
 
+def _format_windows_login(fields):
+    if not fields or "source_ip" not in fields:
+        return None
+    return f"Equipo: {fields['equipo']}, User: {fields['user']}, Dirección de origen: {fields['source_ip']}"
+
+
+def _format_variant_windows_login(fields):
+    if not fields or "v_ip_destino" not in fields:
+        return None
+    # Si la IP de origen es "::" o está vacía, la omitimos
+    if fields["v_ip_origen"] == "::" or not fields["v_ip_origen"]:
+        return f"Login Citrix -- IP Origen: {fields['v_ip_destino']}, Usuario: {fields['v_user']}, Host: {fields['v_host']}"
+    return (
+        f"Login Citrix -- IP Origen: {fields['v_ip_origen']}, IP Destino: {fields['v_ip_destino']}, "
+        f"Usuario: {fields['v_user']}, Host: {fields['v_host']}"
+    )
+
+
 def get_variant_windows_login_observation(cuerpo):
     """
     Extrae la información de los logs de Windows Login en un formato variante.
@@ -41,20 +74,9 @@ def get_variant_windows_login_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    pattern = r'Desde IP:\s*(?P<ip_origen>(?:\d+\.\d+\.\d+\.\d+|::)?)\s*Hacia Ip:\s*(?P<ip_destino>\d+\.\d+\.\d+\.\d+)\s*Usuario:\s*(?P<user>\S+)\s*Host:\s*(?P<host>\S+)'
-
-    match = re.search(pattern, cuerpo, re.DOTALL | re.IGNORECASE)
-    if match:
-        ip_origen = match.group("ip_origen").strip()
-        ip_destino = match.group("ip_destino").strip()
-        user = match.group("user").strip()
-        host = match.group("host").strip()
-
-        # Si la IP de origen es "::" o está vacía, la omitimos
-        if ip_origen == "::" or not ip_origen:
-            return f"Login Citrix -- IP Origen: {ip_destino}, Usuario: {user}, Host: {host}"
-        else:
-            return f"Login Citrix -- IP Origen: {ip_origen}, IP Destino: {ip_destino}, Usuario: {user}, Host: {host}"
+    observacion = _format_variant_windows_login(extract_fields("windows_login", cuerpo))
+    if observacion:
+        return observacion
 
     return "No se pudo extraer información del inicio de sesión variante"
 
@@ -69,18 +91,9 @@ def get_windows_login_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    patterns = [
-        r'Alarm: Windows - Login.*?(\d+\.\d+\.\d+\.\d+).*?User: (.*?) Session ID:.*?Source Network Address: (\d+\.\d+\.\d+\.\d+)',
-        r'Alarm: Windows - Login.*?(\d+\.\d+\.\d+\.\d+).*?Usuario: (.*?) Identificador de sesión:.*?Dirección de red de origen: (\d+\.\d+\.\d+\.\d+)',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, cuerpo, re.DOTALL)
-        if match:
-            ip = match.group(1).strip()
-            user = match.group(2).strip()
-            source_ip = match.group(3).strip()
-            return f"Equipo: {ip}, User: {user}, Dirección de origen: {source_ip}"
+    observacion = _format_windows_login(extract_fields("windows_login", cuerpo))
+    if observacion:
+        return observacion
 
     return "No se pudo extraer información del inicio de sesión"
 
@@ -94,15 +107,13 @@ def get_windows_dc_login_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    pattern = r'Desde IP: (\d+\.\d+\.\d+\.\d+) Hacia Ip: (\d+\.\d+\.\d+\.\d+) Usuario: (.*?) Host: (.*?)$'
-    match = re.search(pattern, cuerpo, re.DOTALL)
+    fields = extract_fields("windows_desde_hacia", cuerpo)
 
-    if match:
-        ip_origen = match.group(1).strip()
-        ip_destino = match.group(2).strip()
-        user = match.group(3).strip()
-        host = match.group(4).strip()
-        return f"Inicio de sesión en DC - IP Origen: {ip_origen}, IP Destino: {ip_destino}, Usuario: {user}, Host: {host}"
+    if fields:
+        return (
+            f"Inicio de sesión en DC - IP Origen: {fields['ip_origen']}, IP Destino: {fields['ip_destino']}, "
+            f"Usuario: {fields['user']}, Host: {fields['host']}"
+        )
 
     return "No se pudo extraer información del inicio de sesión en los DC"
 
@@ -117,14 +128,12 @@ def get_windows_user_login_observation(cuerpo):
     Returns:
         str: Observación extraída o un mensaje de error.
     """
-    pattern = r'Desde IP: (\d+\.\d+\.\d+\.\d+) Hacia Ip: (\d+\.\d+\.\d+\.\d+) Usuario: (.*?) Host: (.*?)$'
-    match = re.search(pattern, cuerpo, re.DOTALL)
-
-    if match:
-        ip_origen = match.group(1).strip()
-        ip_destino = match.group(2).strip()
-        user = match.group(3).strip()
-        host = match.group(4).strip()
-        return f"Inicio de sesión sin opr/admin - IP Origen: {ip_origen}, IP Destino: {ip_destino}, Usuario: {user}, Host: {host}"
+    fields = extract_fields("windows_desde_hacia", cuerpo)
+
+    if fields:
+        return (
+            f"Inicio de sesión sin opr/admin - IP Origen: {fields['ip_origen']}, IP Destino: {fields['ip_destino']}, "
+            f"Usuario: {fields['user']}, Host: {fields['host']}"
+        )
 
     return "No se pudo extraer información del inicio de sesión sin opr o admin"
@@ -0,0 +1,209 @@
+"""
+normalizer.py | Normalización en streaming de exportaciones grandes de BD_Logs.
+
+Lee la hoja de la base en modo read-only (o un CSV) por bloques de filas de tamaño fijo,
+normaliza la columna 'Cuerpo' de cada bloque en procesos worker con
+``normalize_series`` (incluida la reescritura de los logins de Windows) y escribe el
+resultado en un libro write-only (o un CSV) a medida que los bloques vuelven en orden.
+Se mantienen a lo sumo ``2 * workers`` bloques en vuelo, por lo que la memoria depende
+del tamaño de bloque y no del tamaño del archivo.
+"""
+import argparse
+import csv
+import gzip
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from siem_processor.pipeline import chunked
+from siem_processor.utils.ingest import open_text, is_csv
+from siem_processor.utils.normalization import normalize_series
+
+DEFAULT_SHEET = "BD_Logs"
+DEFAULT_OUTPUT_SHEET = "BD_Logs_Normalized"
+DEFAULT_CHUNK_SIZE = 5000
+BODY_COLUMN = "Cuerpo"
+
+
+def _csv_delimiter(path):
+    return "\t" if path.lower().endswith((".tsv", ".tsv.gz")) else ","
+
+
+def iter_table_rows(input_file, sheet_name=DEFAULT_SHEET):
+    """
+    Lee una hoja de Excel (read-only) o un CSV y genera sus filas, empezando por el encabezado.
+
+    Las filas completamente vacías se omiten.
+
+    Args:
+        input_file (str): Ruta al archivo (.xlsx/.xlsm, o .csv/.tsv opcionalmente .gz).
+        sheet_name (str): Hoja a leer en los libros de Excel.
+
+    Yields:
+        tuple: Valores de una fila.
+    """
+    if is_csv(input_file):
+        # Los cuerpos de los logs pueden superar el límite por defecto de 128 KB por campo
+        csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+        with open_text(input_file) as f:
+            for values in csv.reader(f, delimiter=_csv_delimiter(input_file)):
+                if any(values):
+                    yield tuple(values)
+        return
+
+    workbook = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        for values in workbook[sheet_name].iter_rows(values_only=True):
+            if any(value is not None for value in values):
+                yield values
+    finally:
+        workbook.close()
+
+
+def normalize_rows(rows, body_column):
+    """
+    Normaliza la columna de cuerpos de un bloque de filas.
+
+    Args:
+        rows (list): Filas del bloque (tuplas de valores).
+        body_column (int): Índice de la columna 'Cuerpo'.
+
+    Returns:
+        list: Las filas con el cuerpo normalizado, en el mismo orden.
+    """
+    bodies = pd.Series([row[body_column] if body_column < len(row) else None for row in rows], dtype=object)
+    normalized = normalize_series(bodies, rewrite_windows_login=True)
+    return [
+        row[:body_column] + (body,) + row[body_column + 1:] if body_column < len(row) else row
+        for row, body in zip(rows, normalized)
+    ]
+
+
+class _WorkbookWriter:
+    def __init__(self, output_file, sheet_name):
+        self.output_file = output_file
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title=sheet_name)
+
+    def write(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.output_file)
+
+
+class _CsvWriter:
+    def __init__(self, output_file):
+        if output_file.lower().endswith(".gz"):
+            self.file = gzip.open(output_file, "wt", encoding="utf-8", newline="")
+        else:
+            self.file = open(output_file, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file, delimiter=_csv_delimiter(output_file))
+
+    def write(self, row):
+        self.writer.writerow(["" if value is None else value for value in row])
+
+    def close(self):
+        self.file.close()
+
+
+def normalize_file(input_file, output_file, sheet_name=DEFAULT_SHEET, output_sheet=DEFAULT_OUTPUT_SHEET,
+                   chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """
+    Normaliza la columna 'Cuerpo' de una exportación de BD_Logs en streaming.
+
+    Args:
+        input_file (str): Libro de Excel o CSV con la base.
+        output_file (str): Resultado: libro de Excel, o CSV si termina en .csv/.tsv (opcionalmente .gz).
+        sheet_name (str): Hoja de entrada en los libros de Excel (por defecto: 'BD_Logs').
+        output_sheet (str): Hoja del libro de salida (por defecto: 'BD_Logs_Normalized').
+        chunk_size (int): Filas por bloque.
+        workers (int | None): Procesos de normalización (por defecto: cantidad de CPUs;
+            1 = todo en el proceso actual).
+
+    Returns:
+        int: Cantidad de filas normalizadas (sin contar el encabezado).
+
+    Raises:
+        ValueError: Si la entrada no tiene encabezado o columna 'Cuerpo'.
+    """
+    rows = iter_table_rows(input_file, sheet_name=sheet_name)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError(f"El archivo '{input_file}' no tiene encabezado")
+    names = [str(value).strip() if value is not None else "" for value in header]
+    if BODY_COLUMN not in names:
+        raise ValueError(f"El archivo '{input_file}' no tiene la columna '{BODY_COLUMN}'")
+    body_column = names.index(BODY_COLUMN)
+
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    writer = _CsvWriter(output_file) if is_csv(output_file) else _WorkbookWriter(output_file, output_sheet)
+    writer.write(header)
+
+    workers = workers or os.cpu_count() or 1
+    count = 0
+    try:
+        if workers <= 1:
+            for chunk in chunked(rows, chunk_size):
+                for row in normalize_rows(chunk, body_column):
+                    writer.write(row)
+                count += len(chunk)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                in_flight = deque()
+                for chunk in chunked(rows, chunk_size):
+                    in_flight.append(executor.submit(normalize_rows, chunk, body_column))
+                    if len(in_flight) >= 2 * workers:
+                        count += _write_chunk(writer, in_flight.popleft().result())
+                while in_flight:
+                    count += _write_chunk(writer, in_flight.popleft().result())
+    finally:
+        writer.close()
+    return count
+
+
+def _write_chunk(writer, rows):
+    for row in rows:
+        writer.write(row)
+    return len(rows)
+
+
+# --- Punto de entrada principal ---
+if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Normaliza en streaming los cuerpos de una exportación de BD_Logs.")
+    parser.add_argument(
+        "input_file", nargs="?", default="BD_Logs.xlsx",
+        help="Libro de Excel o CSV (opcionalmente .gz) con la base (por defecto: 'BD_Logs.xlsx')."
+    )
+    parser.add_argument(
+        "output_file", nargs="?", default="BD_Logs_Normalized.xlsx",
+        help="Archivo de salida: .xlsx, o .csv/.tsv opcionalmente .gz (por defecto: 'BD_Logs_Normalized.xlsx')."
+    )
+    parser.add_argument(
+        "--sheet", default=DEFAULT_SHEET,
+        help=f"Hoja de entrada en los libros de Excel (por defecto: '{DEFAULT_SHEET}')."
+    )
+    parser.add_argument(
+        "--output_sheet", default=DEFAULT_OUTPUT_SHEET,
+        help=f"Hoja del libro de salida (por defecto: '{DEFAULT_OUTPUT_SHEET}')."
+    )
+    parser.add_argument(
+        "--chunk_size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f"Filas por bloque (por defecto: {DEFAULT_CHUNK_SIZE})."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Procesos de normalización (por defecto: cantidad de CPUs; 1 = sin procesos adicionales)."
+    )
+    args = parser.parse_args()
+    total = normalize_file(
+        args.input_file, args.output_file, sheet_name=args.sheet, output_sheet=args.output_sheet,
+        chunk_size=args.chunk_size, workers=args.workers
+    )
+    print(f"Base de datos normalizada guardada en {args.output_file} ({total} filas)")
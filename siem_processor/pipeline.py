@@ -0,0 +1,200 @@
+"""
+pipeline.py | Etapas de procesamiento de filas de alarmas, compartidas por los puntos de entrada.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from siem_processor.utils.knowledge_base import lookup_observation
+from siem_processor.utils.stats import RunStats, get_stats, set_stats
+from siem_processor.modules.registry import dispatch_many, GEO_ALARMS
+from siem_processor.modules.NordAPI import (
+    prefetch_ip_info,
+    get_ip_resolver_config,
+    set_ip_resolver_config,
+    DEFAULT_LOOKUP_WORKERS
+)
+
+# Filas procesadas por bloque: acota la memoria y agrupa las consultas de IPs
+CHUNK_SIZE = 5000
+# Bloques más chicos en modo multiproceso para repartir el trabajo entre los workers
+WORKER_CHUNK_SIZE = 1000
+
+
+def chunked(iterable, size):
+    """
+    Divide un iterable en listas de a lo sumo ``size`` elementos.
+
+    Args:
+        iterable (iterable): Elementos a agrupar.
+        size (int): Tamaño máximo de cada bloque.
+
+    Yields:
+        list: Un bloque de elementos.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def init_worker(resolver_config, stats_enabled=False):
+    """
+    Inicializa un proceso worker con la configuración de resolvers del proceso padre.
+
+    Args:
+        resolver_config (tuple): Resultado de ``get_ip_resolver_config``.
+        stats_enabled (bool): Activa la instrumentación (ver ``RunStats``) en el worker.
+    """
+    set_ip_resolver_config(*resolver_config)
+    if stats_enabled:
+        set_stats(RunStats())
+
+
+def _process_chunk(pairs):
+    stats = get_stats()
+    results = dispatch_many(pairs)
+    if not stats.enabled:
+        return results, None
+    # Se envía lo medido en este bloque y se reinicia para no contarlo dos veces
+    snapshot = stats.snapshot()
+    stats.reset()
+    return results, snapshot
+
+
+class AlarmPipeline:
+    """
+    Procesa registros ``(alarma, cuerpo)`` por bloques y devuelve sus resultados en orden.
+
+    Para cada fila, en este orden: observación ya registrada en la base de datos,
+    resultado guardado por una ejecución anterior (ver ``CheckpointStore``), resultado
+    memoizado (ver ``AlarmMemo``) y, por último, los handlers. Las filas que
+    llegan a los handlers se deduplican dentro del bloque y se pre-cargan en paralelo
+    las IPs de las alarmas de viaje/VPN.
+
+    Args:
+        known_observations (dict | None): Índice de ``build_observation_index``.
+        memo (AlarmMemo | None): Memoización de resultados repetidos.
+        geo_workers (int): Consultas de geolocalización simultáneas.
+        workers (int): Procesos para ejecutar los handlers (1 = todo en el proceso actual).
+        checkpoint (CheckpointStore | None): Resultados guardados del archivo de entrada.
+    """
+
+    def __init__(self, known_observations=None, memo=None, geo_workers=DEFAULT_LOOKUP_WORKERS, workers=1,
+                 checkpoint=None):
+        self.known_observations = known_observations or {}
+        self.memo = memo
+        self.checkpoint = checkpoint
+        self.geo_workers = geo_workers
+        self.workers = workers
+
+    def process(self, records):
+        """
+        Procesa los registros y genera sus resultados en el orden de entrada.
+
+        En modo multiproceso se mantienen a lo sumo ``2 * workers`` bloques en vuelo.
+
+        Args:
+            records (iterable): Registros con atributos ``alarma`` y ``cuerpo``.
+
+        Yields:
+            tuple: ``(registro, (observacion, is_bold))``.
+        """
+        stats = get_stats()
+        if self.workers <= 1:
+            for chunk in chunked(records, CHUNK_SIZE):
+                results, pending = self._prepare_chunk(chunk, stats)
+                with stats.stage("handlers"):
+                    dispatched = dispatch_many(pending)
+                yield from zip(chunk, self._merge_results(results, pending, dispatched, stats))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                 initargs=(get_ip_resolver_config(), stats.enabled)) as executor:
+            in_flight = deque()
+            for chunk in chunked(records, WORKER_CHUNK_SIZE):
+                results, pending = self._prepare_chunk(chunk, stats)
+                in_flight.append((chunk, results, pending, executor.submit(_process_chunk, list(pending))))
+                if len(in_flight) >= 2 * self.workers:
+                    yield from self._collect(in_flight.popleft(), stats)
+            while in_flight:
+                yield from self._collect(in_flight.popleft(), stats)
+
+    def _collect(self, item, stats):
+        chunk, results, pending, future = item
+        # En modo multiproceso "handlers" es el tiempo esperando a los workers
+        with stats.stage("handlers"):
+            dispatched, snapshot = future.result()
+        stats.merge(snapshot)
+        return zip(chunk, self._merge_results(results, pending, dispatched, stats))
+
+    def _prepare_chunk(self, chunk, stats):
+        """
+        Resuelve las filas de un bloque que no necesitan handlers.
+
+        Returns:
+            tuple: ``(resultados, pendientes)``: resultados parciales (None en las filas
+            pendientes) y un dict ``(alarma, cuerpo) -> [índices]`` con las filas únicas
+            que deben pasar por los handlers.
+        """
+        results = [None] * len(chunk)
+        pending = {}
+        unresolved = []
+        with stats.stage("base_conocida"):
+            for i, record in enumerate(chunk):
+                observacion = lookup_observation(self.known_observations, record.cuerpo)
+                if observacion is not None:
+                    results[i] = (observacion, "Alerta" in observacion)
+                else:
+                    unresolved.append(i)
+        stats.count("filas", len(chunk))
+        stats.count("base_conocida_aciertos", len(chunk) - len(unresolved))
+
+        saved = {}
+        if self.checkpoint is not None and unresolved:
+            with stats.stage("checkpoint"):
+                saved = self.checkpoint.lookup_many((chunk[i].alarma, chunk[i].cuerpo) for i in unresolved)
+        memoized = []
+        with stats.stage("memo"):
+            for i in unresolved:
+                record = chunk[i]
+                key = (record.alarma, record.cuerpo)
+                result = saved.get(key)
+                if result is not None:
+                    results[i] = result
+                    continue
+                if key in pending:
+                    # Repetida dentro del bloque: se resuelve con el mismo resultado
+                    pending[key].append(i)
+                    if self.memo is not None:
+                        self.memo.count_repeat()
+                    continue
+                if self.memo is not None:
+                    result = self.memo.lookup(record.alarma, record.cuerpo)
+                    if result is not None:
+                        results[i] = result
+                        memoized.append((key, result))
+                        continue
+                pending[key] = [i]
+
+        if self.checkpoint is not None:
+            with stats.stage("checkpoint"):
+                self.checkpoint.store_many(memoized)
+
+        with stats.stage("prefetch_geo"):
+            prefetch_ip_info((cuerpo for alarma, cuerpo in pending if alarma in GEO_ALARMS),
+                             max_workers=self.geo_workers)
+        return results, pending
+
+    def _merge_results(self, results, pending, dispatched, stats):
+        with stats.stage("memo"):
+            for ((alarma, cuerpo), indices), result in zip(pending.items(), dispatched):
+                for i in indices:
+                    results[i] = result
+                if self.memo is not None:
+                    self.memo.store(alarma, cuerpo, result)
+        if self.checkpoint is not None:
+            with stats.stage("checkpoint"):
+                self.checkpoint.store_many(zip(pending, dispatched))
+        return results
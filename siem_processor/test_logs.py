@@ -3,15 +3,8 @@ testing.py | Script para probar y verificar logs individuales de alarmas SIEM.
 """
 
 import argparse
-from siem_processor.modules.windows_login import handle_windows_login
-from siem_processor.modules.linux_login import handle_linux_login
-from siem_processor.modules.other_cases import (
-    handle_abm_cases,
-    handle_salto_lateral_dba,
-    handle_pases_produccion,
-    handle_cambio_gpo
-)
-from siem_processor.modules.NordAPI import process_alarm
+import sys
+from siem_processor.modules.registry import get_handler
 
 # --- Función para probar logs individuales ---
 def test_single_log(alarma, cuerpo):
@@ -27,64 +20,17 @@ def test_single_log(alarma, cuerpo):
     """
     print(f"\nProcesando log individual: Alarma='{alarma}', Cuerpo='{cuerpo}'")
     # Procesar según el tipo de alarma
-    if alarma in [
-        "Notificacion SIEM - Se ha detectado un inicio de sesión",
-        "Notificacion SIEM - Se ha detectado un inicio de sesión en los DC",
-        "Notificacion SIEM - Se ha detectado un inicio de sesión sin opr o admin"
-    ]:
-        print("Procesando inicio de sesión en Windows...")
-        observacion, _ = handle_windows_login(alarma, cuerpo)
-        return observacion
+    handler = get_handler(alarma)
+    if handler is None:
+        return "Caso no clasificado - Verificar manualmente"
 
-    elif alarma in [
-        "Notificacion SIEM - Login fuera de puentes",
-        "Notificacion SIEM - Notificacion SIEM - Login sin usuario OPR o PS en Linux",
-        "Notificacion SIEM - Sudo su detectado",
-        "Notificacion SIEM - Notificacion - SIEM cambios audit"
-    ]:
-        observacion, _ = handle_linux_login(alarma, cuerpo)
-        return observacion
-
-    elif alarma in [
-        "Notificacion SIEM - ABM-Usuario-AD-Creado",
-        "Notificacion SIEM - ABM-Restablecimiento-Credenciales",
-        "Notificacion SIEM - ABM-Grupo-AD-Agregado",
-        "Notificacion SIEM - ABM-Grupo-AD-Removido",
-    ]:
-        observacion, _ = handle_abm_cases(alarma, cuerpo)
-        return observacion
-
-    elif alarma in [
-        "Notificacion SIEM - Posible salto lateral 12+",
-        "Notificacion SIEM - Posible salto lateral 6+"
-    ]:
-        observacion, _ = handle_salto_lateral_dba(alarma, cuerpo)
-        return observacion
-
-    elif alarma in [
-        "Notificacion SIEM - VPN - Login desde 2 IPs diferentes",
-        "Notificacion SIEM - Workapp - Login desde 2 IPs diferentes",
-        "Notificacion SIEM - Workapp - Login fuera de ARG y PY",
-        "Notificacion SIEM - VPN fuera de ARG o PY."
-    ]:
-        observacion = process_alarm(cuerpo)
-        return observacion
-
-    elif alarma in [
-        "Notificacion SIEM - Notificacion SIEM - Pase a produccion detectado"
-    ]:
-        observacion, _ = handle_pases_produccion(alarma, cuerpo)
-        return observacion
-    elif alarma in [
-        "Notificacion SIEM - SIEM - Cambio de politicas GPO"
-    ]:
-        observacion, _ = handle_cambio_gpo(alarma, cuerpo)
-        return observacion
-
-    return "Caso no clasificado - Verificar manualmente"
+    observacion, _ = handler(alarma, cuerpo)
+    return observacion
 
 # --- Punto de entrada principal ---
 if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
     # Variables de ejemplo para pruebas rápidas
     test_alarma = """
     Notificacion SIEM - SIEM - Cambio de politicas GPO
@@ -1,71 +1,11 @@
-import requests
-from math import cos, sqrt, radians
-from datetime import datetime
 import re
 import sys
-
-# Configurar la codificación UTF-8
-sys.stdout.reconfigure(encoding='utf-8')
-
-# Función para obtener información de una IP desde la API de NordVPN
-def get_ip_info_from_nordvpn(ip):
-    try:
-        url = f"https://web-api.nordvpn.com/v1/ips/lookup/{ip}"
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            data = response.json()
-
-            # Extraer información relevante
-            location_info = {
-                "ip": data.get("ip", "N/A"),
-                "country": data.get("country", "N/A"),
-                "country_code": data.get("country_code", "N/A"),
-                "region": data.get("region", "N/A"),
-                "city": data.get("city", "N/A"),
-                "state_code": data.get("state_code", "N/A"),
-                "zip_code": data.get("zip_code", "Unknown"),
-                "latitude": data.get("latitude"),
-                "longitude": data.get("longitude"),
-                "isp": data.get("isp", "N/A"),
-                "asn": data.get("isp_asn", "N/A"),
-                "host_domain": data["host"]["domain"] if data.get("host") else "N/A",
-                "vpn_detected": data.get("hosted", False),
-                "gdpr": data.get("gdpr", False),
-            }
-            return location_info
-
-        else:
-            print(f"Error en API NordVPN. Código de estado: {response.status_code}")
-            return None
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error en la solicitud a NordVPN API: {e}")
-        return None
-
-# --- Función para calcular la diferencia de tiempo ---
-def calculate_time_difference(time1, time2):
-    time_format = "%Y/%m/%d %H:%M:%S"
-    t1 = datetime.strptime(time1, time_format)
-    t2 = datetime.strptime(time2, time_format)
-    return abs((t1 - t2).total_seconds() / 3600)  # Diferencia en horas
-
-# --- Función para determinar si el viaje es imposible ---
-def is_impossible_travel(distancia, tiempo, threshold=120):
-    if tiempo == 0:
-        print("Error: El tiempo entre los dos eventos es cero")
-        return True
-
-    velocidad = distancia / tiempo  # Calcula la velocidad en km/h
-    return velocidad > threshold
-
-# --- Función para calcular distancia entre coordenadas ---
-def approximate_distance(lat1, lon1, lat2, lon2):
-    delta_lat = lat2 - lat1
-    delta_lon = lon2 - lon1
-    lat_media = radians((lat1 + lat2) / 2)
-
-    return sqrt((delta_lat * 111.32) ** 2 + (delta_lon * 111.32 * cos(lat_media)) ** 2)
+from siem_processor.modules.NordAPI import (
+    get_ip_info_from_nordvpn,
+    approximate_distance,
+    calculate_time_difference,
+    is_impossible_travel
+)
 
 # --- Función principal para procesar alertas ---
 def process_alarm(log):
@@ -146,6 +86,8 @@ def process_login_outside_permitted_countries(log):
     return process_vpn_outside_permitted_countries(log)
 
 if __name__ == "__main__":
+    # Configurar la codificación UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
     logs = [
         """Workapp - Login desde 2 IPs diferentes    Fecha/hora: 2025/02/21 11:09:10 Usuario: u994755 IP de origen: 181.121.197.192 Geolocalizacion de origen: Yaguarete Cua, Cordillera, Paraguay, 3230 Reputacion de IP (Cisco Talos): https://talosintelligence.com/reputation_center/lookup?search=181.121.197.192 ---  Fecha/hora: 2025/02/21 16:01:56 Usuario: u994755 IP de origen: 181.121.48.111 Geolocalizacion de origen: San Lorenzo, Central, Paraguay, 110221 Reputacion de IP (Cisco Talos): https://talosintelligence.com/reputation_center/lookup?search=181.121.48.111 ---""",
     ]
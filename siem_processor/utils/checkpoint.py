@@ -0,0 +1,138 @@
+"""
+checkpoint.py | Registro persistente de las filas ya procesadas de cada archivo de entrada.
+
+Cada fila se identifica por su archivo/hoja de origen y una huella del par
+``(alarma, cuerpo)``. Los resultados se guardan por bloque a medida que se procesan, de
+modo que si la ejecución se interrumpe (o el archivo del día se vuelve a exportar con
+filas nuevas) la siguiente sólo pasa por los handlers las filas nuevas o modificadas.
+Los resultados de error (por ejemplo, una consulta de geolocalización fallida) no se
+guardan para que se reintenten.
+"""
+import hashlib
+import os
+import sqlite3
+
+DEFAULT_DB_PATH = os.environ.get(
+    "SIEM_CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "checkpoint.sqlite"),
+)
+# Incrementar cuando cambie la lógica de los handlers para descartar resultados viejos
+CHECKPOINT_VERSION = 2
+# Parámetros por consulta (SQLite admite 999 en versiones antiguas)
+_QUERY_BATCH = 500
+
+
+def checkpoint_source(input_file, sheet_name):
+    """
+    Devuelve el identificador de origen de un archivo y hoja de entrada.
+
+    Args:
+        input_file (str): Ruta al archivo de entrada.
+        sheet_name (str | None): Hoja procesada.
+
+    Returns:
+        str: Ruta absoluta del archivo, seguida de la hoja si corresponde.
+    """
+    source = os.path.abspath(input_file)
+    return f"{source}::{sheet_name}" if sheet_name else source
+
+
+def row_fingerprint(alarma, cuerpo):
+    """
+    Calcula la huella de una fila de entrada.
+
+    Args:
+        alarma (str): El tipo de alarma.
+        cuerpo (str): El cuerpo del log.
+
+    Returns:
+        bytes: Digest BLAKE2b de 16 bytes.
+    """
+    return hashlib.blake2b(f"{alarma}\x1f{cuerpo}".encode("utf-8"), digest_size=16).digest()
+
+
+class CheckpointStore:
+    """
+    Resultados ya calculados para las filas de un origen, guardados en SQLite.
+
+    Args:
+        source (str): Identificador del origen (ver ``checkpoint_source``).
+        db_path (str): Ruta de la base SQLite.
+    """
+
+    def __init__(self, source, db_path=DEFAULT_DB_PATH):
+        self.source = source
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            "source TEXT NOT NULL, fingerprint BLOB NOT NULL, observacion TEXT NOT NULL, "
+            "is_bold INTEGER NOT NULL, version INTEGER NOT NULL, PRIMARY KEY (source, fingerprint))"
+        )
+        self._conn.commit()
+        self.reused = 0
+        self.stored = 0
+
+    def lookup_many(self, pairs):
+        """
+        Busca los resultados guardados de varias filas.
+
+        Args:
+            pairs (iterable): Pares ``(alarma, cuerpo)``.
+
+        Returns:
+            dict: ``(alarma, cuerpo) -> (observacion, is_bold)`` para las filas encontradas.
+        """
+        pairs = list(pairs)
+        by_fingerprint = {row_fingerprint(alarma, cuerpo): (alarma, cuerpo) for alarma, cuerpo in pairs}
+        fingerprints = list(by_fingerprint)
+        found = {}
+        for start in range(0, len(fingerprints), _QUERY_BATCH):
+            batch = fingerprints[start:start + _QUERY_BATCH]
+            rows = self._conn.execute(
+                f"SELECT fingerprint, observacion, is_bold FROM checkpoint "
+                f"WHERE source = ? AND version = ? AND fingerprint IN ({','.join('?' * len(batch))})",
+                (self.source, CHECKPOINT_VERSION, *batch),
+            )
+            for fingerprint, observacion, is_bold in rows:
+                found[by_fingerprint[fingerprint]] = (observacion, bool(is_bold))
+        self.reused += sum(1 for pair in pairs if pair in found)
+        return found
+
+    def store_many(self, items):
+        """
+        Guarda los resultados de varias filas en una sola transacción.
+
+        Args:
+            items (iterable): Tuplas ``((alarma, cuerpo), (observacion, is_bold))``.
+        """
+        rows = [
+            (self.source, row_fingerprint(alarma, cuerpo), observacion, int(bool(is_bold)), CHECKPOINT_VERSION)
+            for (alarma, cuerpo), (observacion, is_bold) in items
+            if isinstance(observacion, str) and not observacion.startswith("Error")
+        ]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint (source, fingerprint, observacion, is_bold, version) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.stored += len(rows)
+
+    def clear(self):
+        """
+        Elimina todos los resultados guardados del origen.
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM checkpoint WHERE source = ?", (self.source,))
+
+    def close(self):
+        """
+        Cierra la conexión con la base.
+        """
+        self._conn.close()
@@ -0,0 +1,296 @@
+"""
+excel_io.py | Lectura y escritura en streaming de las hojas de alarmas SIEM.
+"""
+from collections import deque, namedtuple
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from siem_processor.utils.style_utils import register_named_styles, get_style_name
+
+DEFAULT_SHEET = "7-11"
+
+OUTPUT_HEADER = ("Alarma", "Observación", "Cuerpo")
+SUMMARY_HEADER = ("Archivo", "Hoja", "Filas", "Críticas", "Alertas", "Salida")
+ALERTS_HEADER = ("Archivo", "Hoja", "Alarma", "Observación", "Cuerpo")
+
+# Fila de entrada: número de fila en la hoja (1 = encabezado) o de línea, alarma y cuerpo.
+AlarmRecord = namedtuple("AlarmRecord", ["fila", "alarma", "cuerpo"])
+
+
+def list_alarm_sheets(input_file):
+    """
+    Devuelve las hojas de un libro que tienen las columnas ``Alarma`` y ``Cuerpo``.
+
+    Args:
+        input_file (str): Ruta al archivo Excel.
+
+    Returns:
+        list: Nombres de las hojas de alarmas, en el orden del libro.
+    """
+    workbook = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        sheets = []
+        for sheet in workbook.worksheets:
+            header = next(sheet.iter_rows(max_row=1, values_only=True), None) or ()
+            header = {str(value).strip() for value in header if value is not None}
+            if {"Alarma", "Cuerpo"} <= header:
+                sheets.append(sheet.title)
+        return sheets
+    finally:
+        workbook.close()
+
+
+class AlarmWorkbookSource:
+    """
+    Libro de alarmas abierto una sola vez, en modo read-only.
+
+    ``records`` recorre la hoja de alarmas y genera sus filas; con ``keep_rows`` además
+    retiene los valores completos de cada fila leída (incluidas las vacías) hasta que
+    ``write_alarm_workbook`` los copia a la salida con ``take_rows``. Así la hoja se
+    parsea una única vez aunque se lea y se copie, y sólo quedan en memoria las filas
+    leídas por adelantado que todavía no se escribieron.
+
+    Args:
+        input_file (str): Ruta al archivo Excel de entrada.
+        sheet_name (str): Nombre de la hoja de alarmas (por defecto: '7-11').
+        keep_rows (bool): Retener las filas completas para copiarlas a la salida.
+    """
+
+    def __init__(self, input_file, sheet_name=DEFAULT_SHEET, keep_rows=True):
+        self.input_file = input_file
+        self.sheet_name = sheet_name
+        self.keep_rows = keep_rows
+        self.workbook = load_workbook(input_file, read_only=True, data_only=True)
+        self._rows = self.workbook[sheet_name].iter_rows(values_only=True)
+        self._next_fila = 1
+        self.header = None
+        self._buffer = deque()
+
+    def _read(self):
+        values = next(self._rows, None)
+        if values is None:
+            return None
+        fila = self._next_fila
+        self._next_fila += 1
+        if self.keep_rows and fila > 1:
+            self._buffer.append((fila, values))
+        return fila, values
+
+    def records(self):
+        """
+        Genera las filas de la hoja de alarmas.
+
+        Sólo se conservan las columnas ``Alarma`` y ``Cuerpo``; las celdas vacías se
+        devuelven como cadenas vacías y las filas sin alarma ni cuerpo se omiten. ``fila``
+        es siempre el número real de la fila en la hoja, de modo que ``write_alarm_workbook``
+        escribe cada resultado en su posición original aunque haya filas omitidas.
+
+        Yields:
+            AlarmRecord: Una fila de la hoja (``fila`` cuenta el encabezado como 1).
+        """
+        first = self._read()
+        if first is None:
+            return
+        self.header = first[1]
+        header = [str(value).strip() if value is not None else "" for value in self.header]
+        for column in ("Alarma", "Cuerpo"):
+            if column not in header:
+                raise ValueError(f"La hoja '{self.sheet_name}' no tiene la columna '{column}'")
+        col_alarma = header.index("Alarma")
+        col_cuerpo = header.index("Cuerpo")
+
+        while True:
+            row = self._read()
+            if row is None:
+                return
+            fila, values = row
+            alarma = values[col_alarma] if col_alarma < len(values) else None
+            cuerpo = values[col_cuerpo] if col_cuerpo < len(values) else None
+            if alarma is None and cuerpo is None:
+                continue
+            yield AlarmRecord(
+                fila,
+                str(alarma) if alarma is not None else "",
+                str(cuerpo) if cuerpo is not None else "",
+            )
+
+    def take_rows(self, until=None):
+        """
+        Entrega las filas completas retenidas, leyendo las que falten de la hoja.
+
+        Args:
+            until (int | None): Última fila a entregar; None entrega hasta el final de la hoja.
+
+        Yields:
+            tuple: ``(fila, valores)`` en orden, sin el encabezado.
+        """
+        while True:
+            if self._buffer:
+                if until is not None and self._buffer[0][0] > until:
+                    return
+                yield self._buffer.popleft()
+            elif (until is None or self._next_fila <= until) and self._read() is not None:
+                continue
+            else:
+                return
+
+    def close(self):
+        """
+        Cierra el libro de entrada.
+        """
+        self.workbook.close()
+
+
+def iter_alarm_records(input_file, sheet_name=DEFAULT_SHEET):
+    """
+    Lee una hoja de alarmas una sola vez, en modo read-only, y genera sus filas.
+
+    Args:
+        input_file (str): Ruta al archivo Excel de entrada.
+        sheet_name (str): Nombre de la hoja a leer (por defecto: '7-11').
+
+    Yields:
+        AlarmRecord: Una fila de la hoja (ver ``AlarmWorkbookSource.records``).
+    """
+    source = AlarmWorkbookSource(input_file, sheet_name=sheet_name, keep_rows=False)
+    try:
+        yield from source.records()
+    finally:
+        source.close()
+
+
+def write_alarm_workbook(output_file, rows, sheet_name=DEFAULT_SHEET, source=None, row_offset=0):
+    """
+    Escribe el libro de salida en modo write-only.
+
+    Si se recibe ``source`` (el libro de entrada abierto con ``AlarmWorkbookSource``,
+    del que salen los registros procesados), la salida es una copia de todas sus hojas
+    y columnas: en la hoja de alarmas, la observación de cada resultado se escribe en la
+    columna 'Observación' (que se agrega al final si no existe) de su fila original, y
+    el resto de las celdas se copian tal cual, tomadas de la misma lectura de la hoja.
+    Si no, se escribe una hoja con las columnas Alarma/Observación/Cuerpo y cada
+    resultado en la fila ``fila + row_offset``, dejando vacías las filas que el lector omitió.
+
+    Las filas se vuelcan a disco a medida que se generan y la celda de observación
+    referencia un estilo con nombre registrado una única vez en el libro, por lo que
+    el tiempo y la memoria crecen linealmente con la cantidad de filas. Del libro de
+    entrada se copian los valores (el último resultado guardado de las fórmulas), no
+    el formato de las celdas.
+
+    Args:
+        output_file (str): Ruta del archivo Excel de salida.
+        rows (iterable): Tuplas ``(fila, alarma, observacion, cuerpo, is_critical, is_bold)``
+            en orden de fila.
+        sheet_name (str): Nombre de la hoja de alarmas (por defecto: '7-11').
+        source (AlarmWorkbookSource | None): Libro de entrada a copiar en la salida.
+        row_offset (int): Desplazamiento entre ``fila`` y la fila de salida cuando no hay
+            libro de entrada (1 si ``fila`` es un número de línea sin encabezado).
+
+    Returns:
+        int: Cantidad de resultados escritos.
+    """
+    workbook = Workbook(write_only=True)
+    register_named_styles(workbook)
+    if source is None:
+        count = _write_fresh_sheet(workbook.create_sheet(title=sheet_name), rows, row_offset)
+        workbook.save(output_file)
+        return count
+
+    count = 0
+    for source_sheet in source.workbook.worksheets:
+        sheet = workbook.create_sheet(title=source_sheet.title)
+        if source_sheet.title == source.sheet_name:
+            count = _write_merged_sheet(sheet, source, rows)
+        else:
+            for values in source_sheet.iter_rows(values_only=True):
+                sheet.append(values)
+    workbook.save(output_file)
+    return count
+
+
+def _observation_cell(sheet, observacion, is_critical, is_bold):
+    cell = WriteOnlyCell(sheet, value=observacion)
+    style = get_style_name(is_critical, is_bold)
+    if style:
+        cell.style = style
+    return cell
+
+
+def _write_fresh_sheet(sheet, rows, row_offset):
+    sheet.append(OUTPUT_HEADER)
+    current = 1
+    count = 0
+    for fila, alarma, observacion, cuerpo, is_critical, is_bold in rows:
+        # Filas omitidas por el lector (vacías o inválidas): se conservan vacías
+        while current < fila + row_offset - 1:
+            sheet.append([])
+            current += 1
+        sheet.append([alarma, _observation_cell(sheet, observacion, is_critical, is_bold), cuerpo])
+        current += 1
+        count += 1
+    return count
+
+
+def _write_merged_sheet(sheet, source, rows):
+    results = iter(rows)
+    # El primer resultado obliga a leer el encabezado si todavía no se leyó
+    pending = next(results, None)
+    header = list(source.header or ())
+    names = [str(value).strip() if value is not None else "" for value in header]
+    if "Observación" in names:
+        col_observacion = names.index("Observación")
+    else:
+        col_observacion = len(header)
+        header.append("Observación")
+    sheet.append(header)
+
+    count = 0
+    while pending is not None:
+        fila, _, observacion, _, is_critical, is_bold = pending
+        found = False
+        for row_fila, values in source.take_rows(until=fila):
+            values = list(values)
+            if row_fila == fila:
+                values.extend([None] * (col_observacion + 1 - len(values)))
+                values[col_observacion] = _observation_cell(sheet, observacion, is_critical, is_bold)
+                found = True
+            sheet.append(values)
+        if not found:
+            raise ValueError(f"La fila {fila} no existe en la hoja '{source.sheet_name}'")
+        count += 1
+        pending = next(results, None)
+    for _, values in source.take_rows():
+        sheet.append(values)
+    return count
+
+
+def write_summary_workbook(output_file, summaries):
+    """
+    Escribe el resumen de un procesamiento por lotes.
+
+    La hoja 'Resumen' tiene una fila por archivo y hoja procesados; la hoja 'Alertas'
+    reúne las filas marcadas como alerta de todos ellos.
+
+    Args:
+        output_file (str): Ruta del archivo Excel de salida.
+        summaries (iterable): Resultados de ``process_alarms`` (con 'input_file',
+            'sheet', 'rows', 'critical', 'output_file' y 'alerts').
+    """
+    workbook = Workbook(write_only=True)
+    register_named_styles(workbook)
+    summary_sheet = workbook.create_sheet(title="Resumen")
+    alerts_sheet = workbook.create_sheet(title="Alertas")
+    summary_sheet.append(SUMMARY_HEADER)
+    alerts_sheet.append(ALERTS_HEADER)
+
+    for summary in summaries:
+        alerts = summary["alerts"]
+        summary_sheet.append([
+            summary["input_file"], summary["sheet"], summary["rows"], summary["critical"], len(alerts),
+            summary["output_file"],
+        ])
+        for alarma, observacion, cuerpo, is_critical in alerts:
+            cell = WriteOnlyCell(alerts_sheet, value=observacion)
+            cell.style = get_style_name(is_critical, True)
+            alerts_sheet.append([summary["input_file"], summary["sheet"], alarma, cell, cuerpo])
+
+    workbook.save(output_file)
@@ -0,0 +1,80 @@
+"""
+extraction.py | Motor de extracción compartido para los handlers de alarmas SIEM.
+
+Todos los patrones se compilan una sola vez al importar el módulo que los registra.
+Cada patrón se ancla en las etiquetas fijas del cuerpo (``Usuario de origen:``,
+``Host:``, ``IP de origen:`` ...) y usa grupos con nombre, de modo que las variantes
+de un mismo formato se resuelven en una única pasada sobre el cuerpo en lugar de
+reintentar un ``re.search`` por cada patrón alternativo.
+"""
+import re
+
+IP = r"\d+\.\d+\.\d+\.\d+"
+
+_PATTERNS = {}
+
+
+def register_pattern(name, pattern, flags=re.DOTALL):
+    """
+    Compila y registra un patrón de extracción.
+
+    Args:
+        name (str): Nombre único del patrón.
+        pattern (str): Expresión regular con grupos con nombre.
+        flags (int): Flags de compilación (por defecto: re.DOTALL).
+
+    Returns:
+        Pattern: El patrón compilado.
+    """
+    if name in _PATTERNS:
+        raise ValueError(f"El patrón '{name}' ya está registrado")
+    compiled = re.compile(pattern, flags)
+    _PATTERNS[name] = compiled
+    return compiled
+
+
+def get_pattern(name):
+    """
+    Devuelve el patrón compilado registrado bajo ``name``.
+
+    Args:
+        name (str): Nombre del patrón.
+
+    Returns:
+        Pattern: El patrón compilado.
+    """
+    return _PATTERNS[name]
+
+
+def extract_fields(name, cuerpo):
+    """
+    Extrae los campos con nombre de un cuerpo en una sola pasada.
+
+    Los grupos que no participan en la coincidencia (ramas alternativas del patrón)
+    se omiten del resultado.
+
+    Args:
+        name (str): Nombre del patrón registrado.
+        cuerpo (str): El cuerpo del log.
+
+    Returns:
+        dict | None: Campos extraídos (sin espacios extremos) o None si no hay coincidencia.
+    """
+    match = _PATTERNS[name].search(cuerpo)
+    if not match:
+        return None
+    return {key: value.strip() for key, value in match.groupdict().items() if value is not None}
+
+
+def find_all(name, text):
+    """
+    Devuelve todas las coincidencias del primer grupo de un patrón registrado.
+
+    Args:
+        name (str): Nombre del patrón registrado.
+        text (str): Texto donde buscar.
+
+    Returns:
+        list: Valores encontrados, en orden de aparición.
+    """
+    return _PATTERNS[name].findall(text)
@@ -0,0 +1,145 @@
+"""
+fingerprint.py | Huellas de plantilla y memoización de resultados de alarmas repetidas.
+
+Muchas filas de un día son la misma plantilla de alarma con distintas IPs, usuarios,
+fechas o números. ``template_key`` enmascara esos valores variables en una sola pasada
+y obtiene la clave de plantilla, que agrupa las filas para el reporte de
+deduplicación. ``AlarmMemo`` sólo reutiliza resultados para pares ``(alarma, cuerpo)``
+exactos: dentro de una plantilla, la observación depende de los valores enmascarados
+y no puede reconstruirse sin ejecutar el handler.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 200000
+# Prefijo de las observaciones de error (por ejemplo, fallos transitorios de la API)
+ERROR_PREFIX = "Error"
+
+_VARIABLE_TOKENS = re.compile(
+    r"(?P<IP>\b\d{1,3}(?:\.\d{1,3}){3}\b)"
+    r"|(?P<FECHA>\b\d{4}[/-]\d{2}[/-]\d{2}(?:[ T]\d{2}:\d{2}:\d{2})?\b)"
+    r"|(?P<HORA>\b\d{2}:\d{2}:\d{2}\b)"
+    r"|(?P<USUARIO>\b[A-Za-z]\d{4,}(?:_\w+)?\b)"
+    r"|(?P<NUM>\b(?:0x[0-9A-Fa-f]+|\d+)\b)"
+)
+
+
+def template_key(alarma, cuerpo):
+    """
+    Enmascara los valores variables de un cuerpo y devuelve su clave de plantilla.
+
+    Args:
+        alarma (str): El tipo de alarma.
+        cuerpo (str): El cuerpo del log.
+
+    Returns:
+        tuple: ``((alarma, cuerpo_enmascarado), valores)`` con los valores variables
+        en orden de aparición.
+    """
+    tokens = []
+
+    def mask(match):
+        tokens.append(match.group())
+        return f"<{match.lastgroup}>"
+
+    return (alarma, _VARIABLE_TOKENS.sub(mask, cuerpo)), tokens
+
+
+class AlarmMemo:
+    """
+    Memoización de resultados de handlers por par ``(alarma, cuerpo)`` exacto.
+
+    Los resultados y las plantillas se guardan en LRUs de a lo sumo ``max_entries``
+    elementos, por lo que un servicio de larga duración sigue aprendiendo. Las
+    observaciones de error no se recuerdan: la misma fila vuelve a los handlers en el
+    siguiente intento. Puede compartirse entre hilos (por ejemplo, entre los pedidos
+    del servicio residente).
+
+    Args:
+        max_entries (int): Máximo de resultados (y de plantillas) recordados.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._templates = OrderedDict()
+        self.rows = 0
+        self.exact_hits = 0
+        self.template_hits = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, alarma, cuerpo):
+        """
+        Busca un resultado memoizado para una fila.
+
+        Args:
+            alarma (str): El tipo de alarma.
+            cuerpo (str): El cuerpo del log.
+
+        Returns:
+            tuple | None: ``(observacion, is_bold)`` o None si hay que ejecutar el handler.
+        """
+        key, _ = template_key(alarma, cuerpo)
+        with self._lock:
+            self.rows += 1
+            if key in self._templates:
+                self._templates.move_to_end(key)
+                self.template_hits += 1
+            else:
+                self._templates[key] = True
+                if len(self._templates) > self.max_entries:
+                    self._templates.popitem(last=False)
+            result = self._results.get((alarma, cuerpo))
+            if result is not None:
+                self._results.move_to_end((alarma, cuerpo))
+                self.exact_hits += 1
+            return result
+
+    def count_repeat(self):
+        """
+        Contabiliza una fila repetida que se resolvió fuera de la memo (por ejemplo,
+        deduplicada dentro del mismo bloque).
+        """
+        with self._lock:
+            self.rows += 1
+            self.exact_hits += 1
+            self.template_hits += 1
+
+    def store(self, alarma, cuerpo, result):
+        """
+        Registra el resultado real de los handlers para una fila.
+
+        Args:
+            alarma (str): El tipo de alarma.
+            cuerpo (str): El cuerpo del log.
+            result (tuple): ``(observacion, is_bold)`` devuelto por los handlers. Si la
+                observación no es texto o empieza con 'Error' no se guarda.
+        """
+        observacion = result[0] if result else None
+        if not isinstance(observacion, str) or observacion.startswith(ERROR_PREFIX):
+            return
+        with self._lock:
+            self._results[(alarma, cuerpo)] = result
+            self._results.move_to_end((alarma, cuerpo))
+            if len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def stats(self):
+        """
+        Devuelve los contadores de deduplicación.
+
+        Returns:
+            dict: Filas consultadas, filas repetidas exactas, filas de una plantilla ya
+            vista, plantillas distintas y resultados recordados, y tasas de aciertos.
+        """
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "exact_hits": self.exact_hits,
+                "template_hits": self.template_hits,
+                "templates": len(self._templates),
+                "entries": len(self._results),
+                "hit_rate": self.exact_hits / self.rows if self.rows else 0.0,
+                "template_hit_rate": self.template_hits / self.rows if self.rows else 0.0,
+            }
@@ -0,0 +1,407 @@
+"""
+ingest.py | Adaptadores de entrada en streaming: Excel, CSV, JSON, JSON lines y syslog RFC 5424.
+
+Todos generan ``AlarmRecord`` de a una fila, leyendo el archivo una sola vez, por lo
+que la memoria no depende del tamaño de la exportación. Los archivos terminados en
+``.gz`` se descomprimen al vuelo.
+"""
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+from siem_processor.utils.excel_io import AlarmRecord, iter_alarm_records, DEFAULT_SHEET
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+CSV_EXTENSIONS = (".csv", ".tsv")
+JSON_EXTENSIONS = (".json",)
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+SYSLOG_EXTENSIONS = (".log", ".syslog")
+SUPPORTED_EXTENSIONS = EXCEL_EXTENSIONS + CSV_EXTENSIONS + JSON_EXTENSIONS + JSONL_EXTENSIONS + SYSLOG_EXTENSIONS
+
+# Nombres aceptados para las columnas/claves (se comparan sin distinguir mayúsculas)
+ALARMA_KEYS = ("alarma", "alarm", "alarm_name")
+CUERPO_KEYS = ("cuerpo", "body", "message", "mensaje")
+# Parámetro de datos estructurados de syslog con el nombre de la alarma
+SYSLOG_ALARMA_PARAM = "alarma"
+# Separador entre alarma y cuerpo en el MSG cuando no viene el parámetro 'alarma'
+SYSLOG_MSG_SEPARATOR = " | "
+# Caracteres leídos por vez al recorrer un arreglo JSON
+JSON_CHUNK_SIZE = 1 << 16
+
+# <PRI>VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+_SYSLOG_HEADER = re.compile(
+    r"<(?P<pri>\d{1,3})>(?P<version>\d{1,2}) (?P<timestamp>\S+) (?P<hostname>\S+) "
+    r"(?P<app_name>\S+) (?P<procid>\S+) (?P<msgid>\S+) "
+)
+_SD_ELEMENT = re.compile(r'\[(?P<id>[^\s\]=]+)(?P<params>(?:\s+[^\s=\]]+="(?:[^"\\]|\\.)*")*)\s*\]')
+_SD_PARAM = re.compile(r'(?P<name>[^\s=\]]+)="(?P<value>(?:[^"\\]|\\.)*)"')
+_SD_ESCAPE = re.compile(r'\\([\\"\]])')
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def open_text(path):
+    """
+    Abre un archivo de texto UTF-8 (con o sin BOM), descomprimiéndolo si termina en .gz.
+
+    Args:
+        path (str): Ruta al archivo.
+
+    Returns:
+        file: Archivo abierto en modo texto, sin traducción de saltos de línea.
+    """
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def _extension(path):
+    path = path.lower()
+    if path.endswith(".gz"):
+        path = path[:-3]
+    return os.path.splitext(path)[1]
+
+
+def _pick(mapping, keys):
+    for key in keys:
+        if key in mapping:
+            return mapping[key]
+    return None
+
+
+def _as_text(value):
+    return "" if value is None else str(value)
+
+
+def is_excel(path):
+    """
+    Indica si una ruta corresponde a un libro de Excel.
+
+    Args:
+        path (str): Ruta al archivo.
+
+    Returns:
+        bool: True para .xlsx/.xlsm.
+    """
+    return _extension(path) in EXCEL_EXTENSIONS
+
+
+def is_csv(path):
+    """
+    Indica si una ruta corresponde a un archivo CSV o TSV.
+
+    Args:
+        path (str): Ruta al archivo.
+
+    Returns:
+        bool: True para .csv/.tsv (opcionalmente .gz).
+    """
+    return _extension(path) in CSV_EXTENSIONS
+
+
+def output_row_offset(path):
+    """
+    Devuelve cuánto hay que sumar a ``fila`` para obtener la fila de la hoja de salida.
+
+    En Excel y CSV ``fila`` ya cuenta el encabezado; en JSON es la posición en el arreglo
+    y en JSON lines y syslog el número de línea, y la 1 va debajo del encabezado de la salida.
+
+    Args:
+        path (str): Ruta al archivo de entrada.
+
+    Returns:
+        int: 0 para Excel y CSV, 1 para JSON y los formatos de una alarma por línea.
+    """
+    return 0 if is_excel(path) or is_csv(path) else 1
+
+
+def is_supported(path):
+    """
+    Indica si una ruta tiene un formato de entrada soportado.
+
+    Args:
+        path (str): Ruta al archivo.
+
+    Returns:
+        bool: True si ``iter_records`` puede leerlo.
+    """
+    return _extension(path) in SUPPORTED_EXTENSIONS
+
+
+def iter_csv_records(path, delimiter=None):
+    """
+    Lee un CSV con encabezado y genera sus filas de alarmas.
+
+    Args:
+        path (str): Ruta al archivo (.csv, .tsv, opcionalmente .gz).
+        delimiter (str | None): Separador de campos. Por defecto tabulación para .tsv y
+            coma para el resto.
+
+    Yields:
+        AlarmRecord: Una fila del archivo (``fila`` cuenta el encabezado como 1).
+    """
+    if delimiter is None:
+        delimiter = "\t" if _extension(path) == ".tsv" else ","
+    # Los cuerpos de los logs pueden superar el límite por defecto de 128 KB por campo
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open_text(path) as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = {name.strip().lower(): i for i, name in enumerate(header)}
+        col_alarma = _pick(columns, ALARMA_KEYS)
+        col_cuerpo = _pick(columns, CUERPO_KEYS)
+        if col_alarma is None or col_cuerpo is None:
+            raise ValueError(f"El archivo '{path}' no tiene las columnas 'Alarma' y 'Cuerpo'")
+
+        for fila, values in enumerate(reader, start=2):
+            alarma = values[col_alarma] if col_alarma < len(values) else ""
+            cuerpo = values[col_cuerpo] if col_cuerpo < len(values) else ""
+            if not alarma and not cuerpo:
+                continue
+            yield AlarmRecord(fila, alarma, cuerpo)
+
+
+def parse_jsonl_line(line):
+    """
+    Interpreta una línea JSON lines.
+
+    Args:
+        line (str): Objeto JSON con las claves de alarma y cuerpo.
+
+    Returns:
+        tuple | None: ``(alarma, cuerpo)`` o None si el objeto no tiene ninguna de las dos.
+
+    Raises:
+        ValueError: Si la línea no es un objeto JSON válido.
+    """
+    return parse_record(json.loads(line))
+
+
+def parse_record(data):
+    """
+    Interpreta un objeto ya decodificado con las claves de alarma y cuerpo.
+
+    Las claves se comparan sin distinguir mayúsculas (ver ``ALARMA_KEYS`` y ``CUERPO_KEYS``).
+
+    Args:
+        data (dict): Objeto con la alarma y el cuerpo.
+
+    Returns:
+        tuple | None: ``(alarma, cuerpo)`` o None si el objeto no tiene ninguna de las dos.
+
+    Raises:
+        ValueError: Si ``data`` no es un objeto.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("no es un objeto JSON")
+    fields = {str(key).lower(): value for key, value in data.items()}
+    alarma = _pick(fields, ALARMA_KEYS)
+    cuerpo = _pick(fields, CUERPO_KEYS)
+    if alarma is None and cuerpo is None:
+        return None
+    return _as_text(alarma), _as_text(cuerpo)
+
+
+def iter_jsonl_records(path):
+    """
+    Lee un archivo JSON lines (un objeto por línea) y genera sus alarmas.
+
+    Las líneas vacías se omiten y las que no son un objeto JSON válido se informan y
+    se saltean.
+
+    Args:
+        path (str): Ruta al archivo (.jsonl, .ndjson, opcionalmente .gz).
+
+    Yields:
+        AlarmRecord: Una alarma; ``fila`` es el número de línea.
+    """
+    with open_text(path) as f:
+        for fila, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                parsed = parse_jsonl_line(line)
+            except ValueError as e:
+                print(f"Línea {fila} de {path} ignorada: JSON inválido ({e})")
+                continue
+            if parsed is not None:
+                yield AlarmRecord(fila, *parsed)
+
+
+def _iter_json_array(f):
+    # Decodifica los elementos de a uno, leyendo sólo lo necesario para el siguiente
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    need_more = True
+    state = "inicio"  # inicio -> primero -> (siguiente -> valor)*
+    while True:
+        if need_more and not eof:
+            chunk = f.read(JSON_CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            need_more = False
+        position = _JSON_WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                raise ValueError("se esperaba un arreglo JSON" if state == "inicio" else "arreglo JSON sin cerrar")
+            need_more = True
+            continue
+        char = buffer[position]
+        if state == "inicio":
+            if char != "[":
+                raise ValueError("se esperaba un arreglo JSON")
+            position += 1
+            state = "primero"
+            continue
+        if char == "]" and state in ("primero", "siguiente"):
+            return
+        if state == "siguiente":
+            if char != ",":
+                raise ValueError(f"se esperaba ',' o ']' y se encontró {buffer[position:position + 20]!r}")
+            position += 1
+            state = "valor"
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"JSON inválido: {e}") from None
+            need_more = True
+            continue
+        if end == len(buffer) and not eof:
+            # Un valor escalar puede continuar en el bloque siguiente
+            need_more = True
+            continue
+        yield value
+        position = end
+        state = "siguiente"
+
+
+def iter_json_records(path):
+    """
+    Lee un archivo JSON con un arreglo de objetos y genera sus alarmas.
+
+    El arreglo se recorre de a un elemento, sin cargar el archivo completo. Los
+    elementos que no son objetos se informan y se saltean.
+
+    Args:
+        path (str): Ruta al archivo (.json, opcionalmente .gz).
+
+    Yields:
+        AlarmRecord: Una alarma; ``fila`` es la posición en el arreglo (desde 1).
+
+    Raises:
+        ValueError: Si el archivo no es un arreglo JSON válido.
+    """
+    with open_text(path) as f:
+        try:
+            for fila, data in enumerate(_iter_json_array(f), start=1):
+                try:
+                    parsed = parse_record(data)
+                except ValueError as e:
+                    print(f"Elemento {fila} de {path} ignorado: {e}")
+                    continue
+                if parsed is not None:
+                    yield AlarmRecord(fila, *parsed)
+        except ValueError as e:
+            raise ValueError(f"El archivo '{path}' no es un arreglo JSON válido: {e}") from None
+
+
+def parse_syslog_line(line):
+    """
+    Interpreta un mensaje syslog RFC 5424.
+
+    Args:
+        line (str): Mensaje completo, sin el salto de línea final.
+
+    Returns:
+        tuple | None: ``(alarma, cuerpo)`` o None si la línea no es RFC 5424. La alarma
+        se toma del parámetro ``alarma`` de los datos estructurados; si no está, el MSG
+        se divide en el primer ``' | '`` (alarma a la izquierda, cuerpo a la derecha).
+    """
+    header = _SYSLOG_HEADER.match(line)
+    if header is None:
+        return None
+    rest = line[header.end():]
+
+    params = {}
+    if rest.startswith("-"):
+        rest = rest[1:]
+    else:
+        position = 0
+        while True:
+            element = _SD_ELEMENT.match(rest, position)
+            if element is None:
+                break
+            for param in _SD_PARAM.finditer(element.group("params")):
+                params.setdefault(param.group("name").lower(), _SD_ESCAPE.sub(r"\1", param.group("value")))
+            position = element.end()
+        if position == 0:
+            return None
+        rest = rest[position:]
+
+    message = rest[1:] if rest.startswith(" ") else rest
+    if message.startswith("\ufeff"):
+        message = message[1:]
+
+    alarma = params.get(SYSLOG_ALARMA_PARAM)
+    if alarma is not None:
+        return alarma, message
+    alarma, separator, cuerpo = message.partition(SYSLOG_MSG_SEPARATOR)
+    if not separator:
+        return "", message
+    return alarma.strip(), cuerpo
+
+
+def iter_syslog_records(path):
+    """
+    Lee un archivo de mensajes syslog RFC 5424 (uno por línea) y genera sus alarmas.
+
+    Args:
+        path (str): Ruta al archivo (.log, .syslog, opcionalmente .gz).
+
+    Yields:
+        AlarmRecord: Una alarma; ``fila`` es el número de línea.
+    """
+    with open_text(path) as f:
+        for fila, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            parsed = parse_syslog_line(line)
+            if parsed is None:
+                print(f"Línea {fila} de {path} ignorada: no es un mensaje syslog RFC 5424")
+                continue
+            yield AlarmRecord(fila, *parsed)
+
+
+def iter_records(path, sheet_name=DEFAULT_SHEET):
+    """
+    Genera los registros de un archivo de entrada eligiendo el adaptador por su extensión.
+
+    Args:
+        path (str): Ruta al archivo de entrada.
+        sheet_name (str): Hoja a leer si el archivo es un libro de Excel.
+
+    Returns:
+        iterator: Generador de ``AlarmRecord``.
+    """
+    extension = _extension(path)
+    if extension in EXCEL_EXTENSIONS:
+        return iter_alarm_records(path, sheet_name=sheet_name)
+    if extension in CSV_EXTENSIONS:
+        return iter_csv_records(path)
+    if extension in JSON_EXTENSIONS:
+        return iter_json_records(path)
+    if extension in JSONL_EXTENSIONS:
+        return iter_jsonl_records(path)
+    if extension in SYSLOG_EXTENSIONS:
+        return iter_syslog_records(path)
+    raise ValueError(f"Formato de entrada no soportado: {path} (extensiones: {', '.join(SUPPORTED_EXTENSIONS)})")
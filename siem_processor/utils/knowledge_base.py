@@ -0,0 +1,86 @@
+"""
+knowledge_base.py | Índice de observaciones conocidas a partir de la base de datos normalizada.
+
+Cada cuerpo de ``BD_Logs`` se reduce a una huella (hash del cuerpo normalizado) y se
+asocia con su observación. Un cuerpo entrante se normaliza con el mismo
+``normalize_body`` y se resuelve con una única consulta al diccionario, de modo que el
+costo por fila no depende del tamaño de la base.
+"""
+import hashlib
+from siem_processor.utils.normalization import normalize_body, normalize_database, cached_build, DEFAULT_CACHE_DIR
+
+OBSERVATION_COLUMNS = ("Observación", "Observacion", "Observaciones", "Observación Final")
+
+
+def body_fingerprint(normalized_body):
+    """
+    Calcula la huella de un cuerpo ya normalizado.
+
+    Args:
+        normalized_body (str): Cuerpo normalizado con ``normalize_body``.
+
+    Returns:
+        bytes: Digest BLAKE2b de 16 bytes.
+    """
+    return hashlib.blake2b(normalized_body.encode("utf-8"), digest_size=16).digest()
+
+
+def build_observation_index(df_bd):
+    """
+    Construye el índice huella -> observación a partir de la base normalizada.
+
+    Ante cuerpos repetidos prevalece la última fila de la hoja. Se omiten las filas
+    sin cuerpo o sin observación.
+
+    Args:
+        df_bd (DataFrame): Resultado de ``normalize_database`` (con 'Cuerpo Normalizado').
+
+    Returns:
+        dict: Índice de observaciones conocidas.
+    """
+    column = next((c for c in OBSERVATION_COLUMNS if c in df_bd.columns), None)
+    if column is None:
+        print(f"Advertencia: la base de datos no tiene columna de observaciones ({', '.join(OBSERVATION_COLUMNS)})")
+        return {}
+
+    index = {}
+    for normalized, observacion in zip(df_bd['Cuerpo Normalizado'], df_bd[column]):
+        if not isinstance(normalized, str) or not normalized or not isinstance(observacion, str) or not observacion.strip():
+            continue
+        index[body_fingerprint(normalized)] = observacion.strip()
+    return index
+
+
+def load_observation_index(bd_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Devuelve el índice de observaciones de la base, guardado en caché junto a la base normalizada.
+
+    Con la caché vigente el índice se carga sin leer el Excel ni importar pandas.
+
+    Args:
+        bd_file (str): Ruta al archivo Excel de la base de datos.
+        cache_dir (str | None): Carpeta de la caché. None desactiva la caché.
+
+    Returns:
+        dict: Índice de observaciones conocidas (ver ``build_observation_index``).
+    """
+    return cached_build(
+        bd_file, "index", lambda path: build_observation_index(normalize_database(path, cache_dir=cache_dir)),
+        cache_dir=cache_dir
+    )
+
+
+def lookup_observation(index, cuerpo):
+    """
+    Busca la observación registrada en la base para un cuerpo entrante.
+
+    Args:
+        index (dict): Índice creado con ``build_observation_index``.
+        cuerpo (str): Cuerpo del log (sin normalizar).
+
+    Returns:
+        str | None: Observación conocida o None si el cuerpo no está en la base.
+    """
+    if not index or not isinstance(cuerpo, str):
+        return None
+    return index.get(body_fingerprint(normalize_body(cuerpo)))
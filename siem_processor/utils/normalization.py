@@ -1,25 +1,171 @@
 """
 normalization.py| The script contains a function to normalize the database of SIEM alarms.
 """
-import pandas as pd
+import hashlib
+import json
+import pickle
 import re
 import os
-def normalize_database(input_file):
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+# Incrementar cuando cambie normalize_body para invalidar las cachés existentes
+NORMALIZATION_VERSION = 2
+
+# Frases que marcan el inicio de los datos de un cuerpo, en orden de prioridad
+START_PHRASES = ("Usuario de origen", "Usuario:", "Se han detectado")
+# Alarmas de login de Windows del export de BD_Logs: IP, script del host y usuario
+_WINDOWS_LOGIN_PATTERN = re.compile(
+    r'Alarm: Windows - Login.*?(\d+\.\d+\.\d+\.\d+).*?\|\|3\|\|(.*?\.py).*?User: (.*?) Session ID:', re.DOTALL
+)
+
+def normalize_database(input_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Lee la hoja 'BD' y agrega la columna 'Cuerpo Normalizado'.
+
+    El resultado se guarda en caché (ver ``cached_build``) y sólo se reconstruye
+    cuando el archivo cambia.
+
+    Args:
+        input_file (str): Ruta al archivo Excel de la base de datos.
+        cache_dir (str | None): Carpeta de la caché. None desactiva la caché.
+
+    Returns:
+        DataFrame: Base de datos con la columna 'Cuerpo Normalizado'.
+    """
+    return cached_build(input_file, "normalized", _build_normalized_database, cache_dir=cache_dir)
+
+def cached_build(input_file, name, build, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Devuelve un resultado derivado de un archivo, reutilizando el guardado en caché.
+
+    El resultado se guarda en ``cache_dir`` en formato pickle junto con la fecha de
+    modificación, el tamaño y el hash SHA-256 del archivo de origen. Las ejecuciones
+    siguientes lo cargan directamente y sólo lo reconstruyen cuando el archivo cambia.
+
+    Args:
+        input_file (str): Ruta al archivo de origen.
+        name (str): Nombre del resultado ('<archivo>.<hash de la ruta>.<name>.pkl' dentro
+            de la caché).
+        build (callable): Función ``build(input_file)`` que construye el resultado.
+        cache_dir (str | None): Carpeta de la caché. None desactiva la caché.
+
+    Returns:
+        object: El resultado de ``build``.
+    """
      # Verifica si el archivo existe
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"El archivo no existe: {os.path.abspath(input_file)}")
+    if cache_dir is None:
+        return build(input_file)
+
+    # El hash de la ruta absoluta separa archivos homónimos de distintas carpetas
+    path_key = hashlib.sha256(os.path.abspath(input_file).encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(cache_dir, f"{os.path.basename(input_file)}.{path_key}")
+    cache_file = base + f".{name}.pkl"
+    meta_file = base + f".{name}.json"
+    stat = os.stat(input_file)
+    meta = _read_meta(meta_file)
+
+    if meta and os.path.exists(cache_file) and meta.get("version") == NORMALIZATION_VERSION:
+        # Mismo mtime y tamaño: no hace falta ni siquiera hashear el archivo
+        if meta.get("mtime") == stat.st_mtime and meta.get("size") == stat.st_size:
+            return _load_pickle(cache_file)
+        digest = _file_digest(input_file)
+        if meta.get("sha256") == digest:
+            _write_meta(meta_file, stat, digest)
+            return _load_pickle(cache_file)
+    else:
+        digest = _file_digest(input_file)
+
+    result = build(input_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_file + ".tmp", "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_file + ".tmp", cache_file)
+    _write_meta(meta_file, stat, digest)
+    return result
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def _build_normalized_database(input_file):
+    # pandas se importa sólo al reconstruir la base, no en cada arranque
+    import pandas as pd
     df = pd.read_excel(input_file, sheet_name='BD')
-    df['Cuerpo Normalizado'] = df['Cuerpo'].apply(normalize_body)
+    df['Cuerpo Normalizado'] = normalize_series(df['Cuerpo'])
     return df
 
+def _file_digest(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def _read_meta(meta_file):
+    try:
+        with open(meta_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_meta(meta_file, stat, digest):
+    meta = {"version": NORMALIZATION_VERSION, "mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest}
+    with open(meta_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
 def normalize_body(body):
-    patterns = [
-        (r'^.*?(?=Usuario de origen)', 'Usuario de origen'),
-        (r'^.*?(?=Usuario:)', 'Usuario:'),
-        (r'^.*?(?=Se han detectado)', 'Se han detectado'),
-    ]
-    for pattern, start_phrase in patterns:
-        if start_phrase in body:
-            normalized = re.sub(pattern, '', body, flags=re.DOTALL)
-            return normalized.strip()
+    """
+    Normaliza un cuerpo descartando el encabezado previo a sus datos.
+
+    Se corta en la primera aparición de la frase de inicio de mayor prioridad presente
+    (ver ``START_PHRASES``).
+
+    Args:
+        body (str): Cuerpo del log. Los valores vacíos (None, NaN) se tratan como ''.
+
+    Returns:
+        str: Cuerpo normalizado.
+    """
+    if not isinstance(body, str):
+        # NaN es el único valor distinto de sí mismo
+        body = "" if body is None or body != body else str(body)
+    for phrase in START_PHRASES:
+        start = body.find(phrase)
+        if start >= 0:
+            return body[start:].strip()
     return body.strip()
+
+
+def normalize_series(bodies, rewrite_windows_login=False):
+    """
+    Normaliza una columna de cuerpos completa.
+
+    Aplica ``normalize_body`` celda por celda (``Series.map``, un bucle de Python por
+    fila); sólo la conversión de las celdas vacías o no textuales a texto y la
+    detección de los logins de Windows a reescribir operan sobre la columna completa.
+    Cada cuerpo se corta con búsquedas de subcadena, sin expresiones regulares.
+
+    Args:
+        bodies (Series): Cuerpos del log. Las celdas vacías (NaN) quedan como ''.
+        rewrite_windows_login (bool): Reescribe las alarmas 'Alarm: Windows - Login' sin
+            frase de inicio al formato de una línea con IP, host y usuario (lo usa la
+            normalización del export de BD_Logs).
+
+    Returns:
+        Series: Cuerpos normalizados, con el mismo índice.
+    """
+    text = bodies.where(bodies.notna(), "").astype(str)
+    normalized = text.map(normalize_body)
+    if rewrite_windows_login:
+        candidates = text.str.contains("Alarm: Windows - Login", regex=False)
+        for phrase in START_PHRASES:
+            candidates &= ~text.str.contains(phrase, regex=False)
+        if candidates.any():
+            parts = text[candidates].str.extract(_WINDOWS_LOGIN_PATTERN).dropna()
+            normalized.loc[parts.index] = (
+                "Alarm: Windows - Login  Se ha detectado un inicio de sesión en el equipo  "
+                + parts[0].str.strip() + " Host: " + parts[1].str.strip() + " User: " + parts[2].str.strip()
+            )
+    return normalized
@@ -0,0 +1,444 @@
+"""
+stats.py | Instrumentación de una ejecución: tiempos por etapa y por handler, fallos de extracción,
+cachés y llamadas externas.
+
+Hay una única instancia activa por proceso (``get_stats``). Por defecto es una
+instancia deshabilitada: ``stage`` devuelve un contexto vacío compartido y los
+``record_*`` retornan de inmediato, por lo que el costo con la instrumentación apagada
+es una consulta de atributo. Los workers de ``AlarmPipeline`` devuelven su ``snapshot``
+con cada bloque y el proceso principal lo combina con ``merge``. Las duraciones se
+acumulan en histogramas (``DurationHistogram``), por lo que la memoria no crece con la
+cantidad de filas.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Prefijos de observación que indican que la regex del handler no encontró los campos
+EXTRACTION_MISS_PREFIX = "No se pudo extraer"
+ERROR_PREFIX = "Error"
+
+_NULL_CONTEXT = nullcontext()
+
+
+# Histograma de duraciones: cubetas geométricas desde 1 µs, cada una un 5% más ancha
+HISTOGRAM_MIN_SECONDS = 1e-6
+HISTOGRAM_GROWTH = 1.05
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+
+class DurationHistogram:
+    """
+    Histograma de duraciones con memoria acotada.
+
+    Guarda exactos la cantidad, la suma y el máximo, y cuenta cada duración en una
+    cubeta geométrica: la memoria depende del rango de duraciones (a lo sumo unas
+    cientos de cubetas) y no de la cantidad de filas, los percentiles tienen un error
+    relativo menor al 5% y dos histogramas se combinan sumando cubetas.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}  # índice de cubeta -> cantidad
+
+    def add(self, seconds, times=1):
+        """
+        Registra una duración.
+
+        Args:
+            seconds (float): Duración en segundos.
+            times (int): Cantidad de veces que se repite (handlers por lote).
+        """
+        if seconds <= HISTOGRAM_MIN_SECONDS:
+            index = 0
+        else:
+            index = math.ceil(math.log(seconds / HISTOGRAM_MIN_SECONDS) / _LOG_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + times
+        self.count += times
+        self.total += seconds * times
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """
+        Suma a este histograma las duraciones de otro.
+
+        Args:
+            other (DurationHistogram): Histograma a sumar.
+        """
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        Estima un percentil con el límite superior de su cubeta.
+
+        Args:
+            percent (float): Percentil entre 0 y 100.
+
+        Returns:
+            float | None: Segundos, o None si no hay duraciones.
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(HISTOGRAM_MIN_SECONDS * HISTOGRAM_GROWTH ** index, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Resume el histograma en milisegundos.
+
+        Returns:
+            dict: 'p50_ms', 'p95_ms', 'p99_ms' y 'max_ms' (None si no hay duraciones).
+        """
+        return {
+            "p50_ms": round(self.percentile(50) * 1000, 3) if self.count else None,
+            "p95_ms": round(self.percentile(95) * 1000, 3) if self.count else None,
+            "p99_ms": round(self.percentile(99) * 1000, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3) if self.count else None,
+        }
+
+
+class RunStats:
+    """
+    Acumula las métricas de una ejecución.
+
+    Args:
+        enabled (bool): Si es False, todos los métodos de registro son no-ops.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        """
+        Descarta todo lo registrado (lo usan los workers después de cada snapshot).
+        """
+        self.stages = {}    # etapa -> [segundos, veces]
+        self.handlers = {}  # handler -> {"durations": DurationHistogram, "misses": n, "errors": n}
+        self.calls = {}     # servicio -> {"durations": DurationHistogram, "failures": n}
+        self.counters = {}
+        self.caches = {}
+        self.services = {}  # cliente externo -> contadores de su método ``stats``
+
+    # --- Registro ---
+    def stage(self, name):
+        """
+        Devuelve un contexto que mide el tiempo de una etapa.
+
+        Args:
+            name (str): Nombre de la etapa.
+
+        Returns:
+            contextmanager: Contexto que acumula el tiempo transcurrido.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds, times=1):
+        """
+        Suma tiempo a una etapa medida por fuera de ``stage``.
+
+        Args:
+            name (str): Nombre de la etapa.
+            seconds (float): Segundos a sumar.
+            times (int): Cantidad de ejecuciones que representan.
+        """
+        if not self.enabled:
+            return
+        entry = self.stages.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += times
+
+    def stage_seconds(self, name):
+        """
+        Devuelve el tiempo acumulado de una etapa.
+
+        Args:
+            name (str): Nombre de la etapa.
+
+        Returns:
+            float: Segundos acumulados (0 si la etapa no se registró).
+        """
+        entry = self.stages.get(name)
+        return entry[0] if entry else 0.0
+
+    def timed_iter(self, name, iterable):
+        """
+        Envuelve un iterable y acumula en una etapa el tiempo que tarda en producir cada elemento.
+
+        Args:
+            name (str): Nombre de la etapa.
+            iterable (iterable): Iterable a medir.
+
+        Returns:
+            iterator: El mismo iterable si la instrumentación está apagada.
+        """
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        entry = self.stages.setdefault(name, [0.0, 0])
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                entry[0] += time.perf_counter() - started
+                return
+            entry[0] += time.perf_counter() - started
+            entry[1] += 1
+            yield item
+
+    def record_handler(self, name, seconds, observacion, rows=1):
+        """
+        Registra la ejecución de un handler.
+
+        Args:
+            name (str): Nombre del handler.
+            seconds (float): Duración por fila.
+            observacion (str): Observación devuelta (para contar fallos de extracción).
+            rows (int): Filas que representa la medición (handlers por lote).
+        """
+        if not self.enabled:
+            return
+        entry = self.handlers.get(name)
+        if entry is None:
+            entry = self.handlers[name] = {"durations": DurationHistogram(), "misses": 0, "errors": 0}
+        entry["durations"].add(seconds, rows)
+        if isinstance(observacion, str):
+            if observacion.startswith(EXTRACTION_MISS_PREFIX):
+                entry["misses"] += rows
+            elif observacion.startswith(ERROR_PREFIX):
+                entry["errors"] += rows
+
+    def record_call(self, service, seconds, ok=True):
+        """
+        Registra una llamada a un servicio externo (puede llamarse desde varios hilos).
+
+        Args:
+            service (str): Nombre del servicio.
+            seconds (float): Duración de la llamada.
+            ok (bool): Si la llamada tuvo éxito.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.calls.get(service)
+            if entry is None:
+                entry = self.calls[service] = {"durations": DurationHistogram(), "failures": 0}
+            entry["durations"].add(seconds)
+            if not ok:
+                entry["failures"] += 1
+
+    def count(self, name, n=1):
+        """
+        Incrementa un contador (puede llamarse desde varios hilos).
+
+        Args:
+            name (str): Nombre del contador.
+            n (int): Cantidad a sumar.
+        """
+        if self.enabled and n:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_cache(self, name, cache_stats):
+        """
+        Guarda las estadísticas de una caché (el dict de su método ``stats``).
+
+        Args:
+            name (str): Nombre de la caché.
+            cache_stats (dict): Contadores de la caché.
+        """
+        if self.enabled:
+            self.caches[name] = dict(cache_stats)
+
+    def set_service(self, name, service_stats):
+        """
+        Guarda los contadores de un cliente de un servicio externo (reintentos, límite de
+        tasa, estado del circuito; el dict de su método ``stats``).
+
+        Args:
+            name (str): Nombre del servicio.
+            service_stats (dict): Contadores del cliente.
+        """
+        if self.enabled:
+            self.services[name] = dict(service_stats)
+
+    # --- Combinación entre procesos ---
+    def snapshot(self):
+        """
+        Devuelve lo registrado como un dict serializable (para enviarlo desde un worker).
+
+        Returns:
+            dict: Etapas, handlers, llamadas, contadores, cachés y servicios.
+        """
+        return {
+            "stages": self.stages,
+            "handlers": self.handlers,
+            "calls": self.calls,
+            "counters": self.counters,
+            "caches": self.caches,
+            "services": self.services,
+        }
+
+    def merge(self, snapshot):
+        """
+        Suma a esta instancia lo registrado en otro proceso.
+
+        Args:
+            snapshot (dict | None): Resultado de ``snapshot``.
+        """
+        if not self.enabled or not snapshot:
+            return
+        for name, (seconds, times) in snapshot["stages"].items():
+            self.add_time(name, seconds, times)
+        for name, data in snapshot["handlers"].items():
+            entry = self.handlers.setdefault(name, {"durations": DurationHistogram(), "misses": 0, "errors": 0})
+            entry["durations"].merge(data["durations"])
+            entry["misses"] += data["misses"]
+            entry["errors"] += data["errors"]
+        with self._lock:
+            for name, data in snapshot["calls"].items():
+                entry = self.calls.setdefault(name, {"durations": DurationHistogram(), "failures": 0})
+                entry["durations"].merge(data["durations"])
+                entry["failures"] += data["failures"]
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+        self.caches.update(snapshot["caches"])
+        self.services.update(snapshot["services"])
+
+    # --- Reporte ---
+    def report(self):
+        """
+        Arma el reporte de la ejecución.
+
+        Returns:
+            dict: Tiempo total, etapas, handlers (filas, tiempo acumulado, percentiles y
+            tasa de fallos de extracción), llamadas externas, contadores, cachés y
+            servicios externos.
+        """
+        handlers = {}
+        for name, data in sorted(self.handlers.items()):
+            rows = data["durations"].count
+            handlers[name] = {
+                "rows": rows,
+                "seconds": round(data["durations"].total, 6),
+                **data["durations"].summary(),
+                "extraction_misses": data["misses"],
+                "miss_rate": data["misses"] / rows if rows else 0.0,
+                "errors": data["errors"],
+            }
+        calls = {}
+        for name, data in sorted(self.calls.items()):
+            calls[name] = {
+                "calls": data["durations"].count,
+                "failures": data["failures"],
+                "seconds": round(data["durations"].total, 6),
+                **data["durations"].summary(),
+            }
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": {name: {"seconds": round(seconds, 6), "times": times}
+                       for name, (seconds, times) in self.stages.items()},
+            "handlers": handlers,
+            "external_calls": calls,
+            "counters": dict(self.counters),
+            "caches": dict(self.caches),
+            "services": dict(self.services),
+        }
+
+    def write_json(self, path):
+        """
+        Guarda el reporte en un archivo JSON.
+
+        Args:
+            path (str): Ruta del archivo.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def print_summary(self):
+        """
+        Muestra un resumen del reporte en la consola.
+        """
+        report = self.report()
+        print(f"\n--- Estadísticas de la ejecución ({report['total_seconds']:.2f} s) ---")
+        print("Etapas:")
+        for name, data in report["stages"].items():
+            print(f"  {name:<24}{data['seconds']:>10.3f} s{data['times']:>10}")
+        print("Handlers:")
+        print(f"  {'':<32}{'filas':>8}{'total s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'sin extraer':>13}")
+        for name, data in report["handlers"].items():
+            print(f"  {name:<32}{data['rows']:>8}{data['seconds']:>10.3f}{data['p50_ms']:>9.3f}{data['p95_ms']:>9.3f}"
+                  f"{data['p99_ms']:>9.3f}{data['miss_rate']:>12.1%}")
+        if report["external_calls"]:
+            print("Llamadas externas:")
+            for name, data in report["external_calls"].items():
+                print(f"  {name:<24}{data['calls']:>8} llamadas, {data['failures']} fallidas, "
+                      f"p50 {data['p50_ms']:.1f} ms, p95 {data['p95_ms']:.1f} ms, máx {data['max_ms']:.1f} ms")
+        if report["counters"]:
+            print("Contadores: " + ", ".join(f"{name}={value}" for name, value in report["counters"].items()))
+        for name, data in report["caches"].items():
+            rate = data.get("hit_rate")
+            print(f"Caché {name}: " + (f"{rate:.1%} de aciertos" if rate is not None else json.dumps(data)))
+        for name, data in report["services"].items():
+            print(f"API {name}: " + ", ".join(f"{key}={value}" for key, value in data.items()))
+
+
+_active = RunStats(enabled=False)
+
+
+def get_stats():
+    """
+    Devuelve la instancia de estadísticas activa en el proceso.
+
+    Returns:
+        RunStats: La instancia activa (deshabilitada si no se configuró ninguna).
+    """
+    return _active
+
+
+def set_stats(stats):
+    """
+    Reemplaza la instancia de estadísticas activa.
+
+    Args:
+        stats (RunStats | None): Nueva instancia; None vuelve a la deshabilitada.
+
+    Returns:
+        RunStats: La instancia que estaba activa.
+    """
+    global _active
+    previous = _active
+    _active = stats if stats is not None else RunStats(enabled=False)
+    return previous
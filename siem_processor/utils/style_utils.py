@@ -1,8 +1,15 @@
 """
 style_utils.py | Módulo con funciones para aplicar estilos a celdas de Excel.
 """
-import pandas as pd
-from openpyxl.styles import Font, PatternFill
+from openpyxl.styles import Font, PatternFill, NamedStyle
+
+CRITICAL_STYLE = "siem_critica"
+BOLD_STYLE = "siem_negrita"
+
+# Objetos de estilo compartidos: se crean una sola vez y se reutilizan en todas las celdas
+CRITICAL_FONT = Font(bold=True, color="000000")  # Texto en negrita
+CRITICAL_FILL = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")  # Fondo rojo
+BOLD_FONT = Font(bold=True)
 
 def read_excel(file_path, sheet_name):
     """
@@ -15,6 +22,7 @@ def read_excel(file_path, sheet_name):
     Returns:
         DataFrame: Contenido de la hoja en forma de DataFrame.
     """
+    import pandas as pd
     return pd.read_excel(file_path, sheet_name=sheet_name)
 
 def save_excel(workbook, output_file):
@@ -40,10 +48,37 @@ def apply_styles(sheet, row_index, is_critical=False, is_bold=False):
     """
     cell = sheet.cell(row=row_index + 2, column=2)  # Columna fija (índice 2)
     if is_critical:
-        cell.font = Font(bold=True, color="000000")  # Texto en negrita
-        cell.fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")  # Fondo rojo
+        cell.font = CRITICAL_FONT
+        cell.fill = CRITICAL_FILL
     elif is_bold:
-        cell.font = Font(bold=True)
+        cell.font = BOLD_FONT
+
+def register_named_styles(workbook):
+    """
+    Registra en el libro los estilos con nombre usados para alarmas críticas y en negrita.
+
+    Args:
+        workbook (Workbook): Objeto Workbook de openpyxl (admite modo write-only).
+    """
+    workbook.add_named_style(NamedStyle(name=CRITICAL_STYLE, font=CRITICAL_FONT, fill=CRITICAL_FILL))
+    workbook.add_named_style(NamedStyle(name=BOLD_STYLE, font=BOLD_FONT))
+
+def get_style_name(is_critical=False, is_bold=False):
+    """
+    Devuelve el estilo con nombre que corresponde a una fila.
+
+    Args:
+        is_critical (bool): Indica si la alarma es crítica (rojo).
+        is_bold (bool): Indica si el texto debe estar en negrita.
+
+    Returns:
+        str | None: Nombre del estilo o None si la celda no lleva estilo.
+    """
+    if is_critical:
+        return CRITICAL_STYLE
+    if is_bold:
+        return BOLD_STYLE
+    return None
 
 def is_critical_alarm(alarm):
     """
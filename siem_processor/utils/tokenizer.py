@@ -0,0 +1,118 @@
+"""
+tokenizer.py | Tokenizador de cuerpos SIEM con el formato 'Etiqueta: valor'.
+
+Los cuerpos de las alarmas son secuencias de pares ``Etiqueta: valor`` con un
+vocabulario fijo de etiquetas. ``tokenize`` recorre el cuerpo una sola vez buscando
+las etiquetas conocidas (las más largas primero para que ``Usuario de origen:`` no se
+lea como ``Usuario:``) y toma como valor de cada una el texto hasta la siguiente
+etiqueta. El orden de los campos no importa y los campos faltantes simplemente no
+aparecen en el resultado, sin patrones alternativos.
+
+Una etiqueta sólo se reconoce al comienzo del cuerpo o después de un espacio y con
+las mayúsculas exactas de ``LABELS``, para no cortar valores de texto libre que
+mencionan algo como ``"Host: ejemplo.com"`` o ``proceso: 1``. Las etiquetas de
+``TRAILING_LABELS`` (el comando ejecutado) son siempre el último campo: su valor
+llega hasta el final del cuerpo aunque contenga otras etiquetas.
+"""
+import re
+
+# Vocabulario de etiquetas, con la forma usada como clave en el resultado
+LABELS = (
+    "Usuario de origen",
+    "Usuario de destino",
+    "Grupo (si corresponde)",
+    "IP de origen",
+    "IP de destino",
+    "Ip Origen",
+    "Servidor",
+    "Host",
+    "Proceso",
+    "Usuario",
+    "Comando",
+    "DC",
+    "Hora",
+    "Puerto",
+)
+
+# Etiquetas cuyo valor es texto libre y llega hasta el final del cuerpo
+TRAILING_LABELS = frozenset({"Comando"})
+
+_CANONICAL = {label.lower(): label for label in LABELS}
+_LABEL_ALTERNATIVES = "|".join(re.escape(label) for label in sorted(LABELS, key=len, reverse=True))
+_LABEL_PATTERN = re.compile(r"(?<!\S)(" + _LABEL_ALTERNATIVES + r")\s*:")
+_LABEL_PATTERN_ANY_CASE = re.compile(r"(?<!\S)(" + _LABEL_ALTERNATIVES + r")\s*:", re.IGNORECASE)
+
+
+def _iter_fields(cuerpo, ignore_case=False):
+    pattern = _LABEL_PATTERN_ANY_CASE if ignore_case else _LABEL_PATTERN
+    label = None
+    start = 0
+    for match in pattern.finditer(cuerpo):
+        if label is not None:
+            yield label, cuerpo[start:match.start()].strip()
+        label = _CANONICAL[match.group(1).lower()]
+        start = match.end()
+        if label in TRAILING_LABELS:
+            break
+    if label is not None:
+        yield label, cuerpo[start:].strip()
+
+
+def tokenize(cuerpo, ignore_case=False):
+    """
+    Convierte un cuerpo en un diccionario de campos en una sola pasada.
+
+    Si una etiqueta se repite, se conserva su primer valor (ver ``tokenize_all`` para
+    obtener todos). El texto anterior a la primera etiqueta conocida se descarta.
+
+    Args:
+        cuerpo (str): El cuerpo del log.
+        ignore_case (bool): Reconocer las etiquetas sin distinguir mayúsculas (para los
+            formatos cuyo texto varía, como el login con clave pública).
+
+    Returns:
+        dict: Etiqueta (según ``LABELS``) -> valor sin espacios extremos.
+    """
+    fields = {}
+    if not isinstance(cuerpo, str):
+        return fields
+    for label, value in _iter_fields(cuerpo, ignore_case):
+        fields.setdefault(label, value)
+    return fields
+
+
+def tokenize_all(cuerpo, ignore_case=False):
+    """
+    Como ``tokenize``, pero conserva todos los valores de las etiquetas repetidas.
+
+    Args:
+        cuerpo (str): El cuerpo del log.
+        ignore_case (bool): Reconocer las etiquetas sin distinguir mayúsculas.
+
+    Returns:
+        dict: Etiqueta (según ``LABELS``) -> lista de valores en el orden del cuerpo.
+    """
+    fields = {}
+    if not isinstance(cuerpo, str):
+        return fields
+    for label, value in _iter_fields(cuerpo, ignore_case):
+        fields.setdefault(label, []).append(value)
+    return fields
+
+
+def first_word(fields, label):
+    """
+    Devuelve la primera palabra del valor de un campo.
+
+    Sirve para los campos cuyo valor es un único token (IPs, hosts, usuarios) cuando
+    el cuerpo agrega texto libre después del valor.
+
+    Args:
+        fields (dict): Resultado de ``tokenize``.
+        label (str): Etiqueta del campo.
+
+    Returns:
+        str | None: La primera palabra, o None si el campo falta o está vacío.
+    """
+    words = fields.get(label, "").split(maxsplit=1)
+    return words[0] if words else None
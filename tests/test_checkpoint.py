@@ -0,0 +1,45 @@
+"""
+test_checkpoint.py | Reanudación de un procesamiento a partir del checkpoint.
+"""
+from siem_processor.pipeline import AlarmPipeline
+from siem_processor.utils.checkpoint import CheckpointStore
+from siem_processor.utils.excel_io import AlarmRecord
+
+SALTO = "Notificacion SIEM - Posible salto lateral 6+"
+RECORDS = [
+    AlarmRecord(2, SALTO, "Usuario de origen: liuzzid_dbaadm"),
+    AlarmRecord(3, SALTO, "Usuario de origen: pepe"),
+    AlarmRecord(4, SALTO, "Usuario de origen: liuzzid_dbaadm"),
+]
+
+
+def _run(db_path, records):
+    store = CheckpointStore("dia.xlsx::7-11", db_path=db_path)
+    try:
+        results = [result for _, result in AlarmPipeline(checkpoint=store).process(records)]
+        return results, store.reused, store.stored
+    finally:
+        store.close()
+
+
+def test_second_run_reuses_stored_rows(tmp_path):
+    db_path = str(tmp_path / "checkpoint.sqlite")
+    first, reused, stored = _run(db_path, RECORDS)
+    assert (reused, stored) == (0, 2)
+
+    second, reused, stored = _run(db_path, RECORDS + [AlarmRecord(5, SALTO, "Usuario de origen: villajos_dbaadm")])
+    assert second[:3] == first
+    assert second[3][0] == "Salto Lateral detectado. Usuario DBA: villajos_dbaadm."
+    # Las tres filas ya vistas (una repetida) salen del checkpoint; sólo se guarda la nueva
+    assert (reused, stored) == (3, 1)
+
+
+def test_error_results_are_not_stored(tmp_path):
+    store = CheckpointStore("dia.xlsx::7-11", db_path=str(tmp_path / "checkpoint.sqlite"))
+    try:
+        store.store_many([(("a", "x"), ("Error al realizar la solicitud a la API", False)), (("a", "y"), ("ok", True))])
+        assert store.lookup_many([("a", "x"), ("a", "y")]) == {("a", "y"): ("ok", True)}
+        store.clear()
+        assert store.lookup_many([("a", "y")]) == {}
+    finally:
+        store.close()
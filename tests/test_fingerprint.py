@@ -0,0 +1,41 @@
+"""
+test_fingerprint.py | Memoización de alarmas repetidas y claves de plantilla.
+"""
+from siem_processor.utils.fingerprint import AlarmMemo, template_key
+
+
+def test_template_key_masks_variable_values():
+    key, tokens = template_key("A", "Login de e47483962 desde 181.91.87.145 el 2024/12/06 12:39:09 puerto 22")
+    assert key == ("A", "Login de <USUARIO> desde <IP> el <FECHA> puerto <NUM>")
+    assert tokens == ["e47483962", "181.91.87.145", "2024/12/06 12:39:09", "22"]
+
+
+def test_exact_pairs_are_reused_and_templates_only_counted():
+    memo = AlarmMemo()
+    assert memo.lookup("A", "ip 10.0.0.1") is None
+    memo.store("A", "ip 10.0.0.1", ("ok", True))
+    assert memo.lookup("A", "ip 10.0.0.1") == ("ok", True)
+    # Misma plantilla, otro valor: se cuenta pero el handler debe ejecutarse
+    assert memo.lookup("A", "ip 10.0.0.2") is None
+
+    stats = memo.stats()
+    assert (stats["rows"], stats["exact_hits"], stats["template_hits"], stats["templates"]) == (3, 1, 2, 1)
+
+
+def test_error_results_are_not_memoized():
+    memo = AlarmMemo()
+    memo.store("A", "x", ("Error al realizar la solicitud a la API", False))
+    memo.store("A", "y", (None, False))
+    assert memo.lookup("A", "x") is None
+    assert memo.lookup("A", "y") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    memo = AlarmMemo(max_entries=2)
+    memo.store("A", "1", ("uno", False))
+    memo.store("A", "2", ("dos", False))
+    memo.lookup("A", "1")
+    memo.store("A", "3", ("tres", False))
+    assert memo.lookup("A", "2") is None
+    assert memo.lookup("A", "1") == ("uno", False)
+    assert memo.lookup("A", "3") == ("tres", False)
@@ -0,0 +1,51 @@
+"""
+test_geo_offline.py | Índice de geolocalización offline con rangos superpuestos.
+"""
+import random
+
+from siem_processor.modules.geo_offline import OfflineGeoResolver, _flatten_ranges, build_geo_index
+
+DATASET = """ip_start,ip_end,country
+10.0.0.0,10.255.255.255,Externo
+10.1.0.0,10.1.255.255,Interno
+10.1.2.0,10.1.2.255,Anidado
+10.200.0.0,11.0.0.255,Superpuesto
+"""
+
+
+def test_nested_and_overlapping_ranges_resolve_to_narrowest(tmp_path):
+    csv_file = tmp_path / "geo.csv"
+    csv_file.write_text(DATASET, encoding="utf-8")
+    build_geo_index(str(csv_file), str(tmp_path / "geo.idx"))
+    resolver = OfflineGeoResolver(str(tmp_path / "geo.idx"))
+
+    def country(ip):
+        info = resolver(ip)
+        return info and info["country"]
+
+    assert country("10.0.0.1") == "Externo"
+    assert country("10.1.0.5") == "Interno"
+    assert country("10.1.2.3") == "Anidado"
+    assert country("10.1.3.0") == "Interno"
+    assert country("10.2.0.0") == "Externo"
+    assert country("10.255.0.1") == "Superpuesto"
+    assert country("11.0.0.1") == "Superpuesto"
+    assert country("11.0.1.0") is None
+    assert country("9.9.9.9") is None
+
+
+def test_flatten_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(200):
+        ranges = []
+        for location in range(6):
+            start = rng.randint(0, 100)
+            ranges.append((start, rng.randint(start, 100), location))
+        flattened = _flatten_ranges(ranges)
+        assert all(flattened[i][0] > flattened[i - 1][1] for i in range(1, len(flattened)))
+        for value in range(102):
+            candidates = [(end - start, order, location)
+                          for order, (start, end, location) in enumerate(ranges) if start <= value <= end]
+            expected = min(candidates)[2] if candidates else None
+            found = next((location for start, end, location in flattened if start <= value <= end), None)
+            assert found == expected
@@ -0,0 +1,23 @@
+"""
+test_import_budget.py | Presupuesto de tiempo de importación de los puntos de entrada.
+"""
+import os
+
+import pytest
+
+from siem_processor.import_budget import ImportBudgetExceeded, enforce_budgets
+
+# Multiplicador de los tiempos máximos para equipos de CI más lentos
+FACTOR = float(os.environ.get("SIEM_IMPORT_BUDGET_FACTOR", "1.0"))
+
+
+def test_entry_points_within_import_budget():
+    try:
+        enforce_budgets(factor=FACTOR)
+    except ImportBudgetExceeded as e:
+        failed = [
+            f"{r['module']}: {r['error'] or ''}{r['seconds'] and round(r['seconds'] * 1000, 1)} ms "
+            f"(máx {r['budget'] * 1000:.0f} ms), prohibidos cargados: {r['forbidden']}"
+            for r in e.results if not r["ok"]
+        ]
+        pytest.fail("\n".join(failed))
@@ -0,0 +1,47 @@
+"""
+test_ingest.py | Lectura de arreglos JSON y de JSON lines.
+"""
+import gzip
+import json
+
+import pytest
+
+from siem_processor.utils import ingest
+from siem_processor.utils.excel_io import AlarmRecord
+
+ALARMS = [{"Alarma": f"A{i}", "Cuerpo": "x" * i + ' "q" ]'} for i in range(50)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_json_array_is_streamed_element_by_element(tmp_path, monkeypatch, capsys, chunk_size):
+    monkeypatch.setattr(ingest, "JSON_CHUNK_SIZE", chunk_size)
+    path = tmp_path / "alarmas.json"
+    path.write_text(json.dumps(ALARMS[:3] + [7] + ALARMS[3:], indent=2), encoding="utf-8")
+
+    records = list(ingest.iter_records(str(path)))
+
+    assert len(records) == len(ALARMS)
+    assert records[0] == AlarmRecord(1, "A0", ' "q" ]')
+    assert records[3].fila == 5
+    assert "Elemento 4" in capsys.readouterr().out
+
+
+def test_gzipped_json_array(tmp_path):
+    path = tmp_path / "alarmas.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(ALARMS[:2], f)
+    assert [record.alarma for record in ingest.iter_records(str(path))] == ["A0", "A1"]
+
+
+@pytest.mark.parametrize("content", ["", "{}", "[1,", '[{"a": 1} {"b": 2}]', "[1,]"])
+def test_invalid_json_array_raises(tmp_path, content):
+    path = tmp_path / "alarmas.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(ingest.iter_records(str(path)))
+
+
+def test_jsonl_reads_one_object_per_line(tmp_path):
+    path = tmp_path / "alarmas.jsonl"
+    path.write_text("\n".join(json.dumps(alarm) for alarm in ALARMS[:2]) + "\n\n", encoding="utf-8")
+    assert list(ingest.iter_records(str(path))) == [AlarmRecord(1, "A0", ' "q" ]'), AlarmRecord(2, "A1", 'x "q" ]')]
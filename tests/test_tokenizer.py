@@ -0,0 +1,37 @@
+"""
+test_tokenizer.py | Tokenizador de cuerpos 'Etiqueta: valor' y handlers que lo usan.
+"""
+from siem_processor.modules.other_cases import get_salto_lateral_observation
+from siem_processor.utils.tokenizer import first_word, tokenize, tokenize_all
+
+
+def test_fields_in_any_order_and_longest_label_first():
+    fields = tokenize("IP de origen: 10.0.0.1 Usuario de destino: b Usuario de origen: a")
+    assert fields == {"IP de origen": "10.0.0.1", "Usuario de destino": "b", "Usuario de origen": "a"}
+
+
+def test_repeated_labels_keep_first_value_or_all_values():
+    cuerpo = "Usuario de origen: pepe Host: a Usuario de origen: liuzzid_dbaadm Host: b"
+    assert tokenize(cuerpo)["Usuario de origen"] == "pepe"
+    assert tokenize_all(cuerpo)["Usuario de origen"] == ["pepe", "liuzzid_dbaadm"]
+
+
+def test_labels_inside_free_text_are_not_split():
+    fields = tokenize('Host: srv1 Proceso: bash Usuario: root Comando: curl -H "Host: example.com" http://x Hora: 10:00')
+    assert fields["Host"] == "srv1"
+    assert fields["Comando"] == 'curl -H "Host: example.com" http://x Hora: 10:00'
+    assert tokenize("Comando: echo proceso: 1") == {"Comando": "echo proceso: 1"}
+
+
+def test_labels_are_case_sensitive_unless_requested():
+    cuerpo = "servidor: s1 ip origen: 10.0.0.1 usuario: u"
+    assert tokenize(cuerpo) == {}
+    fields = tokenize(cuerpo, ignore_case=True)
+    assert first_word(fields, "Servidor") == "s1"
+    assert fields["Ip Origen"] == "10.0.0.1"
+
+
+def test_salto_lateral_checks_every_origin_user():
+    cuerpo = "Usuario de origen: pepe Host: a Usuario de origen: villajos_dbaadm Host: b"
+    assert get_salto_lateral_observation(cuerpo) == "Salto Lateral detectado. Usuario DBA: villajos_dbaadm."
+    assert get_salto_lateral_observation("Usuario de origen: pepe").startswith("No se detectó")